@@ -22,6 +22,7 @@ from typing import Dict, List, Optional, Any
 # Add the cache system to the path
 sys.path.append(str(Path(__file__).parent))
 from cache import get_simple_cache_system
+from cache_writer import BackgroundCacheWriter
 
 # Configure logging
 logging.basicConfig(
@@ -34,24 +35,60 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").lower() in ("1", "true", "yes", "on")
+
 class SimpleAutoHook:
-    """Simple automatic caching hook"""
+    """Simple automatic caching hook
+    
+    With write_behind enabled, records are built on the caller's thread and
+    written by a BackgroundCacheWriter in batches; the cache_* methods then
+    return the record id instead of the file path.
+    """
     
-    def __init__(self):
+    def __init__(self, write_behind: Optional[bool] = None, writer_options: Dict[str, Any] = None):
         self.cache = get_simple_cache_system()
         self.active_sessions = {}
         self.running = False
         
+        if write_behind is None:
+            write_behind = _env_flag("CACHE_WRITE_BEHIND")
+        self.writer = None
+        if write_behind:
+            options = {
+                "max_queue": int(os.environ.get("CACHE_WRITE_QUEUE_SIZE", 1000)),
+                "batch_size": int(os.environ.get("CACHE_WRITE_BATCH_SIZE", 100)),
+                "flush_interval": float(os.environ.get("CACHE_WRITE_FLUSH_INTERVAL", 1.0)),
+                "backpressure": os.environ.get("CACHE_WRITE_BACKPRESSURE", "block"),
+            }
+            options.update(writer_options or {})
+            self.writer = BackgroundCacheWriter(self.cache, **options)
+        
     def start(self):
         """Start the auto hook"""
+        if self.writer:
+            self.writer.start()
         self.running = True
         logger.info("Simple auto-cache hook started")
     
+    def flush(self):
+        """Write out any records still queued for background writing"""
+        if self.writer:
+            self.writer.flush()
+    
     def stop(self):
-        """Stop the auto hook"""
+        """Stop the auto hook, flushing queued records first"""
         self.running = False
+        if self.writer:
+            self.writer.stop()
         logger.info("Simple auto-cache hook stopped")
     
+    def _store(self, file_type: str, content: Dict[str, Any], kind: str) -> Optional[str]:
+        """Write synchronously, or queue for the background writer"""
+        if self.writer:
+            return self.writer.submit(file_type, self.cache.new_record(content), kind)
+        return getattr(self.cache, f"cache_{file_type}")(content)
+    
     def cache_thinking(self, user_query: str, thinking_content: str, tools_used: List[str] = None) -> Optional[str]:
         """Cache Claude thinking process"""
         if not self.running:
@@ -65,7 +102,7 @@ class SimpleAutoHook:
         }
         
         try:
-            file_path = self.cache.cache_thinking(content)
+            file_path = self._store("thinking", content, "thinking")
             if file_path:
                 logger.info(f"Cached thinking session")
                 return file_path
@@ -87,7 +124,7 @@ class SimpleAutoHook:
         }
         
         try:
-            file_path = self.cache.cache_research(content)
+            file_path = self._store("research", content, "research")
             if file_path:
                 logger.info(f"Cached research session")
                 return file_path
@@ -110,7 +147,7 @@ class SimpleAutoHook:
         }
         
         try:
-            file_path = self.cache.cache_agent(content)
+            file_path = self._store("agent", content, "agent")
             if file_path:
                 logger.info(f"Cached agent execution: {agent_name}")
                 return file_path
@@ -122,11 +159,11 @@ class SimpleAutoHook:
 # Global auto-hook instance
 _auto_hook = None
 
-def get_simple_auto_hook() -> SimpleAutoHook:
+def get_simple_auto_hook(write_behind: Optional[bool] = None) -> SimpleAutoHook:
     """Get global simple auto-hook instance"""
     global _auto_hook
     if _auto_hook is None:
-        _auto_hook = SimpleAutoHook()
+        _auto_hook = SimpleAutoHook(write_behind)
     return _auto_hook
 
 # Convenience functions for external integration
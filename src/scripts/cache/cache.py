@@ -10,12 +10,27 @@ Version: 2.0.0 (Simplified)
 """
 
 import json
+import random
 import uuid
 from datetime import datetime
+from functools import partial
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 import logging
 
+from cache_storage import (
+    SegmentStorage, create_storage, in_time_range, migrate_records, record_size,
+    resolve_backend, write_backend_marker
+)
+from cache_index import SessionIndex, TextIndex
+from cache_codecs import resolve_codec
+from cache_compression import DEFAULT_DICTIONARY_SIZE, Compressor, resolve_compression, train_dictionary
+from cache_ids import new_record_id
+from cache_lru import RecordCache
+from cache_metrics import activity_store, record_rows
+from cache_retention import RetentionManager, RetentionPolicy
+from cache_scan import ScanExecutor
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -23,7 +38,10 @@ logger = logging.getLogger(__name__)
 class SimpleCacheSystem:
     """Simple cache management system with only timestamp and content"""
     
-    def __init__(self, base_path: str = "src/dev/cache"):
+    def __init__(self, base_path: str = "src/dev/cache", storage: Optional[str] = None,
+                 workers: Optional[int] = None, codec: Optional[str] = None,
+                 compression: Optional[str] = None, compression_threshold: Optional[int] = None,
+                 read_cache_bytes: Optional[int] = None):
         self.base_path = Path(base_path)
         self.thinking_path = self.base_path / "claude_thinking"
         self.research_path = self.base_path / "research_sessions"
@@ -32,39 +50,106 @@ class SimpleCacheSystem:
         # Ensure directories exist
         self._ensure_directories()
         
+        # Storage backend per cache directory ("files", "segments" or "partitioned")
+        self.storage_backend = resolve_backend(self.base_path, storage)
+        # Codec for new records; existing records of any codec stay readable
+        self.codec = resolve_codec(codec)
+        # Optional per-record compression above a size threshold
+        self.compression, self.compression_threshold = resolve_compression(compression, compression_threshold)
+        self.storages = {
+            file_type: self._create_storage(self.storage_backend, getattr(self, f"{file_type}_path"))
+            for file_type in ["thinking", "research", "agent"]
+        }
+        
+        # Parsed records for repeated read_cache_file calls (CACHE_READ_CACHE_MB)
+        self.read_cache = RecordCache(read_cache_bytes)
+        
+        # Process pool used by full scans (serial for small caches)
+        self.scanner = ScanExecutor(workers)
+        
+        # Persistent secondary indexes, updated on every write
+        self.index_path = self.base_path / "index"
+        self._create_indexes()
+        
+        # Dashboard counters, appended as records are written
+        self.rollups = activity_store(self.index_path)
+        
         logger.info("Simple cache system initialized")
 
+    def _create_storage(self, backend: str, root: Path):
+        return create_storage(backend, root, self.codec, compression=self.compression,
+                              compression_threshold=self.compression_threshold)
+
     def _ensure_directories(self):
         """Ensure all cache directories exist"""
         for path in [self.thinking_path, self.research_path, self.agent_path]:
             path.mkdir(parents=True, exist_ok=True)
 
+    def _create_indexes(self):
+        """Bind secondary indexes to the current storages"""
+        self.session_index = SessionIndex(self.index_path, self.storages, scanner=self.scanner)
+        self.text_index = TextIndex(self.index_path, self.storages, scanner=self.scanner)
+        self.indexes = {
+            "sessions": self.session_index,
+            "fulltext": self.text_index
+        }
+
     def _get_timestamp(self) -> str:
         """Get formatted timestamp"""
         return datetime.now().isoformat()
 
-    def _get_filename(self, timestamp: str, cache_type: str) -> str:
-        """Generate simple filename from timestamp"""
-        # Convert ISO timestamp to filename-safe format
-        safe_timestamp = timestamp[:19].replace(':', '-')
-        return f"{safe_timestamp}_{cache_type}.json"
+    def new_record(self, content: Any) -> Dict[str, Any]:
+        """Build a cache record stamped with the current time and a unique id"""
+        now = datetime.now()
+        return {
+            "id": new_record_id(now),
+            "timestamp": now.isoformat(),
+            "content": content
+        }
 
-    def _save_cache_file(self, cache_data: Dict[str, Any], file_path: Path) -> bool:
-        """Save cache data to file with improved formatting"""
-        try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(
-                    cache_data, 
-                    f, 
-                    ensure_ascii=False,  # Keep Unicode characters readable
-                    indent=2,
-                    separators=(',', ': '),  # Clean formatting
-                    sort_keys=False  # Preserve key order
-                )
-            return True
-        except Exception as e:
-            logger.error(f"Failed to save cache file {file_path}: {e}")
-            return False
+    def _write_record(self, file_type: str, cache_data: Dict[str, Any], kind: str) -> Optional[str]:
+        """Persist a record through the storage backend and return its path"""
+        return self.write_records([(file_type, cache_data, kind)])[0]
+
+    def write_records(self, records: List[Tuple[str, Dict[str, Any], str]]) -> List[Optional[str]]:
+        """Persist (file_type, cache_data, kind) records, one durable batch per directory"""
+        records = list(records)
+        paths: List[Optional[str]] = [None] * len(records)
+        grouped: Dict[str, List[int]] = {}
+        for position, (file_type, cache_data, kind) in enumerate(records):
+            if not cache_data.get("id"):
+                # Unique, time-ordered id derived from the record timestamp
+                record_id = new_record_id(datetime.fromisoformat(cache_data["timestamp"]))
+                records[position] = (file_type, {"id": record_id, **cache_data}, kind)
+            grouped.setdefault(file_type, []).append(position)
+        
+        rollup_rows = []
+        for file_type, positions in grouped.items():
+            storage = self.storages[file_type]
+            items = [(records[p][1], records[p][2]) for p in positions]
+            
+            sig_before = storage.signature()
+            if len(items) == 1:
+                names = [storage.write(*items[0])]
+            else:
+                names = storage.write_batch(items)
+            sig_after = storage.signature()
+            
+            cache_path = getattr(self, f"{file_type}_path")
+            for position, name in zip(positions, names):
+                if name is None:
+                    continue
+                for index in self.indexes.values():
+                    index.record_write(file_type, name, records[position][1], sig_before, sig_after)
+                paths[position] = str(cache_path / name)
+                try:
+                    size = record_size(paths[position])
+                except OSError:
+                    size = 0
+                rollup_rows += record_rows(file_type, records[position][1], size)
+        
+        self.rollups.append(rollup_rows)
+        return paths
 
     def cache_thinking(self, content: Any) -> Optional[str]:
         """Cache Claude thinking process"""
@@ -74,13 +159,10 @@ class SimpleCacheSystem:
             "content": content
         }
         
-        filename = self._get_filename(timestamp, "thinking")
-        file_path = self.thinking_path / filename
-        
-        if self._save_cache_file(cache_data, file_path):
-            logger.info(f"Cached thinking: {filename}")
-            return str(file_path)
-        return None
+        file_path = self._write_record("thinking", cache_data, "thinking")
+        if file_path:
+            logger.info(f"Cached thinking: {Path(file_path).name}")
+        return file_path
 
     def cache_research(self, content: Any) -> Optional[str]:
         """Cache research session"""
@@ -90,13 +172,10 @@ class SimpleCacheSystem:
             "content": content
         }
         
-        filename = self._get_filename(timestamp, "research")
-        file_path = self.research_path / filename
-        
-        if self._save_cache_file(cache_data, file_path):
-            logger.info(f"Cached research: {filename}")
-            return str(file_path)
-        return None
+        file_path = self._write_record("research", cache_data, "research")
+        if file_path:
+            logger.info(f"Cached research: {Path(file_path).name}")
+        return file_path
 
     def cache_agent(self, content: Any) -> Optional[str]:
         """Cache agent execution"""
@@ -106,13 +185,10 @@ class SimpleCacheSystem:
             "content": content
         }
         
-        filename = self._get_filename(timestamp, "agent")
-        file_path = self.agent_path / filename
-        
-        if self._save_cache_file(cache_data, file_path):
-            logger.info(f"Cached agent execution: {filename}")
-            return str(file_path)
-        return None
+        file_path = self._write_record("agent", cache_data, "agent")
+        if file_path:
+            logger.info(f"Cached agent execution: {Path(file_path).name}")
+        return file_path
     
     def cache_conversation(self, session_id: str, prompt: str, response: str, 
                           tools_used: list = None, metadata: dict = None) -> Optional[str]:
@@ -131,13 +207,11 @@ class SimpleCacheSystem:
             }
         }
         
-        filename = self._get_filename(timestamp, "conversation")
-        file_path = self.thinking_path / filename  # Store in thinking for now
-        
-        if self._save_cache_file(cache_data, file_path):
-            logger.info(f"Cached conversation: {filename}")
-            return str(file_path)
-        return None
+        # Store in thinking for now
+        file_path = self._write_record("thinking", cache_data, "conversation")
+        if file_path:
+            logger.info(f"Cached conversation: {Path(file_path).name}")
+        return file_path
     
     def cache_tool_execution(self, tool_name: str, tool_input: dict, tool_output: dict,
                            session_id: str = None, metadata: dict = None) -> Optional[str]:
@@ -156,39 +230,40 @@ class SimpleCacheSystem:
             }
         }
         
-        filename = self._get_filename(timestamp, "tool")
-        file_path = self.agent_path / filename  # Store tools in agent path
-        
-        if self._save_cache_file(cache_data, file_path):
-            logger.info(f"Cached tool execution: {tool_name} -> {filename}")
-            return str(file_path)
-        return None
+        # Store tools in agent path
+        file_path = self._write_record("agent", cache_data, "tool")
+        if file_path:
+            logger.info(f"Cached tool execution: {tool_name} -> {Path(file_path).name}")
+        return file_path
     
     def find_by_session_id(self, session_id: str) -> List[dict]:
         """Find all cache entries for a specific session"""
         results = []
-        files = self.list_cache_files()
         
-        for file_type, file_list in files.items():
-            cache_path = getattr(self, f"{file_type}_path")
+        # Index entries are already ordered by timestamp
+        for location in self.session_index.lookup(session_id):
+            file_type = location['file_type']
+            file_path = getattr(self, f"{file_type}_path") / location['name']
+            cache_data = self.read_cache_file(file_path)
+            
+            if not cache_data:
+                # Record vanished since it was indexed
+                self.session_index.discard(file_type, location['name'])
+                continue
             
-            for filename in file_list:
-                file_path = cache_path / filename
-                cache_data = self.read_cache_file(file_path)
-                
-                if cache_data and 'content' in cache_data:
-                    content = cache_data['content']
-                    # Check if session_id matches
-                    if isinstance(content, dict) and content.get('session_id') == session_id:
-                        results.append({
-                            'file_path': str(file_path),
-                            'file_type': file_type,
-                            'timestamp': cache_data.get('timestamp'),
-                            'content': content
-                        })
+            content = cache_data.get('content')
+            if not isinstance(content, dict) or content.get('session_id') != session_id:
+                # Record was overwritten in place, re-index it
+                self.session_index.record_write(file_type, location['name'], cache_data)
+                continue
+            
+            results.append({
+                'file_path': str(file_path),
+                'file_type': file_type,
+                'timestamp': cache_data.get('timestamp'),
+                'content': content
+            })
         
-        # Sort by timestamp
-        results.sort(key=lambda x: x['timestamp'])
         return results
     
     def get_conversation_thread(self, session_id: str) -> dict:
@@ -247,10 +322,9 @@ class SimpleCacheSystem:
         return thread
 
     def read_cache_file(self, file_path: str) -> Optional[Dict[str, Any]]:
-        """Read cache file"""
+        """Read cache file (or segment record locator)"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return self.read_cache.read(file_path)
         except Exception as e:
             logger.error(f"Failed to read cache file {file_path}: {e}")
             return None
@@ -259,36 +333,75 @@ class SimpleCacheSystem:
         """List cache files by type"""
         files = {}
         
-        if cache_type in ["all", "thinking"]:
-            files["thinking"] = sorted([f.name for f in self.thinking_path.glob("*.json")])
+        for file_type, storage in self.storages.items():
+            if cache_type in ["all", file_type]:
+                files[file_type] = storage.list_names()
         
-        if cache_type in ["all", "research"]:
-            files["research"] = sorted([f.name for f in self.research_path.glob("*.json")])
+        return files
+
+    def iter_cache_records(self, cache_type: str = "all"):
+        """Stream (file_type, file_path, cache_data) for every record"""
+        for file_type, storage in self.storages.items():
+            if cache_type not in ["all", file_type]:
+                continue
+            cache_path = getattr(self, f"{file_type}_path")
+            for name, cache_data in storage.iter_records():
+                yield file_type, cache_path / name, cache_data
+
+    def get_record_size(self, file_path: str) -> int:
+        """Size in bytes of a cache file or segment record"""
+        try:
+            return record_size(file_path)
+        except Exception:
+            return 0
+
+    def search_content(self, query: str, cache_type: str = "all", use_index: bool = True,
+                       since: Optional[datetime] = None, until: Optional[datetime] = None) -> list:
+        """Ranked full-text search in cache content
         
-        if cache_type in ["all", "agent"]:
-            files["agent"] = sorted([f.name for f in self.agent_path.glob("*.json")])
+        Supports multiple terms (all must match), "quoted phrases" and
+        prefix* terms. With use_index=False, falls back to a substring scan.
+        since/until restrict results to records in [since, until).
+        """
+        if not use_index:
+            return self._scan_content(query, cache_type, since, until)
         
-        return files
+        results = []
+        for hit in self.text_index.search(query, cache_type):
+            if (since or until) and not in_time_range(_parse_time(hit['timestamp']), since, until):
+                continue
+            file_path = getattr(self, f"{hit['file_type']}_path") / hit['name']
+            cache_data = self.read_cache_file(file_path)
+            if not cache_data:
+                self.text_index.discard(hit['file_type'], hit['name'])
+                continue
+            
+            results.append({
+                "file": str(file_path),
+                "timestamp": cache_data.get("timestamp"),
+                "type": hit['file_type'],
+                "score": hit['score'],
+                "preview": str(cache_data.get("content", ""))[:200] + "..."
+            })
+        
+        return results
 
-    def search_content(self, query: str, cache_type: str = "all") -> list:
-        """Simple text search in cache content"""
+    def _scan_content(self, query: str, cache_type: str = "all", since: Optional[datetime] = None,
+                      until: Optional[datetime] = None) -> list:
+        """Substring search over every record (in the time range)"""
         results = []
-        cache_files = self.list_cache_files(cache_type)
         
-        for file_type, file_list in cache_files.items():
+        for file_type, storage in self.storages.items():
+            if cache_type not in ["all", file_type]:
+                continue
             cache_path = getattr(self, f"{file_type}_path")
-            
-            for filename in file_list:
-                file_path = cache_path / filename
-                cache_data = self.read_cache_file(file_path)
-                
-                if cache_data and query.lower() in str(cache_data.get("content", "")).lower():
-                    results.append({
-                        "file": str(file_path),
-                        "timestamp": cache_data.get("timestamp"),
-                        "type": file_type,
-                        "preview": str(cache_data.get("content", ""))[:200] + "..."
-                    })
+            paths = [cache_path / name for name in storage.list_names(since, until)]
+            for file_path, match in self.scanner.map(paths, partial(_match_content, query.lower())):
+                if match is None:
+                    continue
+                if (since or until) and not in_time_range(_parse_time(match["timestamp"]), since, until):
+                    continue
+                results.append({"file": str(file_path), "type": file_type, **match})
         
         return sorted(results, key=lambda x: x["timestamp"], reverse=True)
 
@@ -299,6 +412,8 @@ class SimpleCacheSystem:
         stats = {
             "timestamp": self._get_timestamp(),
             "base_path": str(self.base_path),
+            "storage_backend": self.storage_backend,
+            "codec": self.storages["thinking"].codec.name,
             "counts": {
                 "thinking": len(files.get("thinking", [])),
                 "research": len(files.get("research", [])),
@@ -307,40 +422,115 @@ class SimpleCacheSystem:
             "total_files": sum(len(file_list) for file_list in files.values())
         }
         
+        # Stored vs. uncompressed bytes, read from record headers only
+        stats["compression"] = {"algorithm": self.compression, "threshold": self.compression_threshold}
+        for file_type, storage in self.storages.items():
+            type_stats = storage.compression_stats()
+            type_stats["ratio"] = (round(type_stats["raw_bytes"] / type_stats["stored_bytes"], 2)
+                                   if type_stats["stored_bytes"] else 1.0)
+            stats["compression"][file_type] = type_stats
+        
+        stats["read_cache"] = self.read_cache.stats()
+        stats["listings"] = {file_type: storage.listing_stats() for file_type, storage in self.storages.items()}
+        
         return stats
 
     def cleanup_old_files(self, days: int = 30) -> Dict[str, int]:
         """Remove files older than specified days"""
-        from datetime import timedelta
-        
-        cutoff_date = datetime.now() - timedelta(days=days)
-        deleted_counts = {"thinking": 0, "research": 0, "agent": 0}
-        
-        for cache_type in ["thinking", "research", "agent"]:
-            cache_path = getattr(self, f"{cache_type}_path")
-            
-            for file_path in cache_path.glob("*.json"):
-                cache_data = self.read_cache_file(file_path)
-                if cache_data:
-                    file_timestamp = datetime.fromisoformat(cache_data["timestamp"])
-                    if file_timestamp < cutoff_date:
-                        try:
-                            file_path.unlink()
-                            deleted_counts[cache_type] += 1
-                            logger.info(f"Deleted old cache file: {file_path.name}")
-                        except Exception as e:
-                            logger.error(f"Failed to delete {file_path}: {e}")
+        return self.apply_retention(RetentionPolicy(default_ttl_days=days))["deleted"]
+
+    def apply_retention(self, policy: Optional[RetentionPolicy] = None,
+                        dry_run: bool = False) -> Dict[str, Any]:
+        """Apply TTLs and size quotas using only names and file metadata"""
+        return RetentionManager(self, policy).apply(dry_run=dry_run)
+
+    def train_compression_dictionary(self, cache_type: str = "all", sample: int = 500,
+                                     size: int = DEFAULT_DICTIONARY_SIZE) -> Dict[str, Any]:
+        """Train a shared dictionary per cache type from a sample of its records
+
+        New records are compressed against it; records written with an
+        older dictionary keep reading through their own dictionary id.
+        """
+        trained = {}
+        for file_type, storage in self.storages.items():
+            if cache_type not in ["all", file_type]:
+                continue
+            names = storage.list_names()
+            if not names:
+                continue
+            cache_path = getattr(self, f"{file_type}_path")
+            picked = random.Random(0).sample(names, min(sample, len(names)))
+            samples = [storage.codec.encode(cache_data)
+                       for _, cache_data in self.scanner.map([cache_path / name for name in picked])]
+            compressor = storage.compressor or Compressor(storage.root, self.compression or "zlib",
+                                                          self.compression_threshold)
+            dictionary = train_dictionary(samples, size, compressor.algorithm)
+            dict_id = compressor.install_dictionary(dictionary)
+            trained[file_type] = {"dictionary": f"{dict_id:08x}", "samples": len(samples),
+                                  "bytes": len(dictionary)}
+            logger.info(f"Trained {len(dictionary)}-byte {file_type} dictionary from {len(samples)} records")
+        return trained
+
+    def rebuild_indexes(self, names: Optional[List[str]] = None) -> Dict[str, int]:
+        """Rebuild secondary indexes (all by default) from the cache records"""
+        return {
+            name: index.rebuild()
+            for name, index in self.indexes.items()
+            if names is None or name in names
+        }
+
+    def migrate_storage(self, target: str = SegmentStorage.name, remove_source: bool = True) -> Dict[str, int]:
+        """Convert every cache directory to another storage backend"""
+        if target == self.storage_backend:
+            return {file_type: 0 for file_type in self.storages}
+
+        migrated = {}
+        new_storages = {}
+        for file_type, storage in self.storages.items():
+            new_storage = self._create_storage(target, storage.root)
+            migrated[file_type] = migrate_records(storage, new_storage, file_type, remove_source)
+            storage.close()
+            new_storages[file_type] = new_storage
+            logger.info(f"Migrated {migrated[file_type]} {file_type} records to {target}")
+
+        self.storages = new_storages
+        self.storage_backend = target
+        write_backend_marker(self.base_path, target)
         
-        return deleted_counts
+        # Record names changed, so indexes must be rebuilt against the new storages
+        self._create_indexes()
+        self.rebuild_indexes()
+        return migrated
+
+    def close(self):
+        """Flush and release storage handles"""
+        for storage in self.storages.values():
+            storage.close()
+
+def _parse_time(timestamp: Optional[str]) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(timestamp)
+    except (TypeError, ValueError):
+        return None
+
+def _match_content(query: str, cache_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Scan mapper: timestamp and preview of a record containing query"""
+    content = str(cache_data.get("content", ""))
+    if query not in content.lower():
+        return None
+    return {"timestamp": cache_data.get("timestamp"), "preview": content[:200] + "..."}
 
 # Global cache system instance
 _cache_system = None
 
-def get_simple_cache_system(base_path: str = "src/dev/cache") -> SimpleCacheSystem:
+def get_simple_cache_system(base_path: str = "src/dev/cache", storage: Optional[str] = None,
+                            workers: Optional[int] = None) -> SimpleCacheSystem:
     """Get global simple cache system instance"""
     global _cache_system
     if _cache_system is None:
-        _cache_system = SimpleCacheSystem(base_path)
+        _cache_system = SimpleCacheSystem(base_path, storage, workers)
+    elif workers:
+        _cache_system.scanner.workers = workers
     return _cache_system
 
 if __name__ == "__main__":
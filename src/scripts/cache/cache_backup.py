@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Cache Backup Repository
+
+Content-addressed, incremental snapshot backups of the cache directory.
+
+Repository layout::
+
+    cache_backups/
+    ├── .lock                   # held exclusively by backup and prune
+    ├── blobs/ab/ab3f...        # zlib-compressed chunks, named by SHA-256
+    └── snapshots/
+        └── 20261017_030000.json   # compact manifest: path -> size, mtime, chunk list
+
+Files are split into fixed-size chunks, and each chunk is stored once no
+matter how many files or snapshots reference it. A file whose size and
+mtime match the previous snapshot reuses its chunk list without being read,
+so a nightly backup only reads and copies what changed. Appending to a
+segment file only adds its new tail chunk. A prune never runs during a
+backup, so it cannot delete chunks an in-progress snapshot references.
+
+Derived data (the ``index/`` directory) is not backed up; indexes rebuild
+themselves from the restored records.
+
+Author: Claude Code Research System
+Version: 1.0.0
+"""
+
+import hashlib
+import json
+import os
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Set, Tuple
+import logging
+
+from cache_locks import file_lock
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+SNAPSHOT_ID_FORMAT = '%Y%m%d_%H%M%S'
+EXCLUDED_DIRS = {'index'}
+LOCK_NAME = ".lock"
+
+
+class BackupRepository:
+    """Deduplicated snapshot store for a cache directory"""
+
+    version = 1
+
+    def __init__(self, repo_path: Path, chunk_size: int = CHUNK_SIZE):
+        self.repo_path = Path(repo_path)
+        self.blobs_path = self.repo_path / "blobs"
+        self.snapshots_path = self.repo_path / "snapshots"
+        self.lock_path = self.repo_path / LOCK_NAME
+        self.chunk_size = chunk_size
+
+    def _locked(self):
+        """Exclusive lock on the repository against concurrent backups and prunes"""
+        self.repo_path.mkdir(parents=True, exist_ok=True)
+        return file_lock(self.lock_path)
+
+    # ------------------------------------------------------------------
+    # Blobs and manifests
+    # ------------------------------------------------------------------
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.blobs_path / digest[:2] / digest
+
+    def _store_blob(self, data: bytes) -> Tuple[str, bool]:
+        """Store a chunk once; return (digest, newly written)"""
+        digest = hashlib.sha256(data).hexdigest()
+        blob_path = self._blob_path(digest)
+        if blob_path.exists():
+            return digest, False
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = blob_path.with_suffix(".tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(zlib.compress(data, 6))
+        os.replace(tmp_path, blob_path)
+        return digest, True
+
+    def _load_blob(self, digest: str) -> bytes:
+        with open(self._blob_path(digest), 'rb') as f:
+            data = zlib.decompress(f.read())
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"Corrupt backup blob {digest}")
+        return data
+
+    def list_snapshots(self) -> List[str]:
+        """Snapshot ids, oldest first"""
+        if not self.snapshots_path.exists():
+            return []
+        return sorted(path.stem for path in self.snapshots_path.glob("*.json"))
+
+    def load_manifest(self, snapshot_id: str) -> Dict[str, Any]:
+        manifest_path = self.snapshots_path / f"{snapshot_id}.json"
+        if not manifest_path.exists():
+            raise FileNotFoundError(f"Unknown snapshot: {snapshot_id}")
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_manifest(self, manifest: Dict[str, Any]):
+        self.snapshots_path.mkdir(parents=True, exist_ok=True)
+        manifest_path = self.snapshots_path / f"{manifest['id']}.json"
+        tmp_path = manifest_path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, separators=(',', ':'))
+        # The manifest is written last, so an interrupted backup leaves no snapshot
+        os.replace(tmp_path, manifest_path)
+
+    def _new_snapshot_id(self) -> str:
+        snapshot_id = datetime.now().strftime(SNAPSHOT_ID_FORMAT)
+        existing = set(self.list_snapshots())
+        suffix = 1
+        candidate = snapshot_id
+        while candidate in existing:
+            candidate = f"{snapshot_id}_{suffix}"
+            suffix += 1
+        return candidate
+
+    # ------------------------------------------------------------------
+    # Backup / restore
+    # ------------------------------------------------------------------
+
+    def _iter_source_files(self, source: Path):
+        for root, dirs, files in os.walk(source):
+            root_path = Path(root)
+            if root_path == source:
+                dirs[:] = [d for d in dirs if d not in EXCLUDED_DIRS]
+            dirs.sort()
+            for filename in sorted(files):
+                # Temporary files, lock files and the query server socket are runtime state
+                if filename.endswith((".tmp", ".lock", ".sock")):
+                    continue
+                yield root_path / filename
+
+    def backup(self, source: Path) -> Dict[str, Any]:
+        """Snapshot every file under source, copying only new chunks"""
+        with self._locked():
+            return self._backup_locked(Path(source))
+
+    def _backup_locked(self, source: Path) -> Dict[str, Any]:
+        snapshots = self.list_snapshots()
+        previous = self.load_manifest(snapshots[-1])['files'] if snapshots else {}
+
+        stats = {'files': 0, 'unchanged_files': 0, 'total_bytes': 0,
+                 'new_chunks': 0, 'new_bytes': 0}
+        files = {}
+        for file_path in self._iter_source_files(source):
+            rel_path = file_path.relative_to(source).as_posix()
+            try:
+                stat = file_path.stat()
+            except FileNotFoundError:
+                continue
+            stats['files'] += 1
+            stats['total_bytes'] += stat.st_size
+
+            prior = previous.get(rel_path)
+            if (prior and prior['size'] == stat.st_size and prior['mtime_ns'] == stat.st_mtime_ns
+                    and all(self._blob_path(d).exists() for d in prior['chunks'])):
+                files[rel_path] = prior
+                stats['unchanged_files'] += 1
+                continue
+
+            chunks = []
+            try:
+                with open(file_path, 'rb') as f:
+                    while True:
+                        data = f.read(self.chunk_size)
+                        if not data:
+                            break
+                        digest, is_new = self._store_blob(data)
+                        chunks.append(digest)
+                        if is_new:
+                            stats['new_chunks'] += 1
+                            stats['new_bytes'] += len(data)
+            except FileNotFoundError:
+                # Removed while backing up (e.g. by cleanup)
+                stats['files'] -= 1
+                stats['total_bytes'] -= stat.st_size
+                continue
+            files[rel_path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'chunks': chunks}
+
+        manifest = {
+            'version': self.version,
+            'id': self._new_snapshot_id(),
+            'created': datetime.now().isoformat(),
+            'source': str(source),
+            'chunk_size': self.chunk_size,
+            'stats': stats,
+            'files': files
+        }
+        self._save_manifest(manifest)
+        logger.info(f"Backup snapshot {manifest['id']}: {stats}")
+        return manifest
+
+    def restore(self, snapshot_id: str, target: Path, paths: Optional[List[str]] = None) -> Dict[str, int]:
+        """Recreate a snapshot (or some of its files) under target"""
+        manifest = self.load_manifest(snapshot_id)
+        target = Path(target)
+        restored = {'files': 0, 'bytes': 0}
+        for rel_path, entry in manifest['files'].items():
+            if paths and rel_path not in paths:
+                continue
+            file_path = target / rel_path
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = file_path.with_name(file_path.name + ".tmp")
+            with open(tmp_path, 'wb') as f:
+                for digest in entry['chunks']:
+                    f.write(self._load_blob(digest))
+            os.replace(tmp_path, file_path)
+            os.utime(file_path, ns=(entry['mtime_ns'], entry['mtime_ns']))
+            restored['files'] += 1
+            restored['bytes'] += entry['size']
+        return restored
+
+    def diff(self, old_id: str, new_id: str) -> Dict[str, Any]:
+        """Files added, removed and modified between two snapshots"""
+        old_files = self.load_manifest(old_id)['files']
+        new_files = self.load_manifest(new_id)['files']
+        modified = sorted(path for path in old_files.keys() & new_files.keys()
+                          if old_files[path]['chunks'] != new_files[path]['chunks'])
+        return {
+            'added': sorted(new_files.keys() - old_files.keys()),
+            'removed': sorted(old_files.keys() - new_files.keys()),
+            'modified': modified,
+            'unchanged': len(old_files.keys() & new_files.keys()) - len(modified)
+        }
+
+    # ------------------------------------------------------------------
+    # Retention
+    # ------------------------------------------------------------------
+
+    def select_retained(self, keep_last: int = 7, keep_daily: int = 7,
+                        keep_weekly: int = 4, keep_monthly: int = 12) -> Set[str]:
+        """Snapshot ids kept by a last/daily/weekly/monthly retention policy"""
+        snapshots = self.list_snapshots()
+        keep = set(snapshots[-keep_last:]) if keep_last > 0 else set()
+
+        def bucketed(limit: int, bucket_format: str):
+            if limit <= 0:
+                return
+            seen = []
+            for snapshot_id in reversed(snapshots):
+                created = datetime.strptime(snapshot_id[:15], SNAPSHOT_ID_FORMAT)
+                bucket = created.strftime(bucket_format)
+                if bucket not in seen:
+                    # Newest snapshot of each period
+                    seen.append(bucket)
+                    keep.add(snapshot_id)
+                    if len(seen) >= limit:
+                        return
+
+        bucketed(keep_daily, '%Y-%m-%d')
+        bucketed(keep_weekly, '%G-W%V')
+        bucketed(keep_monthly, '%Y-%m')
+        return keep
+
+    def prune(self, keep_last: int = 7, keep_daily: int = 7, keep_weekly: int = 4,
+              keep_monthly: int = 12, dry_run: bool = False) -> Dict[str, Any]:
+        """Drop snapshots outside the retention policy and unreferenced blobs"""
+        with self._locked():
+            return self._prune_locked(keep_last, keep_daily, keep_weekly, keep_monthly, dry_run)
+
+    def _prune_locked(self, keep_last: int, keep_daily: int, keep_weekly: int,
+                      keep_monthly: int, dry_run: bool) -> Dict[str, Any]:
+        keep = self.select_retained(keep_last, keep_daily, keep_weekly, keep_monthly)
+        removed = [snapshot_id for snapshot_id in self.list_snapshots() if snapshot_id not in keep]
+
+        referenced = set()
+        for snapshot_id in keep:
+            for entry in self.load_manifest(snapshot_id)['files'].values():
+                referenced.update(entry['chunks'])
+
+        result = {'removed_snapshots': removed, 'kept_snapshots': sorted(keep),
+                  'removed_blobs': 0, 'freed_bytes': 0, 'dry_run': dry_run}
+
+        if not dry_run:
+            for snapshot_id in removed:
+                (self.snapshots_path / f"{snapshot_id}.json").unlink()
+
+        if self.blobs_path.exists():
+            for blob_path in self.blobs_path.glob("*/*"):
+                if blob_path.name in referenced:
+                    continue
+                result['removed_blobs'] += 1
+                result['freed_bytes'] += blob_path.stat().st_size
+                if not dry_run:
+                    blob_path.unlink()
+
+        return result
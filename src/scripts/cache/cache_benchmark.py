@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+Cache Benchmarks
+
+Synthetic benchmarks for cache storage decisions. Every benchmark builds
+its own cache in a temporary directory and never touches real data.
+
+Usage:
+    python cache_benchmark.py codecs --records 2000
+    python cache_benchmark.py stress --processes 8 --records 500 --backend segments
+    python cache_benchmark.py conversation --events 5000
+    python cache_benchmark.py executions --events 5000
+
+Author: Claude Code Research System
+Version: 1.0.0
+"""
+
+import argparse
+import json
+import multiprocessing
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, List
+import logging
+
+# Add cache system to path
+sys.path.append(str(Path(__file__).parent))
+from cache import SimpleCacheSystem
+from cache_codecs import CODECS, encode_record, decode_record
+from cache_ids import new_record_id
+from cache_storage import read_record
+from conversation_logger import ConversationLogger, DailyLogWriter
+
+# Execution logger lives with the logging scripts
+sys.path.append(str(Path(__file__).parent.parent / "logging"))
+from claude_logger import ClaudeLogger
+
+WORDS = ("cache system research agent query index segment thinking analysis "
+         "performance result context session tool latency throughput 缓存 研究 分析").split()
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def synthetic_records(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Mix of thinking, conversation and tool execution records"""
+    rng = random.Random(seed)
+    start = datetime.now() - timedelta(days=30)
+    records = []
+    for i in range(count):
+        when = start + timedelta(seconds=i * 30)
+        kind = rng.random()
+        if kind < 0.5:
+            content = {
+                "user_query": _sentence(rng, 12),
+                "thinking": " ".join(_sentence(rng, 20) for _ in range(rng.randint(5, 40))),
+                "tools_used": [{"name": rng.choice(["Read", "Write", "Bash", "Grep"])}
+                               for _ in range(rng.randint(0, 4))]
+            }
+        elif kind < 0.8:
+            content = {
+                "type": "conversation",
+                "session_id": f"session-{rng.randint(1, 50)}",
+                "prompt": _sentence(rng, 25),
+                "response": " ".join(_sentence(rng, 20) for _ in range(rng.randint(3, 25))),
+                "metadata": {"model": "default", "turn": rng.randint(1, 30)}
+            }
+        else:
+            content = {
+                "type": "tool_execution",
+                "session_id": f"session-{rng.randint(1, 50)}",
+                "tool_name": rng.choice(["Read", "Write", "Bash", "Grep"]),
+                "tool_input": {"path": f"/src/module_{rng.randint(1, 200)}.py", "limit": rng.randint(1, 500)},
+                "tool_output": {"success": rng.random() > 0.1, "lines": rng.randint(0, 2000),
+                                "elapsed_ms": round(rng.random() * 1000, 3)}
+            }
+        records.append({"id": new_record_id(when), "timestamp": when.isoformat(), "content": content})
+    return records
+
+
+def benchmark_codecs(count: int, rounds: int = 3) -> List[Dict[str, Any]]:
+    """Bytes per record and encode/decode/scan throughput for every codec"""
+    records = synthetic_records(count)
+    results = []
+    for name in CODECS:
+        encoded = [encode_record(record, name) for record in records]
+        total_bytes = sum(len(payload) for payload in encoded)
+
+        encode_time = min(_timed(lambda: [encode_record(r, name) for r in records]) for _ in range(rounds))
+        decode_time = min(_timed(lambda: [decode_record(p) for p in encoded]) for _ in range(rounds))
+
+        # End-to-end read path: one file per record through read_record
+        tmp_dir = Path(tempfile.mkdtemp(prefix=f"cache_bench_{name}_"))
+        try:
+            cache = SimpleCacheSystem(str(tmp_dir), storage="files", workers=1, codec=name)
+            cache.write_records([("thinking", record, "thinking") for record in records])
+            paths = [cache.thinking_path / n for n in cache.storages["thinking"].list_names()]
+            scan_time = min(_timed(lambda: [read_record(p) for p in paths]) for _ in range(rounds))
+            disk_bytes = sum(p.stat().st_size for p in paths)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        results.append({
+            "codec": name,
+            "bytes_per_record": round(total_bytes / count, 1),
+            "size_vs_pretty": None,
+            "encode_records_per_s": round(count / encode_time),
+            "decode_records_per_s": round(count / decode_time),
+            "decode_mb_per_s": round(total_bytes / decode_time / (1024 * 1024), 1),
+            "scan_records_per_s": round(count / scan_time),
+            "disk_bytes": disk_bytes
+        })
+
+    pretty = results[0]["bytes_per_record"]
+    for result in results:
+        result["size_vs_pretty"] = round(result["bytes_per_record"] / pretty, 3)
+    return results
+
+
+def _stress_writer(base_path: str, backend: str, codec: str, segment_bytes: int, worker: int,
+                   count: int, sessions: int, start, done):
+    """Write count conversation records through the public API once start is set"""
+    logging.disable(logging.INFO)
+    cache = SimpleCacheSystem(base_path, storage=backend, workers=1, codec=codec)
+    for storage in cache.storages.values():
+        if hasattr(storage, "max_segment_bytes"):
+            storage.max_segment_bytes = segment_bytes
+    rng = random.Random(worker)
+    start.wait()
+    for i in range(count):
+        cache.cache_conversation(f"stress-session-{i % sessions}", f"worker {worker} record {i}",
+                                 _sentence(rng, rng.randint(20, 200)), metadata={"worker": worker, "seq": i})
+    cache.close()
+    done.put(time.perf_counter())
+
+
+def benchmark_stress(processes: int, count: int, backend: str = "files", codec: str = None,
+                     sessions: int = 10, segment_kb: int = 256) -> List[Dict[str, Any]]:
+    """N processes writing to one cache at once; verify nothing was lost or corrupted"""
+    tmp_dir = Path(tempfile.mkdtemp(prefix=f"cache_stress_{backend}_"))
+    try:
+        start, done = multiprocessing.Event(), multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(target=_stress_writer,
+                                    args=(str(tmp_dir), backend, codec, segment_kb * 1024, worker,
+                                          count, sessions, start, done))
+            for worker in range(processes)
+        ]
+        for process in workers:
+            process.start()
+        # Let every writer finish its setup so they all contend from the first record
+        time.sleep(1.0)
+        began = time.perf_counter()
+        start.set()
+        finished = [done.get() for _ in workers]
+        for process in workers:
+            process.join()
+        elapsed = max(finished) - began
+        failed_workers = sum(1 for process in workers if process.exitcode != 0)
+
+        expected_total = processes * count
+        cache = SimpleCacheSystem(str(tmp_dir), storage=backend, workers=1, codec=codec)
+        # The journal alone (no directory repair) must already hold every write
+        cache.session_index.load()
+        journaled = len(cache.session_index.records.get("thinking", {}))
+
+        names = cache.list_cache_files("thinking")["thinking"]
+        seen, ids, corrupt = set(), set(), 0
+        for name in names:
+            record = cache.read_cache_file(str(cache.thinking_path / name))
+            try:
+                metadata = record["content"]["metadata"]
+                seen.add((metadata["worker"], metadata["seq"]))
+                ids.add(record["id"])
+            except (TypeError, KeyError):
+                corrupt += 1
+        missing = expected_total - len(seen)
+
+        per_session = {}
+        for worker in range(processes):
+            for i in range(count):
+                key = f"stress-session-{i % sessions}"
+                per_session[key] = per_session.get(key, 0) + 1
+        session_mismatches = sum(1 for session_id, expected in per_session.items()
+                                 if len(cache.find_by_session_id(session_id)) != expected)
+        cache.close()
+
+        return [{
+            "backend": backend,
+            "codec": cache.storages["thinking"].codec.name,
+            "processes": processes,
+            "records": expected_total,
+            "stored": len(names),
+            "missing": missing,
+            "corrupt": corrupt,
+            "duplicate_ids": len(names) - len(ids) - corrupt,
+            "index_journaled": journaled,
+            "session_mismatches": session_mismatches,
+            "failed_workers": failed_workers,
+            "seconds": round(elapsed, 3),
+            "writes_per_s": round(expected_total / elapsed),
+            "ok": not (missing or corrupt or failed_workers or session_mismatches
+                       or len(names) != expected_total or journaled != expected_total)
+        }]
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+class _ReopeningWriter(DailyLogWriter):
+    """Unbuffered baseline: exists() check, open, append and close per event"""
+
+    def write(self, text: str, when: datetime = None, entry: Dict[str, Any] = None) -> Path:
+        when = when or datetime.now()
+        path = self.directory / when.strftime('%Y-%m-%d.md')
+        if not path.exists():
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self.header(when))
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def _conversation_events(conv_logger: ConversationLogger, count: int, timestamp: str, seed: int = 42):
+    """Tool-heavy session: a prompt, eight tool calls and a response per turn"""
+    rng = random.Random(seed)
+    for i in range(count):
+        step = i % 10
+        if step == 0:
+            conv_logger.log_user_prompt("bench", _sentence(rng, 15), timestamp)
+        elif step == 9:
+            conv_logger.log_claude_response("bench", " ".join(_sentence(rng, 20) for _ in range(5)),
+                                            tools_used=["Read", "Grep", "Bash"], timestamp=timestamp)
+        else:
+            conv_logger.log_tool_execution("bench", rng.choice(["Read", "Grep", "Bash"]),
+                                           {"file_path": f"src/module_{i}.py", "description": _sentence(rng, 6)},
+                                           {"content": _sentence(rng, 30)}, timestamp)
+
+
+def benchmark_conversation(count: int, flush_seconds: float = 1.0) -> List[Dict[str, Any]]:
+    """Events/sec of ConversationLogger: reopen per event vs the persistent daily writer"""
+    modes = [("reopen per event", None), ("persistent, flush every event", 0.0),
+             (f"persistent, flush <= {flush_seconds}s", flush_seconds)]
+    results, outputs = [], []
+    timestamp = datetime.now().replace(microsecond=0).isoformat()
+    for mode, flush in modes:
+        tmp_dir = Path(tempfile.mkdtemp(prefix="conversation_bench_"))
+        try:
+            conv_logger = ConversationLogger(str(tmp_dir), flush_seconds=flush or 0.0)
+            if flush is None:
+                conv_logger.writer = _ReopeningWriter(conv_logger.conversations_path, conv_logger._daily_header)
+            seconds = _timed(lambda: (_conversation_events(conv_logger, count, timestamp), conv_logger.close()))
+            outputs.append(b"".join(path.read_bytes()
+                                    for path in sorted(conv_logger.conversations_path.glob("20*.md"))))
+            results.append({"mode": mode, "events": count, "seconds": round(seconds, 3),
+                            "events_per_s": round(count / seconds)})
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    baseline = results[0]["events_per_s"]
+    for result, output in zip(results, outputs):
+        result["speedup"] = f"{result['events_per_s'] / baseline:.1f}x"
+        # Every mode must produce byte-identical logs
+        result["identical"] = output == outputs[0]
+    return results
+
+
+class _ReopeningClaudeLogger(ClaudeLogger):
+    """Unpooled baseline: reparse, mkdir, open, append and close per event"""
+
+    def _create_log_file(self, session):
+        with self._open_new_log(session.data) as f:
+            f.write(f"=== Claude Code Execution Log ===\n")
+
+    def _append_to_log(self, session, text: str) -> bool:
+        if text is None:
+            return False
+        timestamp = datetime.fromisoformat(session.data['start_time'])
+        log_path = self.logs_base_path / "executions" / timestamp.strftime("%Y-%m-%d")
+        log_path.mkdir(parents=True, exist_ok=True)
+        with open(log_path / session.data['log_filename'], 'a', encoding='utf-8') as f:
+            f.write(text)
+        return False
+
+
+def _execution_events(claude_logger: ClaudeLogger, count: int, per_session: int, seed: int = 42):
+    """Sessions of tool calls, file accesses and an agent call each"""
+    rng = random.Random(seed)
+    for i in range(count):
+        step = i % per_session
+        if step == 0:
+            claude_logger.start_execution_session(_sentence(rng, 8))
+        if step % 5 == 4:
+            claude_logger.log_agent_invocation("research-literature", {"topic": _sentence(rng, 4)}, 1.5)
+        elif step % 2:
+            claude_logger.log_file_access(f"src/module_{i}.py", rng.choice(["read", "write"]))
+        else:
+            claude_logger.log_tool_usage(rng.choice(["Read", "Grep", "Bash"]),
+                                         {"description": _sentence(rng, 6)}, 0.2)
+        if step == per_session - 1 or i == count - 1:
+            claude_logger.end_execution_session(True)
+
+
+def benchmark_executions(count: int, per_session: int = 50, threads: int = 1) -> List[Dict[str, Any]]:
+    """Events/sec of ClaudeLogger real-time mode: reopen per event vs pooled buffered handles
+
+    With several threads, each runs its own sessions concurrently.
+    """
+    modes = [("reopen per event", _ReopeningClaudeLogger), ("pooled buffered handles", ClaudeLogger)]
+    results = []
+    for mode, logger_class in modes:
+        tmp_dir = Path(tempfile.mkdtemp(prefix="execution_bench_"))
+        try:
+            claude_logger = logger_class(config_path=str(tmp_dir / "missing.yaml"), logs_base_path=str(tmp_dir))
+            # Background compaction is not what is measured
+            claude_logger.compaction_worker.stop()
+            workers = [threading.Thread(target=_execution_events,
+                                        args=(claude_logger, count // threads, per_session, 42 + n))
+                       for n in range(threads)]
+            seconds = _timed(lambda: ([worker.start() for worker in workers],
+                                      [worker.join() for worker in workers]))
+            logged = sum(path.read_text(encoding='utf-8').count("\n" + "-" * 30 + "\n")
+                         for path in tmp_dir.glob("executions/*/*.log"))
+            events = count // threads * threads
+            results.append({"mode": mode, "threads": threads, "events": events, "seconds": round(seconds, 3),
+                            "events_per_s": round(events / seconds), "logged": logged})
+            for handler in claude_logger.logger.handlers[:]:
+                claude_logger.logger.removeHandler(handler)
+                handler.close()
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    baseline = results[0]["events_per_s"]
+    for result in results:
+        result["speedup"] = f"{result['events_per_s'] / baseline:.1f}x"
+    return results
+
+
+def _timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def print_table(title: str, rows: List[Dict[str, Any]]):
+    print(f"\n⏱️  {title}")
+    print("=" * 80)
+    if not rows:
+        return
+    columns = list(rows[0].keys())
+    widths = {c: max(len(c), *(len(str(row[c])) for row in rows)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    print("  ".join("-" * widths[c] for c in columns))
+    for row in rows:
+        print("  ".join(str(row[c]).ljust(widths[c]) for c in columns))
+
+
+def main():
+    """Main CLI interface"""
+    parser = argparse.ArgumentParser(description="Cache Benchmarks")
+    parser.add_argument("--format", choices=["table", "json"], default="table", help="Output format")
+    subparsers = parser.add_subparsers(dest="command", help="Available benchmarks")
+
+    codecs_parser = subparsers.add_parser("codecs", help="Compare record codecs")
+    codecs_parser.add_argument("--records", type=int, default=2000, help="Synthetic records (default: 2000)")
+    codecs_parser.add_argument("--rounds", type=int, default=3, help="Best-of rounds (default: 3)")
+
+    stress_parser = subparsers.add_parser("stress", help="Concurrent writers from several processes")
+    stress_parser.add_argument("--processes", type=int, default=4, help="Writer processes (default: 4)")
+    stress_parser.add_argument("--records", type=int, default=500, help="Records per process (default: 500)")
+    stress_parser.add_argument("--backend", choices=["files", "segments", "partitioned"], default="files",
+                               help="Storage backend (default: files)")
+    stress_parser.add_argument("--codec", choices=list(CODECS), help="Record codec (default: backend default)")
+    stress_parser.add_argument("--sessions", type=int, default=10, help="Distinct session ids (default: 10)")
+    stress_parser.add_argument("--segment-kb", type=int, default=256,
+                               help="Segment size so writers roll over segments (default: 256)")
+
+    conversation_parser = subparsers.add_parser("conversation", help="Conversation logger events/sec")
+    conversation_parser.add_argument("--events", type=int, default=5000, help="Logged events (default: 5000)")
+    conversation_parser.add_argument("--flush-seconds", type=float, default=1.0,
+                                     help="Flush delay of the buffered writer (default: 1.0)")
+
+    executions_parser = subparsers.add_parser("executions", help="Execution logger real-time events/sec")
+    executions_parser.add_argument("--events", type=int, default=5000, help="Logged events (default: 5000)")
+    executions_parser.add_argument("--per-session", type=int, default=50,
+                                   help="Events per execution session (default: 50)")
+    executions_parser.add_argument("--threads", type=int, default=1,
+                                   help="Threads logging their own sessions concurrently (default: 1)")
+
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    if args.command == "codecs":
+        results = benchmark_codecs(args.records, args.rounds)
+        title = f"Record codecs ({args.records} synthetic records)"
+    elif args.command == "stress":
+        results = benchmark_stress(args.processes, args.records, args.backend, args.codec,
+                                   args.sessions, args.segment_kb)
+        title = f"Concurrent writers ({args.processes} processes x {args.records} records)"
+    elif args.command == "conversation":
+        results = benchmark_conversation(args.events, args.flush_seconds)
+        title = f"Conversation logger ({args.events} events)"
+    elif args.command == "executions":
+        results = benchmark_executions(args.events, args.per_session, args.threads)
+        title = f"Execution logger ({args.events} events, {args.per_session} per session, {args.threads} threads)"
+    else:
+        parser.print_help()
+        return
+
+    if args.format == "json":
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(title, results)
+
+    if args.command == "stress" and not all(result["ok"] for result in results):
+        print("\n❌ Records were lost or corrupted")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
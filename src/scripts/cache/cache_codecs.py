@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+Cache Record Codecs
+
+Serialization codecs for cache records:
+
+- ``pretty``: indented UTF-8 JSON (original on-disk format)
+- ``json``: compact UTF-8 JSON
+- ``msgpack``: MessagePack binary encoding
+- ``cbor``: CBOR (RFC 8949) binary encoding
+
+JSON payloads identify themselves by their first byte. Binary payloads
+start with a 4-byte header, ``0xC1 'C' 'R' <codec id>``; 0xC1 is neither a
+valid MessagePack type nor a valid first byte of UTF-8 text, so a header
+can never be mistaken for a JSON record. ``decode_record`` detects the
+codec, so records written with different codecs can be mixed freely.
+
+The ``msgpack`` and ``cbor2`` packages are used when installed; otherwise
+the built-in pure-Python encoders below produce the same wire format.
+
+Author: Claude Code Research System
+Version: 1.0.0
+"""
+
+import json
+import os
+import struct
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+CODEC_ENV_VAR = "CACHE_CODEC"
+HEADER_MAGIC = b"\xc1CR"
+HEADER_SIZE = len(HEADER_MAGIC) + 1
+
+
+# ----------------------------------------------------------------------
+# MessagePack
+# ----------------------------------------------------------------------
+
+def _msgpack_pack(obj: Any, out: bytearray):
+    if obj is None:
+        out.append(0xc0)
+    elif obj is True:
+        out.append(0xc3)
+    elif obj is False:
+        out.append(0xc2)
+    elif isinstance(obj, int):
+        if 0 <= obj < 0x80:
+            out.append(obj)
+        elif -32 <= obj < 0:
+            out.append(obj & 0xff)
+        elif obj >= 0:
+            for limit, prefix, fmt in ((0xff, 0xcc, ">B"), (0xffff, 0xcd, ">H"),
+                                       (0xffffffff, 0xce, ">I"), (0xffffffffffffffff, 0xcf, ">Q")):
+                if obj <= limit:
+                    out.append(prefix)
+                    out += struct.pack(fmt, obj)
+                    break
+            else:
+                raise ValueError(f"Integer too large for msgpack: {obj}")
+        else:
+            for limit, prefix, fmt in ((-0x80, 0xd0, ">b"), (-0x8000, 0xd1, ">h"),
+                                       (-0x80000000, 0xd2, ">i"), (-0x8000000000000000, 0xd3, ">q")):
+                if obj >= limit:
+                    out.append(prefix)
+                    out += struct.pack(fmt, obj)
+                    break
+            else:
+                raise ValueError(f"Integer too small for msgpack: {obj}")
+    elif isinstance(obj, float):
+        out.append(0xcb)
+        out += struct.pack(">d", obj)
+    elif isinstance(obj, str):
+        data = obj.encode('utf-8')
+        length = len(data)
+        if length < 32:
+            out.append(0xa0 | length)
+        elif length <= 0xff:
+            out += bytes((0xd9, length))
+        elif length <= 0xffff:
+            out.append(0xda)
+            out += struct.pack(">H", length)
+        else:
+            out.append(0xdb)
+            out += struct.pack(">I", length)
+        out += data
+    elif isinstance(obj, (bytes, bytearray)):
+        length = len(obj)
+        if length <= 0xff:
+            out += bytes((0xc4, length))
+        elif length <= 0xffff:
+            out.append(0xc5)
+            out += struct.pack(">H", length)
+        else:
+            out.append(0xc6)
+            out += struct.pack(">I", length)
+        out += obj
+    elif isinstance(obj, (list, tuple)):
+        length = len(obj)
+        if length < 16:
+            out.append(0x90 | length)
+        elif length <= 0xffff:
+            out.append(0xdc)
+            out += struct.pack(">H", length)
+        else:
+            out.append(0xdd)
+            out += struct.pack(">I", length)
+        for item in obj:
+            _msgpack_pack(item, out)
+    elif isinstance(obj, dict):
+        length = len(obj)
+        if length < 16:
+            out.append(0x80 | length)
+        elif length <= 0xffff:
+            out.append(0xde)
+            out += struct.pack(">H", length)
+        else:
+            out.append(0xdf)
+            out += struct.pack(">I", length)
+        for key, value in obj.items():
+            _msgpack_pack(key, out)
+            _msgpack_pack(value, out)
+    else:
+        raise TypeError(f"Cannot encode {type(obj).__name__} as msgpack")
+
+
+_MSGPACK_FIXED = {
+    0xcc: ">B", 0xcd: ">H", 0xce: ">I", 0xcf: ">Q",
+    0xd0: ">b", 0xd1: ">h", 0xd2: ">i", 0xd3: ">q",
+    0xca: ">f", 0xcb: ">d",
+}
+
+
+def _msgpack_unpack(data: bytes, pos: int) -> Tuple[Any, int]:
+    byte = data[pos]
+    pos += 1
+    if byte < 0x80:
+        return byte, pos
+    if byte >= 0xe0:
+        return byte - 0x100, pos
+    if 0xa0 <= byte <= 0xbf:
+        end = pos + (byte & 0x1f)
+        return data[pos:end].decode('utf-8'), end
+    if 0x90 <= byte <= 0x9f:
+        return _msgpack_array(data, pos, byte & 0x0f)
+    if 0x80 <= byte <= 0x8f:
+        return _msgpack_map(data, pos, byte & 0x0f)
+    if byte == 0xc0:
+        return None, pos
+    if byte == 0xc2:
+        return False, pos
+    if byte == 0xc3:
+        return True, pos
+    if byte in _MSGPACK_FIXED:
+        fmt = _MSGPACK_FIXED[byte]
+        return struct.unpack_from(fmt, data, pos)[0], pos + struct.calcsize(fmt)
+    if byte in (0xd9, 0xda, 0xdb, 0xc4, 0xc5, 0xc6):
+        fmt = {0xd9: ">B", 0xda: ">H", 0xdb: ">I", 0xc4: ">B", 0xc5: ">H", 0xc6: ">I"}[byte]
+        length = struct.unpack_from(fmt, data, pos)[0]
+        pos += struct.calcsize(fmt)
+        end = pos + length
+        chunk = data[pos:end]
+        return (chunk.decode('utf-8') if byte in (0xd9, 0xda, 0xdb) else bytes(chunk)), end
+    if byte in (0xdc, 0xdd):
+        fmt = ">H" if byte == 0xdc else ">I"
+        length = struct.unpack_from(fmt, data, pos)[0]
+        return _msgpack_array(data, pos + struct.calcsize(fmt), length)
+    if byte in (0xde, 0xdf):
+        fmt = ">H" if byte == 0xde else ">I"
+        length = struct.unpack_from(fmt, data, pos)[0]
+        return _msgpack_map(data, pos + struct.calcsize(fmt), length)
+    raise ValueError(f"Unsupported msgpack type byte 0x{byte:02x}")
+
+
+def _msgpack_array(data: bytes, pos: int, length: int) -> Tuple[list, int]:
+    items = []
+    for _ in range(length):
+        item, pos = _msgpack_unpack(data, pos)
+        items.append(item)
+    return items, pos
+
+
+def _msgpack_map(data: bytes, pos: int, length: int) -> Tuple[dict, int]:
+    result = {}
+    for _ in range(length):
+        key, pos = _msgpack_unpack(data, pos)
+        value, pos = _msgpack_unpack(data, pos)
+        result[key] = value
+    return result, pos
+
+
+def msgpack_dumps(obj: Any) -> bytes:
+    if msgpack is not None:
+        return msgpack.packb(obj, use_bin_type=True)
+    out = bytearray()
+    _msgpack_pack(obj, out)
+    return bytes(out)
+
+
+def msgpack_loads(data: bytes) -> Any:
+    if msgpack is not None:
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+    obj, _ = _msgpack_unpack(data, 0)
+    return obj
+
+
+# ----------------------------------------------------------------------
+# CBOR
+# ----------------------------------------------------------------------
+
+def _cbor_head(major: int, value: int, out: bytearray):
+    if value < 24:
+        out.append(major << 5 | value)
+    elif value <= 0xff:
+        out += bytes((major << 5 | 24, value))
+    elif value <= 0xffff:
+        out.append(major << 5 | 25)
+        out += struct.pack(">H", value)
+    elif value <= 0xffffffff:
+        out.append(major << 5 | 26)
+        out += struct.pack(">I", value)
+    elif value <= 0xffffffffffffffff:
+        out.append(major << 5 | 27)
+        out += struct.pack(">Q", value)
+    else:
+        raise ValueError(f"Integer too large for CBOR: {value}")
+
+
+def _cbor_pack(obj: Any, out: bytearray):
+    if obj is None:
+        out.append(0xf6)
+    elif obj is True:
+        out.append(0xf5)
+    elif obj is False:
+        out.append(0xf4)
+    elif isinstance(obj, int):
+        if obj >= 0:
+            _cbor_head(0, obj, out)
+        else:
+            _cbor_head(1, -1 - obj, out)
+    elif isinstance(obj, float):
+        out.append(0xfb)
+        out += struct.pack(">d", obj)
+    elif isinstance(obj, str):
+        data = obj.encode('utf-8')
+        _cbor_head(3, len(data), out)
+        out += data
+    elif isinstance(obj, (bytes, bytearray)):
+        _cbor_head(2, len(obj), out)
+        out += obj
+    elif isinstance(obj, (list, tuple)):
+        _cbor_head(4, len(obj), out)
+        for item in obj:
+            _cbor_pack(item, out)
+    elif isinstance(obj, dict):
+        _cbor_head(5, len(obj), out)
+        for key, value in obj.items():
+            _cbor_pack(key, out)
+            _cbor_pack(value, out)
+    else:
+        raise TypeError(f"Cannot encode {type(obj).__name__} as CBOR")
+
+
+_CBOR_ARGUMENT = {24: ">B", 25: ">H", 26: ">I", 27: ">Q"}
+
+
+def _cbor_unpack(data: bytes, pos: int) -> Tuple[Any, int]:
+    byte = data[pos]
+    pos += 1
+    major, info = byte >> 5, byte & 0x1f
+
+    if major == 7:
+        if info == 20:
+            return False, pos
+        if info == 21:
+            return True, pos
+        if info in (22, 23):
+            return None, pos
+        if info == 25:
+            return struct.unpack_from(">e", data, pos)[0], pos + 2
+        if info == 26:
+            return struct.unpack_from(">f", data, pos)[0], pos + 4
+        if info == 27:
+            return struct.unpack_from(">d", data, pos)[0], pos + 8
+        raise ValueError(f"Unsupported CBOR simple value {info}")
+
+    if info < 24:
+        value = info
+    elif info in _CBOR_ARGUMENT:
+        fmt = _CBOR_ARGUMENT[info]
+        value = struct.unpack_from(fmt, data, pos)[0]
+        pos += struct.calcsize(fmt)
+    else:
+        raise ValueError("Indefinite-length CBOR items are not supported")
+
+    if major == 0:
+        return value, pos
+    if major == 1:
+        return -1 - value, pos
+    if major == 2:
+        return bytes(data[pos:pos + value]), pos + value
+    if major == 3:
+        return data[pos:pos + value].decode('utf-8'), pos + value
+    if major == 4:
+        items = []
+        for _ in range(value):
+            item, pos = _cbor_unpack(data, pos)
+            items.append(item)
+        return items, pos
+    if major == 5:
+        result = {}
+        for _ in range(value):
+            key, pos = _cbor_unpack(data, pos)
+            result[key], pos = _cbor_unpack(data, pos)
+        return result, pos
+    # Major type 6: semantic tag, decode the tagged item as-is
+    return _cbor_unpack(data, pos)
+
+
+def cbor_dumps(obj: Any) -> bytes:
+    if cbor2 is not None:
+        return cbor2.dumps(obj)
+    out = bytearray()
+    _cbor_pack(obj, out)
+    return bytes(out)
+
+
+def cbor_loads(data: bytes) -> Any:
+    if cbor2 is not None:
+        return cbor2.loads(data)
+    obj, _ = _cbor_unpack(data, 0)
+    return obj
+
+
+# ----------------------------------------------------------------------
+# Codec registry
+# ----------------------------------------------------------------------
+
+class Codec:
+    """Named record serializer"""
+
+    def __init__(self, name: str, codec_id: int, suffix: str, binary: bool,
+                 dumps: Callable[[Any], bytes], loads: Callable[[bytes], Any]):
+        self.name = name
+        self.codec_id = codec_id
+        self.suffix = suffix
+        self.binary = binary
+        self._dumps = dumps
+        self._loads = loads
+
+    def encode(self, cache_data: Dict[str, Any]) -> bytes:
+        """Serialize a record, prefixed with the codec header if binary"""
+        payload = self._dumps(cache_data)
+        if self.binary:
+            return HEADER_MAGIC + bytes((self.codec_id,)) + payload
+        return payload
+
+    def decode(self, payload: bytes) -> Dict[str, Any]:
+        """Deserialize a record written by this codec"""
+        if self.binary:
+            return self._loads(payload[HEADER_SIZE:])
+        return self._loads(payload)
+
+    def __repr__(self):
+        return f"Codec({self.name})"
+
+
+def _json_loads(data: bytes) -> Any:
+    return json.loads(data)
+
+
+CODECS = {
+    codec.name: codec for codec in [
+        Codec("pretty", 0, ".json", False,
+              lambda obj: json.dumps(obj, ensure_ascii=False, indent=2,
+                                     separators=(',', ': ')).encode('utf-8'),
+              _json_loads),
+        Codec("json", 1, ".json", False,
+              lambda obj: json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8'),
+              _json_loads),
+        Codec("msgpack", 2, ".msgpack", True, msgpack_dumps, msgpack_loads),
+        Codec("cbor", 3, ".cbor", True, cbor_dumps, cbor_loads),
+    ]
+}
+CODECS_BY_ID = {codec.codec_id: codec for codec in CODECS.values()}
+RECORD_SUFFIXES = tuple(sorted({codec.suffix for codec in CODECS.values()}))
+
+
+def get_codec(name: str) -> Codec:
+    if name not in CODECS:
+        raise ValueError(f"Unknown cache codec: {name} (available: {', '.join(CODECS)})")
+    return CODECS[name]
+
+
+def resolve_codec(codec: Optional[str] = None) -> Optional[str]:
+    """Codec from the argument or CACHE_CODEC; None means the backend default"""
+    codec = codec or os.getenv(CODEC_ENV_VAR) or None
+    if codec is not None:
+        get_codec(codec)
+    return codec
+
+
+def detect_codec(payload: bytes) -> Codec:
+    """Codec of an encoded record"""
+    if payload[:len(HEADER_MAGIC)] == HEADER_MAGIC:
+        codec_id = payload[len(HEADER_MAGIC)]
+        if codec_id not in CODECS_BY_ID:
+            raise ValueError(f"Unknown codec id {codec_id} in record header")
+        return CODECS_BY_ID[codec_id]
+    return CODECS["json"]
+
+
+def encode_record(cache_data: Dict[str, Any], codec: str = "json") -> bytes:
+    """Encode a record with the named codec"""
+    return get_codec(codec).encode(cache_data)
+
+
+def decode_record(payload: bytes) -> Dict[str, Any]:
+    """Decode a record of any codec"""
+    return detect_codec(payload).decode(payload)
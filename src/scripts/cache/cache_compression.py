@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Cache Record Compression
+
+Optional, transparent per-record compression with shared dictionaries.
+Cache records are short and repetitive (the same keys, tool names and
+phrases in every record), which plain per-record compression barely
+exploits. A dictionary trained from a sample of existing records gives
+each record that shared context up front.
+
+A compressed record wraps the codec payload (see ``cache_codecs``)::
+
+    0xC1 'C' 'R' 0x10 | u8 algorithm | u32 dictionary id | u32 raw length | data
+
+Algorithms are ``zlib`` (raw deflate with a preset dictionary, always
+available) and ``zstd`` (needs the ``zstandard`` package). Dictionaries
+live in a ``.dictionaries/`` directory inside each cache directory, named
+by their CRC-32, so readers in any process find them from the record path.
+Records below the size threshold, or that would not shrink, are stored
+uncompressed.
+
+Author: Claude Code Research System
+Version: 1.0.0
+"""
+
+import os
+import re
+import struct
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from cache_codecs import HEADER_MAGIC
+from cache_locks import atomic_write
+
+logger = logging.getLogger(__name__)
+
+COMPRESSED_CODEC_ID = 0x10
+COMPRESSED_HEADER = struct.Struct(">BII")
+COMPRESSED_PREFIX = HEADER_MAGIC + bytes((COMPRESSED_CODEC_ID,))
+COMPRESSED_HEADER_SIZE = len(COMPRESSED_PREFIX) + COMPRESSED_HEADER.size
+COMPRESSED_SUFFIX = ".z"
+
+ALGORITHMS = {"zlib": 1, "zstd": 2}
+ALGORITHM_NAMES = {value: name for name, value in ALGORITHMS.items()}
+
+DICTIONARY_DIR = ".dictionaries"
+CURRENT_DICTIONARY = "current"
+DEFAULT_THRESHOLD = 1024
+DEFAULT_DICTIONARY_SIZE = 32 * 1024
+ZLIB_MAX_DICTIONARY = 32 * 1024
+
+COMPRESSION_ENV_VAR = "CACHE_COMPRESSION"
+THRESHOLD_ENV_VAR = "CACHE_COMPRESSION_THRESHOLD"
+
+# Loaded dictionaries, keyed by (directory, id)
+_dictionaries: Dict[Tuple[str, int], bytes] = {}
+
+
+def is_compressed(payload: bytes) -> bool:
+    return payload[:len(COMPRESSED_PREFIX)] == COMPRESSED_PREFIX
+
+
+def compressed_raw_length(header: bytes) -> Optional[int]:
+    """Raw (uncompressed) length stored in a compressed record header"""
+    if not is_compressed(header) or len(header) < COMPRESSED_HEADER_SIZE:
+        return None
+    _, _, raw_length = COMPRESSED_HEADER.unpack_from(header, len(COMPRESSED_PREFIX))
+    return raw_length
+
+
+def load_dictionary(dictionary_dir: Path, dict_id: int) -> bytes:
+    key = (str(dictionary_dir), dict_id)
+    if key not in _dictionaries:
+        with open(Path(dictionary_dir) / f"{dict_id:08x}.dict", 'rb') as f:
+            _dictionaries[key] = f.read()
+    return _dictionaries[key]
+
+
+def decompress_payload(payload: bytes, dictionary_dir: Path) -> bytes:
+    """Inner codec payload of a record; uncompressed payloads pass through"""
+    if not is_compressed(payload):
+        return payload
+    algorithm, dict_id, raw_length = COMPRESSED_HEADER.unpack_from(payload, len(COMPRESSED_PREFIX))
+    data = payload[COMPRESSED_HEADER_SIZE:]
+    dictionary = load_dictionary(dictionary_dir, dict_id) if dict_id else b""
+
+    if ALGORITHM_NAMES.get(algorithm) == "zlib":
+        decompressor = zlib.decompressobj(-15, zdict=dictionary) if dictionary else zlib.decompressobj(-15)
+        raw = decompressor.decompress(data) + decompressor.flush()
+    elif ALGORITHM_NAMES.get(algorithm) == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Reading zstd-compressed records requires the 'zstandard' package")
+        dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        raw = zstandard.ZstdDecompressor(dict_data=dict_data).decompress(data, max_output_size=raw_length)
+    else:
+        raise ValueError(f"Unknown compression algorithm {algorithm}")
+
+    if len(raw) != raw_length:
+        raise ValueError("Compressed record is corrupt (length mismatch)")
+    return raw
+
+
+def train_dictionary(samples: List[bytes], size: int = DEFAULT_DICTIONARY_SIZE,
+                     algorithm: str = "zlib") -> bytes:
+    """Build a shared dictionary from sample record payloads"""
+    if algorithm == "zstd" and zstandard is not None:
+        return zstandard.train_dictionary(size, samples).as_bytes()
+
+    # zlib preset dictionary: the most valuable recurring fragments, with
+    # the most frequent last because deflate favours nearby matches
+    size = min(size, ZLIB_MAX_DICTIONARY)
+    counts: Counter = Counter()
+    for sample in samples:
+        seen = set(re.findall(rb'"[^"\\]{2,40}":|[^\s"{}\[\],:]{4,24}(?: [^\s"{}\[\],:]{2,24}){0,3}', sample))
+        counts.update(seen)
+
+    scored = sorted(((count * len(fragment), fragment) for fragment, count in counts.items() if count > 1),
+                    reverse=True)
+    chosen, total = [], 0
+    for _, fragment in scored:
+        if total + len(fragment) + 1 > size:
+            continue
+        chosen.append(fragment)
+        total += len(fragment) + 1
+    return b" ".join(reversed(chosen))
+
+
+class Compressor:
+    """Compresses record payloads for one cache directory"""
+
+    def __init__(self, root: Path, algorithm: str = "zlib", threshold: int = DEFAULT_THRESHOLD,
+                 level: Optional[int] = None):
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown compression: {algorithm} (available: {', '.join(ALGORITHMS)})")
+        if algorithm == "zstd" and zstandard is None:
+            raise RuntimeError("zstd compression requires the 'zstandard' package")
+        self.algorithm = algorithm
+        self.threshold = threshold
+        self.level = level if level is not None else (6 if algorithm == "zlib" else 3)
+        self.dictionary_dir = Path(root) / DICTIONARY_DIR
+        self.dict_id = 0
+        self.dictionary = b""
+        self._zstd_compressor = None
+        self.reload()
+
+    def reload(self):
+        """Pick up the directory's current dictionary"""
+        current = self.dictionary_dir / CURRENT_DICTIONARY
+        self.dict_id, self.dictionary = 0, b""
+        if current.exists():
+            try:
+                dict_id = int(current.read_text().strip(), 16)
+                self.dictionary = load_dictionary(self.dictionary_dir, dict_id)
+                self.dict_id = dict_id
+            except Exception as e:
+                logger.warning(f"Ignoring unusable compression dictionary in {self.dictionary_dir}: {e}")
+        if self.algorithm == "zstd":
+            dict_data = zstandard.ZstdCompressionDict(self.dictionary) if self.dictionary else None
+            self._zstd_compressor = zstandard.ZstdCompressor(level=self.level, dict_data=dict_data)
+
+    def install_dictionary(self, dictionary: bytes) -> int:
+        """Store a trained dictionary and make it current, return its id"""
+        dict_id = zlib.crc32(dictionary) or 1
+        self.dictionary_dir.mkdir(parents=True, exist_ok=True)
+        dict_path = self.dictionary_dir / f"{dict_id:08x}.dict"
+        if not dict_path.exists():
+            atomic_write(dict_path, dictionary)
+        atomic_write(self.dictionary_dir / CURRENT_DICTIONARY, f"{dict_id:08x}\n".encode('ascii'))
+        self.reload()
+        return dict_id
+
+    def compress(self, payload: bytes) -> Tuple[bytes, bool]:
+        """Return (stored payload, compressed?)"""
+        if len(payload) < self.threshold:
+            return payload, False
+
+        if self.algorithm == "zlib":
+            if self.dictionary:
+                compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15, zdict=self.dictionary)
+            else:
+                compressor = zlib.compressobj(self.level, zlib.DEFLATED, -15)
+            data = compressor.compress(payload) + compressor.flush()
+        else:
+            data = self._zstd_compressor.compress(payload)
+
+        header = COMPRESSED_PREFIX + COMPRESSED_HEADER.pack(ALGORITHMS[self.algorithm], self.dict_id, len(payload))
+        if len(header) + len(data) >= len(payload):
+            return payload, False
+        return header + data, True
+
+
+def resolve_compression(compression: Optional[str] = None,
+                        threshold: Optional[int] = None) -> Tuple[Optional[str], int]:
+    """Compression settings from arguments or CACHE_COMPRESSION[_THRESHOLD]"""
+    compression = compression or os.getenv(COMPRESSION_ENV_VAR) or None
+    if compression in ("none", "off"):
+        compression = None
+    if threshold is None:
+        threshold = int(os.getenv(THRESHOLD_ENV_VAR) or DEFAULT_THRESHOLD)
+    return compression, threshold
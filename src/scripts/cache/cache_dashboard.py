@@ -13,26 +13,46 @@ import argparse
 from datetime import datetime, timedelta
 from pathlib import Path
 import sys
-from collections import defaultdict, Counter
 from typing import Dict, List, Tuple
 
 # Add cache system to path
 sys.path.append(str(Path(__file__).parent))
-from cache import get_simple_cache_system
+from cache_metrics import MetricsEngine, CONTENT_COUNTERS, RECORDS_DIM, top_counts
+from cache_server import connect_cache_system
 
 class CacheDashboard:
     """Cache system dashboard and analytics"""
     
-    def __init__(self):
-        self.cache = get_simple_cache_system()
+    def __init__(self, rebuild: bool = False, workers: int = None, cache=None, days: int = None):
+        self.cache = cache or connect_cache_system(workers=workers)
+        # With a running query server the rollups live (and stay warm) in the daemon
+        self.remote = getattr(self.cache, "remote", False)
+        self.metrics = None if self.remote else MetricsEngine(self.cache)
+        self.rebuild = rebuild
+        # Restrict analytics to the last N days (None = all history)
+        self.days = days
+        self.since = None
+        self.table = None
         
     def generate_statistics(self) -> Dict:
         """Generate comprehensive cache statistics"""
+        if self.remote:
+            stats = self.cache.call("dashboard", rebuild=self.rebuild, days=self.days)
+            self.rebuild = False
+            return stats
+        
         stats = self.cache.get_stats()
         
+        # Every analyzer below aggregates the same rollup snapshot
+        self.metrics.update(rebuild=self.rebuild, counts=stats['counts'])
+        self.rebuild = False
+        self.table = self.metrics.table()
+        self.since = datetime.now() - timedelta(days=self.days) if self.days else None
+        
         # Enhanced analytics
         enhanced_stats = {
             **stats,
+            'window_days': self.days,
             'activity_patterns': self._analyze_activity_patterns(),
             'content_analytics': self._analyze_content_types(),
             'performance_metrics': self._calculate_performance_metrics(),
@@ -44,31 +64,13 @@ class CacheDashboard:
     def _analyze_activity_patterns(self) -> Dict:
         """Analyze activity patterns by time"""
         patterns = {
-            'hourly': defaultdict(int),
-            'daily': defaultdict(int),
-            'weekly': defaultdict(int),
+            'hourly': self.table.counts(RECORDS_DIM, by="hour", since=self.since),
+            'daily': self.table.counts(RECORDS_DIM, by="day", since=self.since),
+            'weekly': self.table.counts(RECORDS_DIM, by="weekday", since=self.since),
             'peak_hours': [],
             'peak_days': []
         }
         
-        files = self.cache.list_cache_files()
-        
-        for file_type, file_list in files.items():
-            cache_path = getattr(self.cache, f"{file_type}_path")
-            
-            for filename in file_list:
-                file_path = cache_path / filename
-                cache_data = self.cache.read_cache_file(file_path)
-                
-                if cache_data and 'timestamp' in cache_data:
-                    try:
-                        dt = datetime.fromisoformat(cache_data['timestamp'])
-                        patterns['hourly'][dt.hour] += 1
-                        patterns['daily'][dt.strftime('%Y-%m-%d')] += 1
-                        patterns['weekly'][dt.strftime('%A')] += 1
-                    except:
-                        continue
-        
         # Find peak times
         if patterns['hourly']:
             peak_hour = max(patterns['hourly'], key=patterns['hourly'].get)
@@ -82,85 +84,30 @@ class CacheDashboard:
     
     def _analyze_content_types(self) -> Dict:
         """Analyze content types and patterns"""
-        content_stats = {
-            'thinking_topics': Counter(),
-            'agent_types': Counter(),
-            'research_domains': Counter(),
-            'tool_usage': Counter(),
-            'common_queries': Counter()
-        }
-        
-        files = self.cache.list_cache_files()
-        
-        for file_type, file_list in files.items():
-            cache_path = getattr(self.cache, f"{file_type}_path")
-            
-            for filename in file_list:
-                file_path = cache_path / filename
-                cache_data = self.cache.read_cache_file(file_path)
-                
-                if cache_data and 'content' in cache_data:
-                    content = cache_data['content']
-                    
-                    if file_type == 'thinking':
-                        if 'user_query' in content:
-                            query = content['user_query'].lower()
-                            # Extract key words
-                            words = [w for w in query.split() if len(w) > 3][:3]
-                            content_stats['common_queries'].update(words)
-                        
-                        if 'tools_used' in content:
-                            content_stats['tool_usage'].update(content['tools_used'])
-                    
-                    elif file_type == 'agent':
-                        if 'agent_name' in content:
-                            content_stats['agent_types'][content['agent_name']] += 1
-                    
-                    elif file_type == 'research':
-                        if 'domain' in content:
-                            content_stats['research_domains'][content['domain']] += 1
-        
-        return {k: dict(v.most_common(10)) for k, v in content_stats.items()}
+        return {name: top_counts(self.table.counts(name, since=self.since)) for name in CONTENT_COUNTERS}
     
     def _calculate_performance_metrics(self) -> Dict:
         """Calculate cache performance metrics"""
-        files = self.cache.list_cache_files()
-        total_files = sum(len(file_list) for file_list in files.values())
+        sizes = self.table.group(RECORDS_DIM, since=self.since)
+        total_files = int(sum(count for count, _ in sizes.values()))
         
         if total_files == 0:
             return {'avg_daily_cache': 0, 'cache_efficiency': 0, 'storage_usage': 0}
         
-        # Calculate storage usage
-        total_size = 0
-        oldest_date = None
-        newest_date = None
-        
-        for file_type, file_list in files.items():
-            cache_path = getattr(self.cache, f"{file_type}_path")
-            
-            for filename in file_list:
-                file_path = cache_path / filename
-                
-                try:
-                    total_size += file_path.stat().st_size
-                    
-                    cache_data = self.cache.read_cache_file(file_path)
-                    if cache_data and 'timestamp' in cache_data:
-                        dt = datetime.fromisoformat(cache_data['timestamp'])
-                        if oldest_date is None or dt < oldest_date:
-                            oldest_date = dt
-                        if newest_date is None or dt > newest_date:
-                            newest_date = dt
-                except:
-                    continue
+        total_size = sum(size for _, size in sizes.values())
         
         # Calculate metrics
         metrics = {
             'storage_usage_mb': round(total_size / (1024 * 1024), 2),
             'avg_file_size_kb': round(total_size / max(total_files, 1) / 1024, 2),
-            'total_files': total_files
+            'total_files': total_files,
+            'size_by_type_kb': {
+                file_type: round(size / 1024, 2)
+                for file_type, (_, size) in sizes.items()
+            }
         }
         
+        oldest_date, newest_date = self.table.span(RECORDS_DIM, since=self.since)
         if oldest_date and newest_date:
             days_span = max((newest_date - oldest_date).days, 1)
             metrics['avg_daily_cache'] = round(total_files / days_span, 2)
@@ -170,23 +117,7 @@ class CacheDashboard:
     
     def _analyze_growth_trends(self) -> Dict:
         """Analyze cache growth trends"""
-        daily_counts = defaultdict(int)
-        files = self.cache.list_cache_files()
-        
-        for file_type, file_list in files.items():
-            cache_path = getattr(self.cache, f"{file_type}_path")
-            
-            for filename in file_list:
-                file_path = cache_path / filename
-                cache_data = self.cache.read_cache_file(file_path)
-                
-                if cache_data and 'timestamp' in cache_data:
-                    try:
-                        dt = datetime.fromisoformat(cache_data['timestamp'])
-                        date_key = dt.strftime('%Y-%m-%d')
-                        daily_counts[date_key] += 1
-                    except:
-                        continue
+        daily_counts = self.table.counts(RECORDS_DIM, by="day", since=self.since)
         
         # Calculate trends
         if len(daily_counts) >= 2:
@@ -202,7 +133,7 @@ class CacheDashboard:
             growth_rate = 0
         
         return {
-            'daily_counts': dict(daily_counts),
+            'daily_counts': dict(sorted(daily_counts.items())),
             'growth_rate_percent': round(growth_rate, 1),
             'total_days': len(daily_counts)
         }
@@ -222,6 +153,8 @@ class CacheDashboard:
         print(f"Base Path: {stats['base_path']}")
         print(f"Total Files: {stats['total_files']}")
         print(f"Last Updated: {stats['timestamp'][:19]}")
+        if stats.get('window_days'):
+            print(f"Analytics Window: last {stats['window_days']} days")
         print()
         
         # File counts by type
@@ -304,10 +237,16 @@ def main():
     parser.add_argument("--export", metavar="FILE", help="Export stats to JSON file")
     parser.add_argument("--format", choices=["json", "dashboard"], default="dashboard", 
                        help="Output format")
+    parser.add_argument("--rebuild", action="store_true",
+                       help="Rebuild the rollup store from every record")
     
+    parser.add_argument("--days", type=int,
+                       help="Only analyze records from the last N days")
+    parser.add_argument("--workers", type=int,
+                       help="Worker processes for full scans (default: CPU count, 1 = serial)")
     args = parser.parse_args()
     
-    dashboard = CacheDashboard()
+    dashboard = CacheDashboard(rebuild=args.rebuild, workers=args.workers, days=args.days)
     
     try:
         if args.export:
@@ -8,220 +8,381 @@ Author: Claude Code Research System
 Version: 1.0.0
 """
 
+import io
 import json
 import csv
+import gzip
 import argparse
 from datetime import datetime
 from pathlib import Path
 import sys
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple, Iterator, Any, TextIO
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 # Add cache system to path
 sys.path.append(str(Path(__file__).parent))
-from cache import get_simple_cache_system
+from cache_backup import BackupRepository
+from cache_server import connect_cache_system
+
+COMPRESSION_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+
+CSV_FIELDS = ['filename', 'type', 'timestamp', 'file_path', 'file_size_bytes',
+              'user_query', 'tools_used', 'agent_name', 'status', 'domain', 'query']
 
 class CacheExporter:
-    """Cache data exporter with multiple format support"""
+    """Cache data exporter with multiple format support
+    
+    Every exporter streams: records are written out as soon as they are
+    parsed, so memory use is bounded by the few chunks of records the scan
+    executor keeps in flight (a single record when scanning serially).
+    Time-range filters are matched against record ids (or segment footers)
+    before any record body is parsed.
+    """
+    
+    def __init__(self, progress: bool = False, workers: int = None, cache=None,
+                 use_server: Optional[bool] = None):
+        # Progress is reported from the scan loop, which only runs locally
+        if progress:
+            use_server = False
+        self.cache = cache or connect_cache_system(workers=workers, use_server=use_server)
+        self.remote = getattr(self.cache, "remote", False)
+        self.progress = progress
+    
+    def _remote_export(self, format: str, output_file: str, filter_type: str,
+                       include_content: bool, since: Optional[datetime], until: Optional[datetime],
+                       compression: Optional[str]) -> str:
+        """Let the query server stream the export from its warm cache"""
+        return self.cache.call(
+            "export", format=format,
+            # Resolved here: the daemon's working directory is not the caller's
+            output_file=str(Path(output_file).resolve()),
+            filter_type=filter_type, include_content=include_content,
+            since=since.isoformat() if since else None,
+            until=until.isoformat() if until else None,
+            compression=compression
+        )
+    
+    def _default_output(self, prefix: str, extension: str, compression: Optional[str]) -> str:
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        return f"{prefix}_{timestamp}.{extension}{COMPRESSION_SUFFIXES.get(compression, '')}"
+    
+    def _open_output(self, output_file: str, compression: Optional[str] = None,
+                     newline: Optional[str] = None) -> TextIO:
+        """Open a text stream, optionally gzip or zstd compressed"""
+        if compression == 'gzip':
+            return gzip.open(output_file, 'wt', encoding='utf-8', newline=newline)
+        if compression == 'zstd':
+            if zstandard is None:
+                raise RuntimeError("zstd compression requires the 'zstandard' package")
+            raw = open(output_file, 'wb')
+            writer = zstandard.ZstdCompressor().stream_writer(raw)
+            return io.TextIOWrapper(writer, encoding='utf-8', newline=newline)
+        if compression:
+            raise ValueError(f"Unknown compression: {compression}")
+        return open(output_file, 'w', encoding='utf-8', newline=newline)
+    
+    @staticmethod
+    def _in_range(when: Optional[datetime], since: Optional[datetime],
+                  until: Optional[datetime]) -> bool:
+        if since and when < since:
+            return False
+        if until and when >= until:
+            return False
+        return True
     
-    def __init__(self):
-        self.cache = get_simple_cache_system()
+    def _select(self, filter_type: str, since: Optional[datetime] = None,
+                until: Optional[datetime] = None) -> Dict[str, List[Tuple[str, Optional[datetime]]]]:
+        """Record names per type whose time may fall in the range, without parsing"""
+        selected = {}
+        for file_type, storage in self.cache.storages.items():
+            if filter_type not in ["all", file_type]:
+                continue
+            selected[file_type] = [
+                # Storages skip whole partitions / sealed segments outside the range
+                (name, when) for name, when in storage.list_timed_names(since, until)
+                if when is None or self._in_range(when, since, until)
+            ]
+        return selected
+    
+    def _iter_selected(self, file_type: str, names: List[Tuple[str, Optional[datetime]]],
+                       since: Optional[datetime], until: Optional[datetime]
+                       ) -> Iterator[Tuple[str, Path, Dict[str, Any]]]:
+        """Read selected records in order (parsed by the scan executor)"""
+        cache_path = getattr(self.cache, f"{file_type}_path")
+        untimed = {cache_path / filename for filename, when in names if when is None}
+        for file_path, cache_data in self.cache.scanner.map([cache_path / filename for filename, _ in names]):
+            if file_path in untimed and (since or until):
+                # Time unknown from the name alone: check the parsed timestamp
+                try:
+                    when = datetime.fromisoformat(cache_data.get('timestamp', ''))
+                except (TypeError, ValueError):
+                    continue
+                if not self._in_range(when, since, until):
+                    continue
+            yield file_path.name, file_path, cache_data
+    
+    def _iter_records(self, selected: Dict[str, List[Tuple[str, Optional[datetime]]]],
+                      since: Optional[datetime], until: Optional[datetime]
+                      ) -> Iterator[Tuple[str, str, Path, Dict[str, Any]]]:
+        """Stream (file_type, filename, path, record) with progress reporting"""
+        total = sum(len(names) for names in selected.values())
+        done = 0
+        for file_type, names in selected.items():
+            for filename, file_path, cache_data in self._iter_selected(file_type, names, since, until):
+                yield file_type, filename, file_path, cache_data
+                done += 1
+                self._report_progress(done, total)
+        self._report_progress(done, total, final=True)
+    
+    def _report_progress(self, done: int, total: int, final: bool = False):
+        if not self.progress:
+            return
+        if final or done % 500 == 0:
+            percent = done / total * 100 if total else 100.0
+            end = "\n" if final else ""
+            print(f"\r  {done:,}/{total:,} records ({percent:.0f}%)", end=end, file=sys.stderr, flush=True)
+    
+    def _export_item(self, filename: str, file_path: Path, cache_data: Dict[str, Any],
+                     include_content: bool) -> Dict[str, Any]:
+        export_item = {
+            'filename': filename,
+            'timestamp': cache_data.get('timestamp'),
+            'file_path': str(file_path)
+        }
+        
+        if include_content:
+            export_item['content'] = cache_data.get('content')
+        else:
+            # Only include summary for space efficiency
+            content = cache_data.get('content', {})
+            if isinstance(content, dict):
+                export_item['content_summary'] = {
+                    k: str(v)[:100] + "..." if len(str(v)) > 100 else str(v)
+                    for k, v in content.items()
+                }
+            else:
+                export_item['content_summary'] = str(content)[:200] + "..."
+        
+        return export_item
     
     def export_to_json(self, output_file: str = None, filter_type: str = "all", 
-                      include_content: bool = True) -> str:
-        """Export cache to JSON format"""
+                      include_content: bool = True, since: Optional[datetime] = None,
+                      until: Optional[datetime] = None, compression: Optional[str] = None) -> str:
+        """Export cache to JSON format (streamed as one document)"""
         if not output_file:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            output_file = f"cache_export_{timestamp}.json"
+            output_file = self._default_output("cache_export", "json", compression)
+        if self.remote:
+            return self._remote_export("json", output_file, filter_type, include_content, since, until, compression)
         
-        files = self.cache.list_cache_files(filter_type)
-        export_data = {
-            'export_info': {
-                'timestamp': datetime.now().isoformat(),
-                'cache_type': filter_type,
-                'total_files': sum(len(file_list) for file_list in files.values()),
-                'include_content': include_content
-            },
-            'cache_data': {}
+        selected = self._select(filter_type, since, until)
+        export_info = {
+            'timestamp': datetime.now().isoformat(),
+            'cache_type': filter_type,
+            'total_files': sum(len(names) for names in selected.values()),
+            'include_content': include_content,
+            'since': since.isoformat() if since else None,
+            'until': until.isoformat() if until else None
         }
         
-        for file_type, file_list in files.items():
-            cache_path = getattr(self.cache, f"{file_type}_path")
-            export_data['cache_data'][file_type] = []
+        with self._open_output(output_file, compression) as f:
+            f.write('{\n  "export_info": ')
+            f.write(json.dumps(export_info, ensure_ascii=False))
+            f.write(',\n  "cache_data": {')
             
-            for filename in file_list:
-                file_path = cache_path / filename
-                cache_data = self.cache.read_cache_file(file_path)
-                
-                if cache_data:
-                    export_item = {
-                        'filename': filename,
-                        'timestamp': cache_data.get('timestamp'),
-                        'file_path': str(file_path)
-                    }
-                    
-                    if include_content:
-                        export_item['content'] = cache_data.get('content')
-                    else:
-                        # Only include summary for space efficiency
-                        content = cache_data.get('content', {})
-                        if isinstance(content, dict):
-                            export_item['content_summary'] = {
-                                k: str(v)[:100] + "..." if len(str(v)) > 100 else str(v)
-                                for k, v in content.items()
-                            }
-                        else:
-                            export_item['content_summary'] = str(content)[:200] + "..."
-                    
-                    export_data['cache_data'][file_type].append(export_item)
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(export_data, f, indent=2, ensure_ascii=False)
+            # Every selected type gets its list, empty or not, in selection order
+            types = iter(selected)
+            current_type = None
+            
+            def open_list(file_type: str):
+                nonlocal current_type
+                if current_type is not None:
+                    f.write('\n    ],')
+                f.write(f'\n    {json.dumps(file_type)}: [')
+                current_type = file_type
+            
+            first_item = True
+            for file_type, filename, file_path, cache_data in self._iter_records(selected, since, until):
+                while file_type != current_type:
+                    open_list(next(types))
+                    first_item = True
+                item = self._export_item(filename, file_path, cache_data, include_content)
+                f.write('\n      ' if first_item else ',\n      ')
+                f.write(json.dumps(item, ensure_ascii=False))
+                first_item = False
+            
+            for file_type in types:
+                open_list(file_type)
+            if current_type is not None:
+                f.write('\n    ]')
+            f.write('\n  }\n}\n')
         
         return output_file
     
-    def export_to_csv(self, output_file: str = None, filter_type: str = "all") -> str:
-        """Export cache metadata to CSV format"""
+    def export_to_ndjson(self, output_file: str = None, filter_type: str = "all",
+                         include_content: bool = True, since: Optional[datetime] = None,
+                         until: Optional[datetime] = None, compression: Optional[str] = None) -> str:
+        """Export cache as newline-delimited JSON, one record per line"""
         if not output_file:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            output_file = f"cache_metadata_{timestamp}.csv"
+            output_file = self._default_output("cache_export", "ndjson", compression)
+        if self.remote:
+            return self._remote_export("ndjson", output_file, filter_type, include_content, since, until, compression)
         
-        files = self.cache.list_cache_files(filter_type)
+        selected = self._select(filter_type, since, until)
+        with self._open_output(output_file, compression) as f:
+            for file_type, filename, file_path, cache_data in self._iter_records(selected, since, until):
+                item = {'type': file_type,
+                        **self._export_item(filename, file_path, cache_data, include_content)}
+                f.write(json.dumps(item, ensure_ascii=False))
+                f.write('\n')
         
-        # Prepare CSV data
-        csv_data = []
-        for file_type, file_list in files.items():
-            cache_path = getattr(self.cache, f"{file_type}_path")
-            
-            for filename in file_list:
-                file_path = cache_path / filename
-                cache_data = self.cache.read_cache_file(file_path)
-                
-                if cache_data:
-                    row = {
-                        'filename': filename,
-                        'type': file_type,
-                        'timestamp': cache_data.get('timestamp'),
-                        'file_path': str(file_path),
-                        'file_size_bytes': file_path.stat().st_size if file_path.exists() else 0
-                    }
-                    
-                    # Add type-specific fields
-                    content = cache_data.get('content', {})
-                    if file_type == 'thinking':
-                        row['user_query'] = content.get('user_query', '')[:200]
-                        row['tools_used'] = ','.join(content.get('tools_used', []))
-                    elif file_type == 'agent':
-                        row['agent_name'] = content.get('agent_name', '')
-                        row['status'] = content.get('status', '')
-                    elif file_type == 'research':
-                        row['domain'] = content.get('domain', '')
-                        row['query'] = content.get('query', '')[:200]
-                    
-                    csv_data.append(row)
+        return output_file
+    
+    def _csv_row(self, file_type: str, filename: str, file_path: Path,
+                 cache_data: Dict[str, Any]) -> Dict[str, Any]:
+        row = {
+            'filename': filename,
+            'type': file_type,
+            'timestamp': cache_data.get('timestamp'),
+            'file_path': str(file_path),
+            'file_size_bytes': self.cache.get_record_size(file_path)
+        }
         
-        # Write CSV
-        if csv_data:
-            fieldnames = csv_data[0].keys()
-            with open(output_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(csv_data)
+        # Add type-specific fields
+        content = cache_data.get('content', {})
+        if not isinstance(content, dict):
+            return row
+        if file_type == 'thinking':
+            row['user_query'] = str(content.get('user_query', ''))[:200]
+            row['tools_used'] = ','.join(
+                tool.get('name', 'Unknown') if isinstance(tool, dict) else str(tool)
+                for tool in content.get('tools_used', [])
+            )
+        elif file_type == 'agent':
+            row['agent_name'] = content.get('agent_name', '')
+            row['status'] = content.get('status', '')
+        elif file_type == 'research':
+            row['domain'] = content.get('domain', '')
+            row['query'] = str(content.get('query', ''))[:200]
+        return row
+    
+    def export_to_csv(self, output_file: str = None, filter_type: str = "all",
+                      since: Optional[datetime] = None, until: Optional[datetime] = None,
+                      compression: Optional[str] = None) -> str:
+        """Export cache metadata to CSV format"""
+        if not output_file:
+            output_file = self._default_output("cache_metadata", "csv", compression)
+        if self.remote:
+            return self._remote_export("csv", output_file, filter_type, True, since, until, compression)
+        
+        selected = self._select(filter_type, since, until)
+        with self._open_output(output_file, compression, newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, restval='')
+            writer.writeheader()
+            for file_type, filename, file_path, cache_data in self._iter_records(selected, since, until):
+                writer.writerow(self._csv_row(file_type, filename, file_path, cache_data))
         
         return output_file
     
-    def export_to_markdown(self, output_file: str = None, filter_type: str = "all") -> str:
+    def export_to_markdown(self, output_file: str = None, filter_type: str = "all",
+                           since: Optional[datetime] = None, until: Optional[datetime] = None,
+                           compression: Optional[str] = None) -> str:
         """Export cache to Markdown format for documentation"""
         if not output_file:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            output_file = f"cache_report_{timestamp}.md"
+            output_file = self._default_output("cache_report", "md", compression)
+        if self.remote:
+            return self._remote_export("markdown", output_file, filter_type, True, since, until, compression)
         
-        files = self.cache.list_cache_files(filter_type)
+        selected = self._select(filter_type, since, until)
         stats = self.cache.get_stats()
         
-        # Generate markdown content
-        md_content = []
-        md_content.append("# Claude Code Cache Report")
-        md_content.append(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        md_content.append("")
-        
-        # Summary
-        md_content.append("## Summary")
-        md_content.append(f"- **Base Path:** `{stats['base_path']}`")
-        md_content.append(f"- **Total Files:** {stats['total_files']}")
-        md_content.append(f"- **Cache Types:** {filter_type}")
-        md_content.append("")
-        
-        # Files by type
-        md_content.append("## Files by Type")
-        for cache_type, count in stats['counts'].items():
-            if filter_type == "all" or filter_type == cache_type:
-                md_content.append(f"- **{cache_type.capitalize()}:** {count} files")
-        md_content.append("")
-        
-        # Detailed file listing
-        for file_type, file_list in files.items():
-            if not file_list:
-                continue
-                
-            md_content.append(f"## {file_type.capitalize()} Files")
-            cache_path = getattr(self.cache, f"{file_type}_path")
+        with self._open_output(output_file, compression) as f:
+            def write_line(line: str = ""):
+                f.write(line + "\n")
+            
+            write_line("# Claude Code Cache Report")
+            write_line(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+            write_line()
+            
+            # Summary
+            write_line("## Summary")
+            write_line(f"- **Base Path:** `{stats['base_path']}`")
+            write_line(f"- **Total Files:** {stats['total_files']}")
+            write_line(f"- **Cache Types:** {filter_type}")
+            if since or until:
+                write_line(f"- **Time Range:** {since or '…'} – {until or '…'}")
+            write_line()
             
-            for filename in file_list:
-                file_path = cache_path / filename
-                cache_data = self.cache.read_cache_file(file_path)
+            # Files by type
+            write_line("## Files by Type")
+            for cache_type, count in stats['counts'].items():
+                if filter_type == "all" or filter_type == cache_type:
+                    write_line(f"- **{cache_type.capitalize()}:** {count} files")
+            write_line()
+            
+            # Detailed file listing
+            current_type = None
+            for file_type, filename, file_path, cache_data in self._iter_records(selected, since, until):
+                if file_type != current_type:
+                    write_line(f"## {file_type.capitalize()} Files")
+                    current_type = file_type
                 
-                if cache_data:
-                    md_content.append(f"### {filename}")
-                    md_content.append(f"- **Timestamp:** {cache_data.get('timestamp')}")
-                    md_content.append(f"- **Path:** `{file_path}`")
-                    
-                    content = cache_data.get('content', {})
-                    if isinstance(content, dict):
-                        for key, value in content.items():
-                            if key in ['user_query', 'agent_name', 'domain', 'query']:
-                                md_content.append(f"- **{key.replace('_', ' ').title()}:** {str(value)[:200]}")
-                    
-                    md_content.append("")
-        
-        # Write markdown file
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(md_content))
+                write_line(f"### {filename}")
+                write_line(f"- **Timestamp:** {cache_data.get('timestamp')}")
+                write_line(f"- **Path:** `{file_path}`")
+                
+                content = cache_data.get('content', {})
+                if isinstance(content, dict):
+                    for key, value in content.items():
+                        if key in ['user_query', 'agent_name', 'domain', 'query']:
+                            write_line(f"- **{key.replace('_', ' ').title()}:** {str(value)[:200]}")
+                
+                write_line()
         
         return output_file
     
+    def _backup_repository(self, repo_dir: str = None) -> BackupRepository:
+        if not repo_dir:
+            repo_dir = Path(self.cache.base_path).parent / "cache_backups"
+        return BackupRepository(Path(repo_dir))
+    
     def backup_cache(self, backup_dir: str = None) -> str:
-        """Create a complete backup of the cache system"""
-        if not backup_dir:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            backup_dir = f"cache_backup_{timestamp}"
-        
-        backup_path = Path(backup_dir)
-        backup_path.mkdir(exist_ok=True)
-        
-        # Copy all cache files
-        import shutil
-        
-        for cache_type in ['thinking', 'research', 'agent']:
-            cache_path = getattr(self.cache, f"{cache_type}_path")
-            if cache_path.exists():
-                type_backup_dir = backup_path / cache_type
-                type_backup_dir.mkdir(exist_ok=True)
-                
-                for file_path in cache_path.glob("*.json"):
-                    shutil.copy2(file_path, type_backup_dir / file_path.name)
+        """Create an incremental snapshot of the cache system
         
-        # Create backup metadata
-        backup_info = {
-            'backup_timestamp': datetime.now().isoformat(),
-            'original_cache_path': str(self.cache.base_path),
-            'backup_path': str(backup_path),
-            'stats': self.cache.get_stats()
-        }
-        
-        with open(backup_path / "backup_info.json", 'w') as f:
-            json.dump(backup_info, f, indent=2)
-        
-        return str(backup_path)
+        Only chunks not already in the backup repository are copied; the
+        snapshot manifest lists every file. Returns the snapshot id.
+        """
+        for storage in self.cache.storages.values():
+            storage.sync()
+        manifest = self._backup_repository(backup_dir).backup(Path(self.cache.base_path))
+        return manifest['id']
+    
+    def list_backups(self, backup_dir: str = None) -> List[Dict]:
+        """Summaries of every snapshot in the repository"""
+        repo = self._backup_repository(backup_dir)
+        summaries = []
+        for snapshot_id in repo.list_snapshots():
+            manifest = repo.load_manifest(snapshot_id)
+            summaries.append({'id': snapshot_id, 'created': manifest['created'], **manifest['stats']})
+        return summaries
+    
+    def restore_backup(self, snapshot_id: str, target_dir: str = None, backup_dir: str = None) -> Dict:
+        """Restore a snapshot into target_dir (default: a new directory)"""
+        if not target_dir:
+            target_dir = f"cache_restore_{snapshot_id}"
+        restored = self._backup_repository(backup_dir).restore(snapshot_id, Path(target_dir))
+        return {'target': str(target_dir), **restored}
+    
+    def diff_backups(self, old_id: str, new_id: str, backup_dir: str = None) -> Dict:
+        """Compare two snapshots"""
+        return self._backup_repository(backup_dir).diff(old_id, new_id)
+    
+    def prune_backups(self, backup_dir: str = None, dry_run: bool = False, **policy) -> Dict:
+        """Apply the retention policy and garbage-collect unreferenced chunks"""
+        return self._backup_repository(backup_dir).prune(dry_run=dry_run, **policy)
     
     def print_export_summary(self, export_files: List[str]):
         """Print summary of exported files"""
@@ -235,40 +396,113 @@ class CacheExporter:
 def main():
     """Main CLI interface"""
     parser = argparse.ArgumentParser(description="Cache Export Tool")
-    parser.add_argument("--format", choices=["json", "csv", "markdown", "all"], 
+    parser.add_argument("--format", choices=["json", "ndjson", "csv", "markdown", "all"], 
                        default="json", help="Export format")
     parser.add_argument("--type", choices=["all", "thinking", "research", "agent"], 
                        default="all", help="Cache type to export")
     parser.add_argument("--output", help="Output file/directory name")
     parser.add_argument("--no-content", action="store_true", 
                        help="Exclude content from JSON export (metadata only)")
+    parser.add_argument("--since", type=datetime.fromisoformat,
+                       help="Only export records at or after this ISO date/time")
+    parser.add_argument("--until", type=datetime.fromisoformat,
+                       help="Only export records before this ISO date/time")
+    parser.add_argument("--compress", choices=sorted(COMPRESSION_SUFFIXES),
+                       help="Compress the output stream")
+    parser.add_argument("--progress", action="store_true",
+                       help="Report progress on stderr")
+    parser.add_argument("--workers", type=int,
+                       help="Worker processes for parsing records (default: CPU count, 1 = serial)")
     parser.add_argument("--backup", action="store_true", 
-                       help="Create complete backup instead of export")
+                       help="Create an incremental backup snapshot instead of export")
+    parser.add_argument("--backup-dir", help="Backup repository (default: cache_backups next to the cache)")
+    parser.add_argument("--list-backups", action="store_true", help="List backup snapshots")
+    parser.add_argument("--restore", metavar="SNAPSHOT",
+                       help="Restore a snapshot into --output (default: cache_restore_<snapshot>)")
+    parser.add_argument("--diff", nargs=2, metavar=("OLD", "NEW"), help="Compare two snapshots")
+    parser.add_argument("--prune", action="store_true", help="Delete snapshots outside the retention policy")
+    parser.add_argument("--keep-last", type=int, default=7, help="Snapshots to keep regardless of age")
+    parser.add_argument("--keep-daily", type=int, default=7, help="Daily snapshots to keep")
+    parser.add_argument("--keep-weekly", type=int, default=4, help="Weekly snapshots to keep")
+    parser.add_argument("--keep-monthly", type=int, default=12, help="Monthly snapshots to keep")
+    parser.add_argument("--dry-run", action="store_true", help="Show what --prune would delete")
     
     args = parser.parse_args()
     
-    exporter = CacheExporter()
+    # Backups read the cache directories directly; exports can go through the query server
+    backup_command = args.backup or args.list_backups or args.restore or args.diff or args.prune
+    exporter = CacheExporter(progress=args.progress, workers=args.workers,
+                             use_server=False if backup_command else None)
     exported_files = []
+    filters = {'since': args.since, 'until': args.until, 'compression': args.compress}
     
     try:
         if args.backup:
-            backup_dir = exporter.backup_cache(args.output)
-            print(f"🗄️  Complete cache backup created: {backup_dir}")
+            snapshot_id = exporter.backup_cache(args.backup_dir or args.output)
+            stats = exporter.list_backups(args.backup_dir or args.output)[-1]
+            print(f"🗄️  Backup snapshot created: {snapshot_id}")
+            print(f"   {stats['files']} files, {stats['unchanged_files']} unchanged, "
+                  f"{stats['new_chunks']} new chunks ({stats['new_bytes']:,} bytes copied)")
+            return
+        
+        if args.list_backups:
+            for snapshot in exporter.list_backups(args.backup_dir):
+                print(f"🗄️  {snapshot['id']}  {snapshot['files']:>6} files  "
+                      f"{snapshot['total_bytes']:>12,} bytes  (+{snapshot['new_bytes']:,} new)")
+            return
+        
+        if args.restore:
+            result = exporter.restore_backup(args.restore, args.output, args.backup_dir)
+            print(f"♻️  Restored {result['files']} files ({result['bytes']:,} bytes) to {result['target']}")
+            return
+        
+        if args.diff:
+            diff = exporter.diff_backups(args.diff[0], args.diff[1], args.backup_dir)
+            for label, symbol in [('added', '+'), ('removed', '-'), ('modified', '~')]:
+                for path in diff[label]:
+                    print(f"{symbol} {path}")
+            print(f"📊 {len(diff['added'])} added, {len(diff['removed'])} removed, "
+                  f"{len(diff['modified'])} modified, {diff['unchanged']} unchanged")
+            return
+        
+        if args.prune:
+            result = exporter.prune_backups(
+                args.backup_dir, dry_run=args.dry_run, keep_last=args.keep_last,
+                keep_daily=args.keep_daily, keep_weekly=args.keep_weekly,
+                keep_monthly=args.keep_monthly
+            )
+            prefix = "Would remove" if args.dry_run else "Removed"
+            for snapshot_id in result['removed_snapshots']:
+                print(f"🗑️  {prefix} snapshot {snapshot_id}")
+            print(f"🧹 {prefix} {result['removed_blobs']} unreferenced chunks "
+                  f"({result['freed_bytes']:,} bytes), kept {len(result['kept_snapshots'])} snapshots")
             return
         
         if args.format == "json" or args.format == "all":
             json_file = exporter.export_to_json(
                 args.output if args.format == "json" else None,
                 args.type,
-                not args.no_content
+                not args.no_content,
+                **filters
             )
             exported_files.append(json_file)
             print(f"📄 JSON export: {json_file}")
         
+        if args.format == "ndjson" or args.format == "all":
+            ndjson_file = exporter.export_to_ndjson(
+                args.output if args.format == "ndjson" else None,
+                args.type,
+                not args.no_content,
+                **filters
+            )
+            exported_files.append(ndjson_file)
+            print(f"📄 NDJSON export: {ndjson_file}")
+        
         if args.format == "csv" or args.format == "all":
             csv_file = exporter.export_to_csv(
                 args.output if args.format == "csv" else None,
-                args.type
+                args.type,
+                **filters
             )
             exported_files.append(csv_file)
             print(f"📊 CSV export: {csv_file}")
@@ -276,7 +510,8 @@ def main():
         if args.format == "markdown" or args.format == "all":
             md_file = exporter.export_to_markdown(
                 args.output if args.format == "markdown" else None,
-                args.type
+                args.type,
+                **filters
             )
             exported_files.append(md_file)
             print(f"📝 Markdown report: {md_file}")
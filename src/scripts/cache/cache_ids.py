@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Cache Record Identifiers
+
+Time-ordered, collision-free record ids for cache writes::
+
+    2026-10-17T14-03-27-123456-0000-3fa9c1
+    └──── local time ─────┘ └µs─┘ └seq┘ └node┘
+
+- the timestamp matches the record's ``timestamp`` field
+- the sequence breaks ties within one microsecond, so ids from one process
+  are strictly increasing even if the clock stalls or steps backwards
+- the node component is derived from host, pid and a random salt, so
+  concurrent processes never produce the same id
+
+Ids sort lexicographically in creation order. ``record_sort_key`` and
+``record_time`` also understand legacy second-resolution filenames and
+segment locators, so listings can be ordered without reading bodies.
+
+Author: Claude Code Research System
+Version: 1.0.0
+"""
+
+import os
+import re
+import socket
+import hashlib
+import threading
+from datetime import datetime
+from typing import Optional, Tuple
+
+ID_TIME_FORMAT = "%Y-%m-%dT%H-%M-%S"
+
+NAME_PATTERN = re.compile(
+    r"^(?P<second>\d{4}-\d{2}-\d{2}T\d{2}-\d{2}-\d{2})"
+    r"(?:-(?P<micro>\d{6})-(?P<seq>[0-9a-f]{4,})-(?P<node>[0-9a-f]{6}))?"
+    r"(?:_|$)"
+)
+SEGMENT_NAME_PATTERN = re.compile(r"^(?P<segment>\d+)\.seg#(?P<offset>\d+)$")
+
+
+class RecordIdGenerator:
+    """Thread-safe generator of monotonic record ids"""
+
+    def __init__(self, node: Optional[str] = None):
+        self._lock = threading.Lock()
+        self._fixed_node = node
+        self._pid = None
+        self._node = ""
+        self._last_time: Optional[datetime] = None
+        self._seq = 0
+
+    def _reset_for_process(self):
+        """(Re)derive the node component, e.g. after fork()"""
+        self._pid = os.getpid()
+        if self._fixed_node:
+            self._node = self._fixed_node
+        else:
+            seed = f"{socket.gethostname()}:{self._pid}:{os.urandom(8).hex()}"
+            self._node = hashlib.sha1(seed.encode('utf-8')).hexdigest()[:6]
+        self._last_time = None
+        self._seq = 0
+
+    def next_id(self, when: Optional[datetime] = None) -> str:
+        """Return a new id for a record written at ``when`` (default: now)"""
+        when = when or datetime.now()
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset_for_process()
+
+            if self._last_time is not None and when <= self._last_time:
+                # Same microsecond or clock went backwards: keep ordering
+                when = self._last_time
+                self._seq += 1
+            else:
+                self._seq = 0
+            self._last_time = when
+
+            return f"{when.strftime(ID_TIME_FORMAT)}-{when.microsecond:06d}-{self._seq:04x}-{self._node}"
+
+
+def parse_record_name(name: str) -> Optional[Tuple[str, int, int, str]]:
+    """Decode (second, microsecond, sequence, node) from an id or filename"""
+    # Date-partitioned names carry a "YYYY/MM/DD/" prefix
+    match = NAME_PATTERN.match(name.rpartition('/')[2])
+    if not match:
+        return None
+    if match.group('micro') is None:
+        # Legacy second-resolution filename sorts before ids of the same second
+        return match.group('second'), 0, -1, ""
+    return (match.group('second'), int(match.group('micro')),
+            int(match.group('seq'), 16), match.group('node'))
+
+
+def record_time(name: str) -> Optional[datetime]:
+    """Timestamp encoded in a record id or filename, without reading it"""
+    parsed = parse_record_name(name)
+    if parsed is None:
+        return None
+    second, micro, _, _ = parsed
+    return datetime.strptime(second, ID_TIME_FORMAT).replace(microsecond=micro)
+
+
+def record_sort_key(name: str) -> Tuple:
+    """Chronological sort key for record names of any backend"""
+    parsed = parse_record_name(name)
+    if parsed is not None:
+        return (0,) + parsed
+    segment = SEGMENT_NAME_PATTERN.match(name)
+    if segment:
+        # Segment records are appended in id order
+        return (1, int(segment.group('segment')), int(segment.group('offset')))
+    return (2, name)
+
+
+# Shared per-process generator
+_generator = RecordIdGenerator()
+
+
+def new_record_id(when: Optional[datetime] = None) -> str:
+    """Generate a record id with the process-wide generator"""
+    return _generator.next_id(when)
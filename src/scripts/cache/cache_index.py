@@ -0,0 +1,552 @@
+#!/usr/bin/env python3
+"""
+Cache Indexes
+
+Persistent secondary indexes over SimpleCacheSystem records:
+
+- ``SessionIndex``: session_id -> record locations and timestamps
+- ``TextIndex``: inverted full-text index with token positions for ranked,
+  phrase and prefix queries
+
+Each index is
+kept as a compact JSON snapshot plus an append-only NDJSON journal that is
+written on every cache write and folded into the snapshot periodically:
+by the process whose append pushes it past the threshold (write-only
+processes estimate its length from its size) or by a reader that finds
+it long on first load.
+Journal appends and compactions hold an exclusive ``flock`` on
+``<name>.lock``; other processes notice both and catch up before the
+next lookup.
+
+Indexes remember a cheap signature of every cache directory (see
+``CacheStorage.signature``). When a directory changes outside the API, the
+next lookup diffs the record listing against the indexed names and only
+parses records that were added.
+
+Author: Claude Code Research System
+Version: 1.0.0
+"""
+
+import bisect
+import json
+import math
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Tuple
+import logging
+
+from cache_locks import atomic_write, file_lock
+from cache_scan import ScanExecutor
+from cache_storage import CacheStorage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COMPACT_THRESHOLD = 5000
+
+
+class RecordIndex:
+    """Base class for journaled indexes keyed by (file_type, record name)"""
+
+    name = "base"
+    version = 1
+
+    def __init__(self, index_dir: Path, storages: Dict[str, CacheStorage],
+                 compact_threshold: int = DEFAULT_COMPACT_THRESHOLD,
+                 scanner: Optional[ScanExecutor] = None):
+        self.index_dir = Path(index_dir)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.storages = storages
+        self.compact_threshold = compact_threshold
+        self.scanner = scanner or ScanExecutor(workers=1)
+
+        self.snapshot_path = self.index_dir / f"{self.name}.json"
+        self.journal_path = self.index_dir / f"{self.name}.journal"
+        self.lock_path = self.index_dir / f"{self.name}.lock"
+
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self.signatures: Dict[str, Any] = {}
+        self._journal_lines = 0
+        # Journal bytes applied so far and the snapshot they apply to, so
+        # appends and compactions by other processes can be picked up
+        self._journal_pos = 0
+        self._snapshot_id: Optional[Tuple[int, int]] = None
+        self._loaded = False
+        # Background writers update indexes while readers query them
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # Subclass hooks
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def extract(cache_data: Dict[str, Any]) -> Any:
+        """Derive the JSON-serializable payload stored for a record
+
+        Must not depend on index state: scans run it in worker processes.
+        """
+        raise NotImplementedError
+
+    def _on_add(self, file_type: str, name: str, payload: Any):
+        """Update derived in-memory structures for a new record"""
+
+    def _on_remove(self, file_type: str, name: str, payload: Any):
+        """Update derived in-memory structures for a removed record"""
+
+    def _clear(self):
+        """Reset derived in-memory structures"""
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _reset(self):
+        self.records = {file_type: {} for file_type in self.storages}
+        self.signatures = {}
+        self._clear()
+
+    def load(self):
+        """Load snapshot and replay the journal, then follow other processes' appends"""
+        with self._lock:
+            if self._loaded:
+                with file_lock(self.lock_path, shared=True):
+                    self._catch_up()
+                return
+            with file_lock(self.lock_path, shared=True):
+                self._load_locked()
+            self._loaded = True
+            if self._journal_lines >= self.compact_threshold:
+                # Left long by write-only processes: spare the next cold reader the replay
+                self.compact()
+
+    def _snapshot_identity(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.snapshot_path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _load_locked(self):
+        """Read the snapshot and the whole journal (caller holds the file lock)"""
+        self._reset()
+        self._snapshot_id = self._snapshot_identity()
+        if self._snapshot_id is not None:
+            try:
+                with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                    snapshot = json.load(f)
+                if snapshot.get("version") == self.version:
+                    self.signatures = snapshot.get("signatures", {})
+                    for file_type, entries in snapshot.get("records", {}).items():
+                        for name, payload in entries.items():
+                            self._add(file_type, name, payload)
+            except Exception as e:
+                logger.warning(f"Discarding unreadable {self.name} index snapshot: {e}")
+                self._reset()
+
+        self._journal_lines = 0
+        self._journal_pos = 0
+        self._read_journal()
+
+    def _read_journal(self):
+        """Apply complete journal lines after the current position"""
+        try:
+            with open(self.journal_path, 'rb') as f:
+                f.seek(self._journal_pos)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        # A line without its newline is still being written by another process
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                self._apply(json.loads(line))
+                self._journal_lines += 1
+            except ValueError:
+                # Torn line from an interrupted writer
+                continue
+        self._journal_pos += end
+
+    def _catch_up(self):
+        """Pick up compactions and journal appends made by other processes"""
+        try:
+            journal_size = self.journal_path.stat().st_size
+        except FileNotFoundError:
+            journal_size = 0
+        if self._snapshot_identity() != self._snapshot_id or journal_size < self._journal_pos:
+            self._load_locked()
+        elif journal_size > self._journal_pos:
+            self._read_journal()
+
+    def _apply(self, op: Dict[str, Any]):
+        file_type = op["t"]
+        if op["op"] == "add":
+            self._add(file_type, op["n"], op["p"])
+            before, after = op.get("sig", (None, None))
+            # Only trust our own write if nothing else changed the directory first
+            if before is not None and self.signatures.get(file_type) == before:
+                self.signatures[file_type] = after
+        elif op["op"] == "del":
+            self._remove(file_type, op["n"])
+        elif op["op"] == "sig":
+            self.signatures[file_type] = op["s"]
+
+    def _add(self, file_type: str, name: str, payload: Any):
+        entries = self.records.setdefault(file_type, {})
+        if name in entries:
+            self._on_remove(file_type, name, entries[name])
+        entries[name] = payload
+        self._on_add(file_type, name, payload)
+
+    def _remove(self, file_type: str, name: str):
+        payload = self.records.get(file_type, {}).pop(name, None)
+        if payload is not None:
+            self._on_remove(file_type, name, payload)
+
+    def _append_journal(self, ops: List[Dict[str, Any]]):
+        if not ops:
+            return
+        data = "".join(json.dumps(op, ensure_ascii=False, separators=(',', ':')) + "\n" for op in ops)
+        with file_lock(self.lock_path):
+            if self._loaded:
+                # Apply what other processes appended first so our position stays in step
+                self._catch_up()
+            with open(self.journal_path, 'a+b') as f:
+                payload = data.encode('utf-8')
+                if f.seek(0, os.SEEK_END):
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        # Terminate a torn line left by a crashed writer
+                        payload = b"\n" + payload
+                f.write(payload)
+                journal_bytes = f.tell()
+                if self._loaded:
+                    self._journal_pos = journal_bytes
+            self._journal_lines += len(ops)
+
+        if self._loaded:
+            journal_lines = self._journal_lines
+        else:
+            # Write-only processes never replay the journal: estimate its
+            # length from its size and the size of these lines
+            journal_lines = journal_bytes * len(ops) // len(payload)
+        if journal_lines >= self.compact_threshold:
+            self.compact()
+
+    def _write_snapshot_locked(self):
+        """Replace the snapshot with the in-memory state and empty the journal"""
+        snapshot = {
+            "version": self.version,
+            "signatures": self.signatures,
+            "records": self.records,
+        }
+        data = json.dumps(snapshot, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        atomic_write(self.snapshot_path, data)
+        with open(self.journal_path, 'wb'):
+            pass
+        self._snapshot_id = self._snapshot_identity()
+        self._journal_pos = 0
+        self._journal_lines = 0
+
+    def compact(self):
+        """Fold the journal into a fresh snapshot"""
+        with self._lock:
+            self.load()
+            with file_lock(self.lock_path):
+                self._catch_up()
+                self._write_snapshot_locked()
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def record_write(self, file_type: str, name: str, cache_data: Dict[str, Any],
+                     sig_before: Any = None, sig_after: Any = None):
+        """Index a record that was just written through the API"""
+        with self._lock:
+            try:
+                payload = self.extract(cache_data)
+                op = {"op": "add", "t": file_type, "n": name, "p": payload, "sig": [sig_before, sig_after]}
+                if self._loaded:
+                    self._apply(op)
+                self._append_journal([op])
+            except Exception as e:
+                logger.error(f"Failed to update {self.name} index for {name}: {e}")
+
+    def _extract_names(self, storage: CacheStorage, names: List[str]):
+        """Yield (name, payload) for the given records via the scan executor"""
+        paths = {storage.root / name: name for name in names}
+        for file_path, payload in self.scanner.map(list(paths), type(self).extract):
+            yield paths[file_path], payload
+
+    def refresh(self) -> Dict[str, int]:
+        """Repair the index if directories changed outside the API"""
+        with self._lock:
+            self.load()
+            changes = {"added": 0, "removed": 0}
+
+            for file_type, storage in self.storages.items():
+                signature = storage.signature()
+                if self.signatures.get(file_type) == signature:
+                    continue
+
+                indexed = self.records.setdefault(file_type, {})
+                current = storage.list_names()
+                current_set = set(current)
+                ops = []
+
+                for name in [n for n in indexed if n not in current_set]:
+                    ops.append({"op": "del", "t": file_type, "n": name})
+                added = [name for name in current if name not in indexed]
+                for name, payload in self._extract_names(storage, added):
+                    ops.append({"op": "add", "t": file_type, "n": name, "p": payload})
+
+                for op in ops:
+                    self._apply(op)
+                    changes["added" if op["op"] == "add" else "removed"] += 1
+                ops.append({"op": "sig", "t": file_type, "s": signature})
+                self._apply(ops[-1])
+                self._append_journal(ops)
+
+            if changes["added"] or changes["removed"]:
+                logger.info(f"Repaired {self.name} index: +{changes['added']} -{changes['removed']}")
+            return changes
+
+    def rebuild(self) -> int:
+        """Rebuild the index from scratch with one scan of every directory"""
+        with self._lock:
+            self._loaded = True
+            self._reset()
+            total = 0
+            for file_type, storage in self.storages.items():
+                signature = storage.signature()
+                names = storage.list_names()
+                if self.scanner.is_parallel(len(names)):
+                    extracted = self._extract_names(storage, names)
+                else:
+                    # Sequential reads are cheapest when scanning in-process
+                    extracted = ((name, self.extract(cache_data))
+                                 for name, cache_data in storage.iter_records())
+                for name, payload in extracted:
+                    self._add(file_type, name, payload)
+                    total += 1
+                self.signatures[file_type] = signature
+            with file_lock(self.lock_path):
+                self._write_snapshot_locked()
+            logger.info(f"Rebuilt {self.name} index with {total} records")
+            return total
+
+    def discard(self, file_type: str, name: str):
+        """Drop a record that was found to be missing"""
+        with self._lock:
+            if self._loaded:
+                self._remove(file_type, name)
+            self._append_journal([{"op": "del", "t": file_type, "n": name}])
+
+
+class SessionIndex(RecordIndex):
+    """session_id -> record locations plus timestamps"""
+
+    name = "sessions"
+
+    def __init__(self, index_dir: Path, storages: Dict[str, CacheStorage], **kwargs):
+        self.sessions: Dict[str, Dict[Tuple[str, str], str]] = {}
+        super().__init__(index_dir, storages, **kwargs)
+
+    @staticmethod
+    def extract(cache_data: Dict[str, Any]) -> List[Optional[str]]:
+        content = cache_data.get('content')
+        session_id = content.get('session_id') if isinstance(content, dict) else None
+        return [session_id, cache_data.get('timestamp')]
+
+    def _on_add(self, file_type: str, name: str, payload: Any):
+        session_id, timestamp = payload
+        if session_id is not None:
+            self.sessions.setdefault(session_id, {})[(file_type, name)] = timestamp
+
+    def _on_remove(self, file_type: str, name: str, payload: Any):
+        session_id = payload[0]
+        entries = self.sessions.get(session_id)
+        if entries is not None:
+            entries.pop((file_type, name), None)
+            if not entries:
+                del self.sessions[session_id]
+
+    def _clear(self):
+        self.sessions = {}
+
+    def lookup(self, session_id: str) -> List[Dict[str, str]]:
+        """Return record locations for a session ordered by timestamp"""
+        with self._lock:
+            self.refresh()
+            entries = self.sessions.get(session_id, {})
+            locations = [
+                {'file_type': file_type, 'name': name, 'timestamp': timestamp}
+                for (file_type, name), timestamp in entries.items()
+            ]
+            locations.sort(key=lambda x: x['timestamp'] or "")
+            return locations
+
+
+TOKEN_PATTERN = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]|[^\W_]+")
+QUERY_PATTERN = re.compile(r'"([^"]+)"|(\S+)')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens; CJK text is split into single characters"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def _collect_text(value: Any, parts: List[str]):
+    """Gather searchable text from nested record content"""
+    if isinstance(value, dict):
+        for item in value.values():
+            _collect_text(item, parts)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _collect_text(item, parts)
+    elif value is not None:
+        parts.append(str(value))
+
+
+class TextIndex(RecordIndex):
+    """Inverted index: term -> postings with record ids and token positions"""
+
+    name = "fulltext"
+
+    # BM25 parameters
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, index_dir: Path, storages: Dict[str, CacheStorage], **kwargs):
+        self.postings: Dict[str, Dict[Tuple[str, str], List[int]]] = {}
+        self.doc_lengths: Dict[Tuple[str, str], int] = {}
+        self._total_length = 0
+        self._vocabulary: Optional[List[str]] = None
+        super().__init__(index_dir, storages, **kwargs)
+
+    @staticmethod
+    def extract(cache_data: Dict[str, Any]) -> Dict[str, Any]:
+        parts: List[str] = []
+        _collect_text(cache_data.get('content'), parts)
+        terms: Dict[str, List[int]] = {}
+        tokens = tokenize("\n".join(parts))
+        for position, token in enumerate(tokens):
+            terms.setdefault(token, []).append(position)
+        return {"ts": cache_data.get('timestamp'), "len": len(tokens), "terms": terms}
+
+    def _on_add(self, file_type: str, name: str, payload: Any):
+        doc = (file_type, name)
+        for term, positions in payload["terms"].items():
+            if term not in self.postings:
+                self._vocabulary = None
+            self.postings.setdefault(term, {})[doc] = positions
+        self.doc_lengths[doc] = payload["len"]
+        self._total_length += payload["len"]
+
+    def _on_remove(self, file_type: str, name: str, payload: Any):
+        doc = (file_type, name)
+        for term in payload["terms"]:
+            docs = self.postings.get(term)
+            if docs is None:
+                continue
+            docs.pop(doc, None)
+            if not docs:
+                del self.postings[term]
+                self._vocabulary = None
+        self._total_length -= self.doc_lengths.pop(doc, 0)
+
+    def _clear(self):
+        self.postings = {}
+        self.doc_lengths = {}
+        self._total_length = 0
+        self._vocabulary = None
+
+    # ------------------------------------------------------------------
+    # Querying
+    # ------------------------------------------------------------------
+
+    def _prefix_terms(self, prefix: str) -> List[str]:
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        terms = []
+        for term in self._vocabulary[start:]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def _term_matches(self, term: str) -> Dict[Tuple[str, str], int]:
+        """Term frequency per document for a plain or prefix (``term*``) term"""
+        if term.endswith('*') and len(term) > 1:
+            matches: Dict[Tuple[str, str], int] = {}
+            for expanded in self._prefix_terms(term[:-1]):
+                for doc, positions in self.postings[expanded].items():
+                    matches[doc] = matches.get(doc, 0) + len(positions)
+            return matches
+        return {doc: len(positions) for doc, positions in self.postings.get(term, {}).items()}
+
+    def _phrase_matches(self, terms: List[str]) -> Dict[Tuple[str, str], int]:
+        """Occurrences per document of consecutive terms"""
+        postings = [self.postings.get(term) for term in terms]
+        if not all(postings):
+            return {}
+
+        matches = {}
+        candidates = set.intersection(*(set(docs) for docs in postings))
+        for doc in candidates:
+            following = [set(docs[doc]) for docs in postings[1:]]
+            count = sum(
+                1 for start in postings[0][doc]
+                if all(start + offset + 1 in positions for offset, positions in enumerate(following))
+            )
+            if count:
+                matches[doc] = count
+        return matches
+
+    def _bm25(self, tf: int, df: int, doc: Tuple[str, str]) -> float:
+        total_docs = len(self.doc_lengths)
+        avg_length = self._total_length / max(total_docs, 1)
+        idf = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+        length_norm = 1 - self.b + self.b * self.doc_lengths.get(doc, 0) / max(avg_length, 1)
+        return idf * tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+
+    def search(self, query: str, cache_type: str = "all") -> List[Dict[str, Any]]:
+        """Ranked AND search supporting "quoted phrases" and prefix* terms"""
+        with self._lock:
+            self.refresh()
+
+            clauses = []
+            for phrase, word in QUERY_PATTERN.findall(query):
+                prefix = word.endswith('*')
+                tokens = tokenize(phrase or word)
+                if not tokens:
+                    continue
+                if prefix and len(tokens) == 1:
+                    clauses.append(self._term_matches(tokens[0] + '*'))
+                elif len(tokens) == 1:
+                    clauses.append(self._term_matches(tokens[0]))
+                else:
+                    # Quoted text, CJK runs and hyphenated words match as phrases
+                    clauses.append(self._phrase_matches(tokens))
+
+            if not clauses:
+                return []
+
+            docs = set.intersection(*(set(clause) for clause in clauses))
+            if cache_type != "all":
+                docs = {doc for doc in docs if doc[0] == cache_type}
+
+            hits = []
+            for doc in docs:
+                score = sum(self._bm25(clause[doc], len(clause), doc) for clause in clauses)
+                hits.append({
+                    'file_type': doc[0],
+                    'name': doc[1],
+                    'timestamp': self.records[doc[0]][doc[1]]["ts"],
+                    'score': round(score, 4)
+                })
+
+            hits.sort(key=lambda x: (x['score'], x['timestamp'] or ""), reverse=True)
+            return hits
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Cache Cross-Process Coordination
+
+Several Claude sessions can share one cache directory, so every writer
+goes through these helpers:
+
+- ``atomic_write``: write to a per-process temporary file in the same
+  directory, then ``os.replace`` it into place, so readers only ever see
+  complete files
+- ``file_lock``: advisory ``flock`` on a lock file, shared for readers
+  and exclusive for writers of shared state (index journals, segments)
+
+Locks are advisory and only coordinate processes using this module.
+Without ``fcntl`` (Windows) ``file_lock`` degrades to a no-op and only
+the atomic renames protect readers.
+
+Author: Claude Code Research System
+Version: 1.0.0
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+TEMP_SUFFIX = ".tmp"
+STALE_TEMP_SECONDS = 3600
+
+
+def temp_path_for(path: Path) -> Path:
+    """Hidden, per-process temporary name next to path"""
+    path = Path(path)
+    return path.with_name(f".{path.name}.{os.getpid()}.{os.urandom(4).hex()}{TEMP_SUFFIX}")
+
+
+def atomic_write(path: Path, data: bytes, fsync: bool = False):
+    """Replace path with data so that readers see the old or the new file, never a mix"""
+    tmp_path = temp_path_for(path)
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def remove_stale_temp_files(directory: Path, max_age: float = STALE_TEMP_SECONDS) -> int:
+    """Delete temporary files left behind by crashed writers"""
+    removed = 0
+    cutoff = time.time() - max_age
+    for entry in os.scandir(directory):
+        if entry.name.startswith(".") and entry.name.endswith(TEMP_SUFFIX):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+    return removed
+
+
+@contextmanager
+def file_lock(path: Path, shared: bool = False) -> Iterator[None]:
+    """Hold an advisory lock on path (created if missing) for the block"""
+    if fcntl is None:
+        yield
+        return
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        yield
+    finally:
+        # Closing the descriptor releases the lock
+        os.close(fd)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Cache Record LRU
+
+Bounded in-process cache of parsed records for
+``SimpleCacheSystem.read_cache_file``. A single viewer or dashboard run
+reads the same records from several places; this keeps the parsed
+records so each is decoded once.
+
+- record files are keyed on path, ``st_mtime_ns`` and ``st_size``, so a
+  record rewritten or removed on disk is never served stale: the next
+  read stats the file and misses
+- segment records (``NNNNNN.seg#offset``) are keyed on path, offset and
+  inode: frames are immutable, so appends to the active segment leave its
+  cached records valid, while a removed segment still misses
+- capacity is weighted by the uncompressed record size in bytes and set
+  with ``CACHE_READ_CACHE_MB`` (0 disables the cache)
+- hits, misses and evictions are counted for ``get_stats``
+
+Cached records are shared between callers: ``get`` returns a shallow copy,
+nested values must be treated as read-only.
+
+Author: Claude Code Research System
+Version: 1.0.0
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+import logging
+
+from cache_compression import COMPRESSED_HEADER_SIZE, compressed_raw_length
+from cache_storage import load_record, read_payload, split_locator
+
+logger = logging.getLogger(__name__)
+
+CAPACITY_ENV_VAR = "CACHE_READ_CACHE_MB"
+DEFAULT_CAPACITY_MB = 64
+
+
+def default_capacity() -> int:
+    """Capacity in bytes from CACHE_READ_CACHE_MB"""
+    try:
+        return max(int(float(os.environ[CAPACITY_ENV_VAR]) * 1024 * 1024), 0)
+    except (KeyError, ValueError):
+        return DEFAULT_CAPACITY_MB * 1024 * 1024
+
+
+class RecordCache:
+    """Byte-weighted LRU of parsed records"""
+
+    def __init__(self, capacity_bytes: Optional[int] = None):
+        self.capacity_bytes = default_capacity() if capacity_bytes is None else capacity_bytes
+        self._entries: "OrderedDict[Tuple, Tuple[Dict[str, Any], int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(file_path) -> Tuple:
+        path, offset = split_locator(file_path)
+        stat = os.stat(path)
+        if offset is not None:
+            return str(path), offset, stat.st_ino
+        return str(path), offset, stat.st_mtime_ns, stat.st_size
+
+    def read(self, file_path) -> Dict[str, Any]:
+        """Parsed record at file_path, from memory when unchanged on disk"""
+        if self.capacity_bytes <= 0:
+            payload, directory = read_payload(file_path)
+            return load_record(payload, directory)
+
+        key = self._key(file_path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry[0])
+            self.misses += 1
+
+        payload, directory = read_payload(file_path)
+        cache_data = load_record(payload, directory)
+        weight = compressed_raw_length(payload[:COMPRESSED_HEADER_SIZE]) or len(payload)
+        self._put(key, cache_data, weight)
+        return dict(cache_data)
+
+    def _put(self, key: Tuple, cache_data: Dict[str, Any], weight: int):
+        if weight > self.capacity_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+            self._entries[key] = (cache_data, weight)
+            self.bytes += weight
+            while self.bytes > self.capacity_bytes:
+                _, (_, evicted_weight) = self._entries.popitem(last=False)
+                self.bytes -= evicted_weight
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "capacity_bytes": self.capacity_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Cache Metrics Engine
+
+Keeps the CacheDashboard aggregates (per-type counts and sizes, top
+agents/tools/domains/query terms, all per hour) in the columnar rollup
+store ``index/activity.cols``. ``SimpleCacheSystem.write_records`` appends
+the rows of every record it writes, so the dashboard normally reads no
+records at all: hourly, daily and weekday counts and any ``--days``
+window are aggregations over the stored columns.
+
+Retention sweeps cancel the rows of the records they remove
+(``removed_rows``), so the store stays in step without a rescan. It is
+rebuilt with one parallel scan only when its per-type record counts
+disagree with the storages: on first use, after a restore, or after
+records were written or removed around the cache API.
+
+Author: Claude Code Research System
+Version: 1.0.0
+"""
+
+from collections import Counter
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional
+import logging
+
+from cache_ids import record_time
+from cache_rollups import Row, RollupStore, RollupTable, add_rows, merge_cells, rollup_row
+from cache_storage import record_size
+
+logger = logging.getLogger(__name__)
+
+CONTENT_COUNTERS = ['thinking_topics', 'agent_types', 'research_domains', 'tool_usage', 'common_queries']
+# Dimension counting records per cache type; totals are record sizes in bytes
+RECORDS_DIM = "records"
+ROLLUP_NAME = "activity"
+
+
+def activity_store(index_path: Path) -> RollupStore:
+    """Rollup store of a cache directory"""
+    return RollupStore(index_path, ROLLUP_NAME)
+
+
+def record_rows(file_type: str, cache_data: Dict[str, Any], size: int,
+                when: Optional[datetime] = None) -> List[Row]:
+    """Rollup rows of one record"""
+    try:
+        when = datetime.fromisoformat(cache_data.get('timestamp', ''))
+    except (TypeError, ValueError):
+        if when is None:
+            return []
+
+    rows = [rollup_row(when, RECORDS_DIM, file_type, 1, size)]
+    content = cache_data.get('content')
+    if not isinstance(content, dict):
+        return rows
+
+    if file_type == 'thinking':
+        if isinstance(content.get('user_query'), str):
+            # Extract key words
+            words = [w for w in content['user_query'].lower().split() if len(w) > 3][:3]
+            rows += [rollup_row(when, 'common_queries', word) for word in words]
+        if isinstance(content.get('tools_used'), list):
+            rows += [rollup_row(when, 'tool_usage', tool.get('name', 'Unknown') if isinstance(tool, dict) else tool)
+                     for tool in content['tools_used']]
+    elif file_type == 'agent':
+        if 'agent_name' in content:
+            rows.append(rollup_row(when, 'agent_types', content['agent_name']))
+    elif file_type == 'research':
+        if 'domain' in content:
+            rows.append(rollup_row(when, 'research_domains', content['domain']))
+    return rows
+
+
+def fold_record(file_type: str, cells: Dict, file_path, cache_data: Dict[str, Any]) -> Dict:
+    """Scan fold: add the rollup rows of one record (runs in scan workers)"""
+    return add_rows(cells, record_rows(file_type, cache_data, record_size(file_path),
+                                       when=record_time(Path(file_path).name)))
+
+
+def removed_rows(cache, file_type: str, names: List[str]) -> List[Row]:
+    """Rows cancelling the rollups of records about to be removed (read by the scan executor)"""
+    storage = cache.storages[file_type]
+    cells = cache.scanner.reduce([storage.root / name for name in names],
+                                 partial(fold_record, file_type), merge_cells, dict)
+    return [(bucket, dim, key, -count, -total) for (bucket, dim, key), (count, total) in cells.items()]
+
+
+def top_counts(counter: Dict[str, int], limit: int = 10) -> Dict[str, int]:
+    """Most common entries of a stored counter"""
+    return dict(Counter(counter).most_common(limit))
+
+
+class MetricsEngine:
+    """Dashboard rollups backed by the columnar rollup store"""
+
+    def __init__(self, cache, store: Optional[RollupStore] = None):
+        self.cache = cache
+        self.store = store or getattr(cache, "rollups", None) or activity_store(cache.index_path)
+
+    def _scan_rows(self) -> Iterator[Row]:
+        for file_type, storage in self.cache.storages.items():
+            cells = self.cache.scanner.reduce(
+                [storage.root / name for name in storage.list_names()],
+                partial(fold_record, file_type), merge_cells, dict
+            )
+            for (bucket, dim, key), (count, total) in cells.items():
+                yield bucket, dim, key, count, total
+
+    def update(self, rebuild: bool = False, counts: Optional[Dict[str, int]] = None) -> int:
+        """Make sure the store covers every record, return how many were read"""
+        if counts is None:
+            counts = {file_type: len(storage.list_names()) for file_type, storage in self.cache.storages.items()}
+        if not rebuild:
+            stored = self.store.table().counts(RECORDS_DIM)
+            if all(stored.get(file_type, 0) == count for file_type, count in counts.items()):
+                return 0
+            logger.info("Dashboard rollups do not match the cache records, rebuilding")
+
+        self.store.replace(self._scan_rows())
+        return sum(counts.values())
+
+    def table(self) -> RollupTable:
+        """Current rollup snapshot"""
+        return self.store.table()
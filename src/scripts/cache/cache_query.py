@@ -9,24 +9,43 @@ Version: 2.0.0 (Simplified)
 
 import json
 import argparse
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 import sys
 
 # Add cache system to path
 sys.path.append(str(Path(__file__).parent))
-from cache import get_simple_cache_system
+from cache_retention import EVICTION_POLICIES, RetentionPolicy
+from cache_server import connect_cache_system
 
-def search_cache(query: str, cache_type: str = "all", limit: int = 10):
+# Set from the command line in main()
+_options = {"workers": None, "use_server": None}
+
+def query_cache():
+    """The daemon's warm cache via its query server if running, else the local cache"""
+    return connect_cache_system(workers=_options["workers"], use_server=_options["use_server"])
+
+def local_cache():
+    """The local cache, for commands that modify cache files"""
+    from cache import get_simple_cache_system
+    return get_simple_cache_system(workers=_options["workers"])
+
+def search_cache(query: str, cache_type: str = "all", limit: int = 10,
+                 rebuild_index: bool = False, scan: bool = False,
+                 since: datetime = None, until: datetime = None):
     """Search cache content"""
-    cache = get_simple_cache_system()
-    results = cache.search_content(query, cache_type)
+    cache = query_cache()
+    if rebuild_index:
+        count = cache.rebuild_indexes(["fulltext"])["fulltext"]
+        print(f"🗂️  Full-text index rebuilt ({count} records)")
+    results = cache.search_content(query, cache_type, use_index=not scan, since=since, until=until)
     
     print(f"\n🔍 Search Results for '{query}' ({len(results)} found)")
     print("=" * 60)
     
     for i, result in enumerate(results[:limit]):
-        print(f"\n{i+1}. [{result['type'].upper()}] {result['timestamp']}")
+        score = f" (score {result['score']})" if 'score' in result else ""
+        print(f"\n{i+1}. [{result['type'].upper()}] {result['timestamp']}{score}")
         print(f"   File: {Path(result['file']).name}")
         print(f"   Preview: {result['preview']}")
         print("-" * 60)
@@ -36,7 +55,7 @@ def search_cache(query: str, cache_type: str = "all", limit: int = 10):
 
 def list_files(cache_type: str = "all"):
     """List cache files"""
-    cache = get_simple_cache_system()
+    cache = query_cache()
     files = cache.list_cache_files(cache_type)
     
     print(f"\n📁 Cache Files ({cache_type})")
@@ -52,28 +71,47 @@ def list_files(cache_type: str = "all"):
 
 def show_stats():
     """Show cache statistics"""
-    cache = get_simple_cache_system()
+    cache = query_cache()
     stats = cache.get_stats()
     
     print(f"\n📊 Cache Statistics")
     print("=" * 60)
     print(f"Base Path: {stats['base_path']}")
+    print(f"Storage Backend: {stats['storage_backend']}")
+    print(f"Record Codec: {stats['codec']}")
     print(f"Last Updated: {stats['timestamp']}")
+    if getattr(cache, "remote", False):
+        print(f"Served By: query server ({cache.client.socket_path})")
     print(f"Total Files: {stats['total_files']}")
     print("\nBy Type:")
     for cache_type, count in stats['counts'].items():
         print(f"  • {cache_type.capitalize()}: {count} files")
+    
+    compression = stats['compression']
+    print(f"\nCompression: {compression['algorithm'] or 'off'} "
+          f"(threshold {compression['threshold']:,} bytes)")
+    for cache_type in stats['counts']:
+        type_stats = compression[cache_type]
+        print(f"  • {cache_type.capitalize()}: {type_stats['compressed']}/{type_stats['records']} compressed, "
+              f"{type_stats['stored_bytes'] / 1024:.1f} KB stored / {type_stats['raw_bytes'] / 1024:.1f} KB raw "
+              f"(ratio {type_stats['ratio']}x)")
+    
+    read_cache = stats['read_cache']
+    print(f"\nRead Cache: {read_cache['entries']} records, {read_cache['bytes'] / 1024:.1f} KB "
+          f"of {read_cache['capacity_bytes'] / (1024 * 1024):.0f} MB")
+    print(f"  • Hits: {read_cache['hits']}  Misses: {read_cache['misses']}  "
+          f"Evictions: {read_cache['evictions']}  Hit rate: {read_cache['hit_rate']:.1%}")
 
 def view_file(filename: str):
     """View specific cache file"""
-    cache = get_simple_cache_system()
+    cache = query_cache()
     
     # Try to find the file in any cache directory
     for cache_type in ["thinking", "research", "agent"]:
         cache_path = getattr(cache, f"{cache_type}_path")
         file_path = cache_path / filename
         
-        if file_path.exists():
+        if file_path.exists() or '#' in filename:
             cache_data = cache.read_cache_file(file_path)
             if cache_data:
                 print(f"\n📄 Cache File: {filename}")
@@ -86,26 +124,85 @@ def view_file(filename: str):
     
     print(f"❌ File not found: {filename}")
 
-def cleanup_old_files(days: int = 30):
+def cleanup_old_files(days: int = 30, ttl: list = None, max_size_mb: float = None,
+                      eviction: str = "oldest", dry_run: bool = False):
     """Clean up old cache files"""
-    cache = get_simple_cache_system()
-    deleted = cache.cleanup_old_files(days)
+    cache = local_cache()
+    policy = RetentionPolicy(
+        default_ttl_days=days,
+        ttl_days={file_type: float(value) for file_type, value in (item.split("=", 1) for item in ttl or [])},
+        max_bytes=int(max_size_mb * 1024 * 1024) if max_size_mb else None,
+        eviction=eviction
+    )
+    report = cache.apply_retention(policy, dry_run=dry_run)
+    deleted = report["deleted"]
     
-    print(f"\n🧹 Cleanup Results (older than {days} days)")
+    title = "Cleanup Plan (dry run)" if dry_run else "Cleanup Results"
+    print(f"\n🧹 {title} (older than {days} days)")
     print("=" * 60)
     total_deleted = sum(deleted.values())
+    verb = "would be deleted" if dry_run else "deleted"
     
     if total_deleted > 0:
+        if dry_run:
+            for unit in report["units"]:
+                print(f"  - [{unit['reason']}] {unit['file_type']}/{unit['unit']} ({unit['size']:,} bytes)")
+            print()
         for cache_type, count in deleted.items():
             if count > 0:
-                print(f"  • {cache_type.capitalize()}: {count} files deleted")
-        print(f"\nTotal: {total_deleted} files cleaned up")
+                print(f"  • {cache_type.capitalize()}: {count} files {verb}")
+        print(f"\nTotal: {total_deleted} files ({report['freed_bytes']:,} bytes), "
+              f"{report['by_reason']['ttl']} expired, {report['by_reason']['quota']} over quota")
     else:
         print("No old files found to clean up")
 
+def migrate_storage(target: str, keep_source: bool = False):
+    """Convert the cache to another storage backend"""
+    cache = local_cache()
+    source = cache.storage_backend
+    migrated = cache.migrate_storage(target, remove_source=not keep_source)
+    
+    print(f"\n🚚 Storage Migration ({source} → {target})")
+    print("=" * 60)
+    for cache_type, count in migrated.items():
+        print(f"  • {cache_type.capitalize()}: {count} records migrated")
+    print(f"\nTotal: {sum(migrated.values())} records")
+    if keep_source:
+        print("Source files kept in place")
+
+def train_dictionary(cache_type: str = "all", sample: int = 500, size_kb: int = 32):
+    """Train shared compression dictionaries from existing records"""
+    cache = local_cache()
+    trained = cache.train_compression_dictionary(cache_type, sample, size_kb * 1024)
+    
+    print(f"\n🗜️  Compression Dictionaries")
+    print("=" * 60)
+    if not trained:
+        print("No records to sample")
+        return
+    for file_type, info in trained.items():
+        print(f"  • {file_type.capitalize()}: {info['dictionary']} "
+              f"({info['bytes']:,} bytes from {info['samples']} records)")
+    if not cache.compression:
+        print("\nCompression is off; set CACHE_COMPRESSION=zlib to use these dictionaries")
+
+def rebuild_indexes():
+    """Rebuild cache indexes from scratch"""
+    cache = query_cache()
+    counts = cache.rebuild_indexes()
+    
+    print(f"\n🗂️  Index Rebuild")
+    print("=" * 60)
+    for index_name, count in counts.items():
+        print(f"  • {index_name.capitalize()}: {count} records indexed")
+
 def main():
     """Main CLI interface"""
     parser = argparse.ArgumentParser(description="Simple Cache Query Tool")
+    parser.add_argument("--workers", type=int,
+                       help="Worker processes for full scans (default: CPU count, 1 = serial)")
+    parser.add_argument("--no-server", action="store_true",
+                       help="Read cache files directly even if the query server is running")
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
     
     # Search command
@@ -114,6 +211,16 @@ def main():
     search_parser.add_argument("--type", choices=["all", "thinking", "research", "agent"], 
                               default="all", help="Cache type to search")
     search_parser.add_argument("--limit", type=int, default=10, help="Maximum results")
+    search_parser.add_argument("--rebuild-index", action="store_true",
+                              help="Rebuild the full-text index before searching")
+    search_parser.add_argument("--scan", action="store_true",
+                              help="Plain substring scan instead of the index")
+    search_parser.add_argument("--since", type=datetime.fromisoformat,
+                              help="Only records at or after this ISO date/time")
+    search_parser.add_argument("--until", type=datetime.fromisoformat,
+                              help="Only records before this ISO date/time")
+    search_parser.add_argument("--days", type=int,
+                              help="Only records from the last N days (shorthand for --since)")
     
     # List command
     list_parser = subparsers.add_parser("list", help="List cache files")
@@ -131,6 +238,34 @@ def main():
     cleanup_parser = subparsers.add_parser("cleanup", help="Clean up old cache files")
     cleanup_parser.add_argument("--days", type=int, default=30, 
                                help="Delete files older than N days (default: 30)")
+    cleanup_parser.add_argument("--ttl", action="append", metavar="TYPE=DAYS",
+                               help="Per-type TTL overriding --days, e.g. agent=7 (repeatable)")
+    cleanup_parser.add_argument("--max-size", type=float, metavar="MB",
+                               help="Evict records until the cache fits in this size")
+    cleanup_parser.add_argument("--evict", choices=list(EVICTION_POLICIES), default="oldest",
+                               help="Eviction order for --max-size (default: oldest)")
+    cleanup_parser.add_argument("--dry-run", action="store_true",
+                               help="Only report what would be deleted")
+    
+    # Migrate command
+    migrate_parser = subparsers.add_parser("migrate", help="Convert cache to another storage backend")
+    migrate_parser.add_argument("--to", choices=["segments", "files", "partitioned"], default="segments",
+                               help="Target storage backend (default: segments)")
+    migrate_parser.add_argument("--keep-source", action="store_true",
+                               help="Keep the original records after migration")
+    
+    # Reindex command
+    subparsers.add_parser("reindex", help="Rebuild cache indexes")
+    
+    # Train dictionary command
+    train_parser = subparsers.add_parser("train-dictionary",
+                                         help="Train shared compression dictionaries from existing records")
+    train_parser.add_argument("--type", choices=["all", "thinking", "research", "agent"],
+                             default="all", help="Cache type to train")
+    train_parser.add_argument("--sample", type=int, default=500,
+                             help="Records sampled per cache type (default: 500)")
+    train_parser.add_argument("--size", type=int, default=32,
+                             help="Dictionary size in KB (default: 32)")
     
     args = parser.parse_args()
     
@@ -138,9 +273,15 @@ def main():
         parser.print_help()
         return
     
+    _options["workers"] = args.workers
+    if args.no_server:
+        _options["use_server"] = False
+    
     try:
         if args.command == "search":
-            search_cache(args.query, args.type, args.limit)
+            since = datetime.now() - timedelta(days=args.days) if args.days else args.since
+            search_cache(args.query, args.type, args.limit, args.rebuild_index, args.scan,
+                         since, args.until)
         elif args.command == "list":
             list_files(args.type)
         elif args.command == "stats":
@@ -148,7 +289,13 @@ def main():
         elif args.command == "view":
             view_file(args.filename)
         elif args.command == "cleanup":
-            cleanup_old_files(args.days)
+            cleanup_old_files(args.days, args.ttl, args.max_size, args.evict, args.dry_run)
+        elif args.command == "migrate":
+            migrate_storage(args.to, args.keep_source)
+        elif args.command == "reindex":
+            rebuild_indexes()
+        elif args.command == "train-dictionary":
+            train_dictionary(args.type, args.sample, args.size)
     except Exception as e:
         print(f"❌ Error: {e}")
         sys.exit(1)
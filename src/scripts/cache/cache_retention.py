@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Cache Retention
+
+Expiry and size quotas for SimpleCacheSystem, decided purely from record
+names, segment footers and ``stat()`` metadata (see
+``CacheStorage.retention_units``) so planning never parses record bodies.
+Only the records of units being removed are read, to cancel their rows in
+the dashboard rollups, which then stay in step without a rescan.
+
+- per-type TTLs with a default for types without one
+- an optional total size quota; when exceeded, units are evicted
+  oldest-first or least-recently-accessed first (``st_atime``)
+- dry-run plans that report what would be removed
+
+With the segment backend the unit of deletion is a sealed segment, so
+records expire together with the newest record of their segment.
+
+Author: Claude Code Research System
+Version: 1.0.0
+"""
+
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+import logging
+
+from cache_metrics import removed_rows
+
+logger = logging.getLogger(__name__)
+
+EVICTION_POLICIES = ("oldest", "lru")
+
+
+@dataclass
+class RetentionPolicy:
+    """TTL and quota settings for a retention sweep"""
+    default_ttl_days: Optional[float] = 30
+    ttl_days: Dict[str, float] = field(default_factory=dict)
+    max_bytes: Optional[int] = None
+    eviction: str = "oldest"
+
+    def __post_init__(self):
+        if self.eviction not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy: {self.eviction} "
+                             f"(available: {', '.join(EVICTION_POLICIES)})")
+
+    def ttl_for(self, file_type: str) -> Optional[float]:
+        return self.ttl_days.get(file_type, self.default_ttl_days)
+
+    @classmethod
+    def from_env(cls) -> "RetentionPolicy":
+        """Policy from CACHE_RETENTION_* variables and MAX_CACHE_SIZE_MB"""
+        def number(name: str) -> Optional[float]:
+            value = os.getenv(name, "").strip()
+            return float(value) if value else None
+
+        ttl_days = {}
+        for file_type in ["thinking", "research", "agent"]:
+            value = number(f"CACHE_RETENTION_TTL_{file_type.upper()}")
+            if value is not None:
+                ttl_days[file_type] = value
+
+        default_ttl = number("CACHE_RETENTION_TTL_DAYS")
+        max_size_mb = number("MAX_CACHE_SIZE_MB")
+        return cls(
+            default_ttl_days=default_ttl if default_ttl is not None else 30,
+            ttl_days=ttl_days,
+            max_bytes=int(max_size_mb * 1024 * 1024) if max_size_mb else None,
+            eviction=os.getenv("CACHE_RETENTION_EVICTION", "oldest")
+        )
+
+
+class RetentionManager:
+    """Plan and apply retention sweeps over every cache directory"""
+
+    def __init__(self, cache, policy: Optional[RetentionPolicy] = None):
+        self.cache = cache
+        self.policy = policy or RetentionPolicy()
+
+    def plan(self, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Units to remove, each tagged with file_type and reason"""
+        now = now or datetime.now()
+        removals = []
+        kept = []
+
+        for file_type, storage in self.cache.storages.items():
+            ttl = self.policy.ttl_for(file_type)
+            cutoff = now - timedelta(days=ttl) if ttl is not None else None
+            for unit in storage.retention_units():
+                unit = {**unit, "file_type": file_type}
+                if cutoff is not None and unit["time"] < cutoff:
+                    removals.append({**unit, "reason": "ttl"})
+                else:
+                    kept.append(unit)
+
+        if self.policy.max_bytes is not None:
+            total = sum(unit["size"] for unit in kept)
+            if total > self.policy.max_bytes:
+                if self.policy.eviction == "lru":
+                    kept.sort(key=lambda unit: unit["accessed"])
+                else:
+                    kept.sort(key=lambda unit: unit["time"])
+                for unit in kept:
+                    if total <= self.policy.max_bytes:
+                        break
+                    removals.append({**unit, "reason": "quota"})
+                    total -= unit["size"]
+
+        return removals
+
+    def apply(self, dry_run: bool = False, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Run a sweep and report what was (or would be) removed"""
+        removals = self.plan(now)
+        report = {
+            "dry_run": dry_run,
+            "deleted": {file_type: 0 for file_type in self.cache.storages},
+            "freed_bytes": 0,
+            "by_reason": {"ttl": 0, "quota": 0},
+            "units": removals
+        }
+
+        rollups = getattr(self.cache, "rollups", None)
+        cancelled = []
+        for unit in removals:
+            if dry_run:
+                removed = unit["records"]
+            else:
+                storage = self.cache.storages[unit["file_type"]]
+                names = storage.unit_names(unit["unit"]) if rollups is not None else []
+                rows = removed_rows(self.cache, unit["file_type"], names) if names else []
+                removed = storage.remove_unit(unit["unit"])
+                if not removed:
+                    continue
+                if removed == len(names):
+                    cancelled += rows
+            report["deleted"][unit["file_type"]] += removed
+            report["by_reason"][unit["reason"]] += removed
+            report["freed_bytes"] += unit["size"]
+
+        if not dry_run and any(report["deleted"].values()):
+            for index in self.cache.indexes.values():
+                index.refresh()
+            if cancelled:
+                # Otherwise the counts disagree and the dashboard rebuilds them
+                rollups.append(cancelled)
+            logger.info(f"Retention sweep removed {sum(report['deleted'].values())} records "
+                        f"({report['freed_bytes']:,} bytes)")
+        return report
@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""
+Columnar Rollup Store
+
+Pre-aggregated counters for the cache dashboard and the log analyzer,
+kept as typed columns instead of being recomputed from raw records. One
+row per (hour bucket, dimension, key):
+
+    bucket  hours since 1970-01-01 (naive local time), array 'q'
+    dim     dimension code ("records", "tool_usage", "keywords", ...), array 'H'
+    key     key code within the dimension, array 'I'
+    count   number of events, array 'd'
+    total   summed measure (bytes, seconds), array 'd'
+
+Writers append rows to a small NDJSON journal at write time (one append
+under an flock). When the journal grows past ``compact_bytes`` it is
+folded into ``<name>.cols``: rows merged per (bucket, dim, key), sorted by
+bucket and stored as contiguous column blobs behind a JSON header with
+the dimension/key dictionaries. Removals are recorded as rows with
+negative counts; cells they cancel out are dropped at compaction.
+
+Queries bisect the bucket column for the time range and group the slice
+by key, hour, weekday or day. With numpy installed the grouping is a
+``bincount`` over the column views; otherwise the stdlib path loops over
+the compacted cells, whose number follows hours x keys rather than the
+number of records.
+
+Author: Claude Code Research System
+Version: 1.0.0
+"""
+
+import json
+import os
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+import logging
+
+from cache_locks import atomic_write, file_lock
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_MAGIC = b"CCROLL1\n"
+ROLLUP_HEADER = struct.Struct(">I")
+DEFAULT_COMPACT_BYTES = 256 * 1024
+EPOCH = datetime(1970, 1, 1)
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+# 1970-01-01 was a Thursday
+EPOCH_WEEKDAY = 3
+
+# (typecode, column) in file order
+COLUMNS = [('q', 'bucket'), ('H', 'dim'), ('I', 'key'), ('d', 'count'), ('d', 'total')]
+NUMPY_TYPES = {'q': 'int64', 'H': 'uint16', 'I': 'uint32', 'd': 'float64'}
+
+Row = Tuple[int, str, str, float, float]
+
+
+def hour_bucket(when: datetime) -> int:
+    """Hour bucket of a timestamp"""
+    if when.tzinfo is not None:
+        when = when.replace(tzinfo=None)
+    delta = when - EPOCH
+    return delta.days * 24 + delta.seconds // 3600
+
+
+def bucket_time(bucket: int) -> datetime:
+    """Start of an hour bucket"""
+    return EPOCH + timedelta(hours=bucket)
+
+
+def bucket_label(bucket: int, by: str) -> Any:
+    """Group label of a bucket for by = hour, weekday or day"""
+    if by == "hour":
+        return bucket % 24
+    if by == "weekday":
+        return WEEKDAYS[(bucket // 24 + EPOCH_WEEKDAY) % 7]
+    return (EPOCH + timedelta(days=bucket // 24)).strftime('%Y-%m-%d')
+
+
+def bucket_bounds(since: Optional[datetime], until: Optional[datetime]) -> Tuple[Optional[int], Optional[int]]:
+    """Bucket range [first, end) covering the time range [since, until)"""
+    first = hour_bucket(since) if since else None
+    end = None
+    if until:
+        end = hour_bucket(until)
+        # A partial hour at the end still belongs to the range
+        if bucket_time(end) < until.replace(tzinfo=None):
+            end += 1
+    return first, end
+
+
+def rollup_row(when: datetime, dim: str, key: Any, count: float = 1, total: float = 0) -> Row:
+    """Journal row for one event"""
+    return (hour_bucket(when), dim, str(key), count, total)
+
+
+class RollupTable:
+    """Immutable snapshot: compacted columns plus the journal tail"""
+
+    def __init__(self, dims: List[str], keys: Dict[str, List[str]],
+                 columns: Dict[str, array], tail: List[Row]):
+        self.dims = dims
+        self.keys = keys
+        self.columns = columns
+        self.tail = tail
+        self.dim_codes = {dim: code for code, dim in enumerate(dims)}
+        self._views = None
+
+    @classmethod
+    def empty(cls) -> "RollupTable":
+        return cls([], {}, {name: array(code) for code, name in COLUMNS}, [])
+
+    def __len__(self) -> int:
+        return len(self.columns['bucket']) + len(self.tail)
+
+    def _range(self, since: Optional[datetime], until: Optional[datetime]) -> Tuple[int, int]:
+        """Row slice of the sorted columns covering [since, until)"""
+        first, end = bucket_bounds(since, until)
+        buckets = self.columns['bucket']
+        lo = bisect_left(buckets, first) if first is not None else 0
+        hi = bisect_left(buckets, end) if end is not None else len(buckets)
+        return lo, max(lo, hi)
+
+    def _numpy_views(self):
+        if self._views is None:
+            self._views = {
+                name: np.frombuffer(self.columns[name], dtype=NUMPY_TYPES[code]) if len(self.columns[name])
+                else np.zeros(0, dtype=NUMPY_TYPES[code])
+                for code, name in COLUMNS
+            }
+        return self._views
+
+    def _tail_rows(self, dim: str, since: Optional[datetime], until: Optional[datetime]):
+        first, end = bucket_bounds(since, until)
+        for bucket, row_dim, key, count, total in self.tail:
+            if row_dim != dim or (first is not None and bucket < first) or (end is not None and bucket >= end):
+                continue
+            yield bucket, key, count, total
+
+    def group(self, dim: str, by: str = "key", since: Optional[datetime] = None,
+              until: Optional[datetime] = None) -> Dict[Any, List[float]]:
+        """{label: [count, total]} of one dimension grouped by key, hour, weekday or day"""
+        result: Dict[Any, List[float]] = {}
+        code = self.dim_codes.get(dim)
+        if code is not None:
+            lo, hi = self._range(since, until)
+            if np is not None:
+                self._group_numpy(result, code, dim, by, lo, hi)
+            else:
+                self._group_rows(result, code, dim, by, lo, hi)
+
+        for bucket, key, count, total in self._tail_rows(dim, since, until):
+            label = key if by == "key" else bucket_label(bucket, by)
+            cell = result.setdefault(label, [0, 0])
+            cell[0] += count
+            cell[1] += total
+        if self.tail:
+            # Negative tail rows may cancel a label out
+            result = {label: cell for label, cell in result.items() if cell[0]}
+        return result
+
+    def _group_numpy(self, result, code: int, dim: str, by: str, lo: int, hi: int):
+        views = self._numpy_views()
+        mask = views['dim'][lo:hi] == code
+        if not mask.any():
+            return
+        counts = views['count'][lo:hi][mask]
+        totals = views['total'][lo:hi][mask]
+        if by == "key":
+            codes = views['key'][lo:hi][mask].astype('int64')
+            labels = self.keys[dim]
+        else:
+            buckets = views['bucket'][lo:hi][mask]
+            if by == "hour":
+                codes = buckets % 24
+                labels = list(range(24))
+            elif by == "weekday":
+                codes = (buckets // 24 + EPOCH_WEEKDAY) % 7
+                labels = WEEKDAYS
+            else:
+                day_numbers, codes = np.unique(buckets // 24, return_inverse=True)
+                labels = [bucket_label(int(day) * 24, "day") for day in day_numbers]
+        count_sums = np.bincount(codes, weights=counts, minlength=len(labels))
+        total_sums = np.bincount(codes, weights=totals, minlength=len(labels))
+        for position in np.flatnonzero(count_sums):
+            result[labels[position]] = [float(count_sums[position]), float(total_sums[position])]
+
+    def _group_rows(self, result, code: int, dim: str, by: str, lo: int, hi: int):
+        columns = self.columns
+        keys = self.keys[dim]
+        labels: Dict[int, Any] = {}
+        rows = zip(columns['dim'][lo:hi], columns['key'][lo:hi], columns['bucket'][lo:hi],
+                   columns['count'][lo:hi], columns['total'][lo:hi])
+        for row_dim, key, bucket, count, total in rows:
+            if row_dim != code:
+                continue
+            if by == "key":
+                label = keys[key]
+            else:
+                # Buckets repeat once per key: label each only once
+                label = labels.get(bucket)
+                if label is None:
+                    label = labels[bucket] = bucket_label(bucket, by)
+            cell = result.get(label)
+            if cell is None:
+                result[label] = [count, total]
+            else:
+                cell[0] += count
+                cell[1] += total
+
+    def counts(self, dim: str, by: str = "key", since: Optional[datetime] = None,
+               until: Optional[datetime] = None) -> Dict[Any, int]:
+        """{label: count} of one dimension"""
+        return {label: int(cell[0]) for label, cell in self.group(dim, by, since, until).items()}
+
+    def span(self, dim: str, since: Optional[datetime] = None,
+             until: Optional[datetime] = None) -> Tuple[Optional[datetime], Optional[datetime]]:
+        """Start of the first and last hour bucket in [since, until) holding events of dim"""
+        buckets = [bucket for bucket, _, _, _ in self._tail_rows(dim, since, until)]
+        code = self.dim_codes.get(dim)
+        if code is not None:
+            lo, hi = self._range(since, until)
+            dims = self.columns['dim']
+            first = next((row for row in range(lo, hi) if dims[row] == code), None)
+            if first is not None:
+                last = next(row for row in range(hi - 1, lo - 1, -1) if dims[row] == code)
+                buckets += [self.columns['bucket'][first], self.columns['bucket'][last]]
+        if not buckets:
+            return None, None
+        return bucket_time(min(buckets)), bucket_time(max(buckets))
+
+
+def add_rows(cells: Dict[Tuple[int, str, str], List[float]], rows: Iterable[Row]) -> Dict[Tuple[int, str, str], List[float]]:
+    """Sum rows into cells keyed on (bucket, dim, key)"""
+    for bucket, dim, key, count, total in rows:
+        cell = cells.get((bucket, dim, key))
+        if cell is None:
+            cells[(bucket, dim, key)] = [count, total]
+        else:
+            cell[0] += count
+            cell[1] += total
+    return cells
+
+
+def merge_cells(cells: Dict[Tuple[int, str, str], List[float]],
+                other: Dict[Tuple[int, str, str], List[float]]) -> Dict[Tuple[int, str, str], List[float]]:
+    """Scan reducer: add the cells of another chunk"""
+    return add_rows(cells, ((bucket, dim, key, count, total)
+                            for (bucket, dim, key), (count, total) in other.items()))
+
+
+def encode_columns(cells: Dict[Tuple[int, str, str], List[float]]) -> bytes:
+    """Serialize merged cells as a header plus one blob per column"""
+    dims: List[str] = []
+    dim_codes: Dict[str, int] = {}
+    keys: Dict[str, List[str]] = {}
+    key_codes: Dict[str, Dict[str, int]] = {}
+    columns = {name: array(code) for code, name in COLUMNS}
+
+    for (bucket, dim, key), (count, total) in sorted(cells.items()):
+        if dim not in dim_codes:
+            dim_codes[dim] = len(dims)
+            dims.append(dim)
+            keys[dim] = []
+            key_codes[dim] = {}
+        codes = key_codes[dim]
+        if key not in codes:
+            codes[key] = len(keys[dim])
+            keys[dim].append(key)
+        columns['bucket'].append(bucket)
+        columns['dim'].append(dim_codes[dim])
+        columns['key'].append(codes[key])
+        columns['count'].append(count)
+        columns['total'].append(total)
+
+    meta = json.dumps({
+        'rows': len(columns['bucket']),
+        'byteorder': sys.byteorder,
+        'dims': dims,
+        'keys': keys
+    }, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return b"".join([ROLLUP_MAGIC, ROLLUP_HEADER.pack(len(meta)), meta] +
+                    [columns[name].tobytes() for _, name in COLUMNS])
+
+
+def decode_columns(data: bytes) -> Tuple[List[str], Dict[str, List[str]], Dict[str, array]]:
+    """Inverse of encode_columns"""
+    if not data.startswith(ROLLUP_MAGIC):
+        raise ValueError("not a rollup columns file")
+    offset = len(ROLLUP_MAGIC)
+    (meta_length,) = ROLLUP_HEADER.unpack_from(data, offset)
+    offset += ROLLUP_HEADER.size
+    meta = json.loads(data[offset:offset + meta_length].decode('utf-8'))
+    offset += meta_length
+
+    columns = {}
+    for code, name in COLUMNS:
+        column = array(code)
+        size = column.itemsize * meta['rows']
+        column.frombytes(data[offset:offset + size])
+        if meta['byteorder'] != sys.byteorder:
+            column.byteswap()
+        columns[name] = column
+        offset += size
+    if any(len(column) != meta['rows'] for column in columns.values()):
+        raise ValueError("truncated rollup columns file")
+    return meta['dims'], meta['keys'], columns
+
+
+class RollupStore:
+    """Journal plus compacted columns for one family of counters"""
+
+    def __init__(self, directory: Path, name: str, compact_bytes: int = DEFAULT_COMPACT_BYTES):
+        self.directory = Path(directory)
+        self.name = name
+        self.columns_path = self.directory / f"{name}.cols"
+        self.journal_path = self.directory / f"{name}.journal"
+        self.lock_path = self.directory / f"{name}.lock"
+        self.compact_bytes = compact_bytes
+        self._table: Optional[RollupTable] = None
+        self._identity = None
+        self._mutex = threading.Lock()
+
+    def exists(self) -> bool:
+        """Whether the columns file (the result of a full build) exists"""
+        return self.columns_path.exists()
+
+    def _stat_identity(self) -> Tuple:
+        identity = []
+        for path in (self.columns_path, self.journal_path):
+            try:
+                st = path.stat()
+                identity.append((st.st_ino, st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                identity.append(None)
+        return tuple(identity)
+
+    def append(self, rows: Iterable[Row]):
+        """Record rows at write time"""
+        lines = "".join(json.dumps(row, ensure_ascii=False, separators=(',', ':')) + "\n" for row in rows)
+        if not lines:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.lock_path):
+            fd = os.open(self.journal_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            try:
+                os.write(fd, lines.encode('utf-8'))
+                size = os.fstat(fd).st_size
+            finally:
+                os.close(fd)
+            if size > self.compact_bytes:
+                self._compact_locked()
+
+    def _read_journal(self) -> List[Row]:
+        rows = []
+        try:
+            with open(self.journal_path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return rows
+        for line in data.split(b"\n"):
+            if not line:
+                continue
+            try:
+                bucket, dim, key, count, total = json.loads(line)
+                rows.append((int(bucket), dim, key, count, total))
+            except ValueError:
+                # A torn line from a writer killed mid-append
+                logger.warning(f"Skipping unreadable rollup journal line in {self.journal_path}")
+        return rows
+
+    def _read_columns(self) -> Tuple[List[str], Dict[str, List[str]], Dict[str, array]]:
+        try:
+            with open(self.columns_path, 'rb') as f:
+                return decode_columns(f.read())
+        except FileNotFoundError:
+            empty = RollupTable.empty()
+            return empty.dims, empty.keys, empty.columns
+
+    def _load_locked(self) -> RollupTable:
+        try:
+            dims, keys, columns = self._read_columns()
+        except (ValueError, KeyError) as e:
+            logger.warning(f"Discarding unreadable rollup columns {self.columns_path}: {e}")
+            empty = RollupTable.empty()
+            dims, keys, columns = empty.dims, empty.keys, empty.columns
+        return RollupTable(dims, keys, columns, self._read_journal())
+
+    def table(self) -> RollupTable:
+        """Current snapshot, reloaded only when the files changed"""
+        with self._mutex:
+            identity = self._stat_identity()
+            if self._table is not None and identity == self._identity:
+                return self._table
+            if not self.directory.exists():
+                self._table, self._identity = RollupTable.empty(), identity
+                return self._table
+            journal = identity[1]
+            if journal and journal[2] > self.compact_bytes:
+                # Writers compact as they append; this catches journals left large by a crash
+                with file_lock(self.lock_path):
+                    self._compact_locked()
+            with file_lock(self.lock_path, shared=True):
+                identity = self._stat_identity()
+                table = self._load_locked()
+            self._table, self._identity = table, identity
+            return table
+
+    def _write_cells_locked(self, cells: Dict[Tuple[int, str, str], List[float]]):
+        # Cells cancelled out by negative rows (removed records) are dropped
+        cells = {cell: value for cell, value in cells.items() if value[0]}
+        atomic_write(self.columns_path, encode_columns(cells))
+        # The journal is folded into the columns: start a fresh one
+        try:
+            os.unlink(self.journal_path)
+        except FileNotFoundError:
+            pass
+
+    def _compact_locked(self):
+        dims, keys, columns = self._read_columns()
+        rows = (
+            (columns['bucket'][row], dims[columns['dim'][row]],
+             keys[dims[columns['dim'][row]]][columns['key'][row]],
+             columns['count'][row], columns['total'][row])
+            for row in range(len(columns['bucket']))
+        )
+        cells = add_rows(add_rows({}, rows), self._read_journal())
+        self._write_cells_locked(cells)
+
+    def compact(self):
+        """Fold the journal into the columns file"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.lock_path):
+            self._compact_locked()
+
+    def replace(self, rows: Iterable[Row]) -> int:
+        """Rebuild the store from a full pass over the source data
+
+        The lock is held while rows are produced, so appends from
+        concurrent writers land after the rebuild rather than being lost
+        with the discarded journal.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.lock_path):
+            cells = add_rows({}, rows)
+            self._write_cells_locked(cells)
+        return len(cells)
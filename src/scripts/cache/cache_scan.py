@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Cache Scan Executor
+
+Shared executor for full-cache scans. Record paths are split into chunks
+that worker processes read and parse, so ``json`` decoding runs on every
+core instead of one:
+
+- ``map``: per-record results streamed back in input order, with only a
+  bounded number of chunks in flight
+- ``reduce``: each worker folds its chunk into a partial result and the
+  partials are merged with a reducer
+
+Scans smaller than ``serial_threshold`` records (or with one worker) run
+in-process, where pool start-up would cost more than it saves. Mappers,
+folds and reducers must be module-level functions so they can be pickled.
+
+Author: Claude Code Research System
+Version: 1.0.0
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Tuple
+import logging
+
+from cache_storage import read_record
+
+logger = logging.getLogger(__name__)
+
+WORKERS_ENV_VAR = "CACHE_SCAN_WORKERS"
+DEFAULT_CHUNK_SIZE = 256
+DEFAULT_SERIAL_THRESHOLD = 1000
+
+
+def default_workers() -> int:
+    """Worker count from CACHE_SCAN_WORKERS, else one per usable CPU"""
+    try:
+        return max(int(os.environ[WORKERS_ENV_VAR]), 1)
+    except (KeyError, ValueError):
+        pass
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+def _read(file_path) -> Optional[dict]:
+    try:
+        return read_record(file_path)
+    except Exception as e:
+        logger.error(f"Failed to read cache record {file_path}: {e}")
+        return None
+
+
+def _map_chunk(mapper: Optional[Callable], paths: Sequence) -> List[Tuple[Any, Any]]:
+    results = []
+    for file_path in paths:
+        cache_data = _read(file_path)
+        if cache_data is None:
+            continue
+        results.append((file_path, mapper(cache_data) if mapper else cache_data))
+    return results
+
+
+def _fold_chunk(fold: Callable, initial: Callable, paths: Sequence) -> Any:
+    acc = initial()
+    for file_path in paths:
+        cache_data = _read(file_path)
+        if cache_data is not None:
+            acc = fold(acc, file_path, cache_data)
+    return acc
+
+
+class ScanExecutor:
+    """Fan record parsing out over a process pool"""
+
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 serial_threshold: int = DEFAULT_SERIAL_THRESHOLD):
+        self.workers = workers or default_workers()
+        self.chunk_size = chunk_size
+        self.serial_threshold = serial_threshold
+
+    def is_parallel(self, count: int) -> bool:
+        return self.workers > 1 and count >= self.serial_threshold
+
+    def _chunks(self, paths: Sequence) -> Iterator[Sequence]:
+        for start in range(0, len(paths), self.chunk_size):
+            yield paths[start:start + self.chunk_size]
+
+    def map(self, paths: Sequence[Path], mapper: Optional[Callable] = None) -> Iterator[Tuple[Path, Any]]:
+        """Yield (path, mapper(record)) in input order; unreadable records are skipped
+
+        Without a mapper the parsed record itself is returned.
+        """
+        paths = list(paths)
+        if not self.is_parallel(len(paths)):
+            for file_path in paths:
+                cache_data = _read(file_path)
+                if cache_data is not None:
+                    yield file_path, mapper(cache_data) if mapper else cache_data
+            return
+
+        task = partial(_map_chunk, mapper)
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            pending = deque()
+            for chunk in self._chunks(paths):
+                pending.append(pool.submit(task, chunk))
+                # Keep memory bounded: a couple of chunks per worker in flight
+                if len(pending) >= self.workers * 2:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
+    def reduce(self, paths: Sequence[Path], fold: Callable, merge: Callable, initial: Callable) -> Any:
+        """Fold every record into initial() and merge the per-chunk partials
+
+        ``fold(acc, path, record) -> acc`` runs in the workers;
+        ``merge(acc, partial) -> acc`` combines partials in input order.
+        """
+        paths = list(paths)
+        if not self.is_parallel(len(paths)):
+            return _fold_chunk(fold, initial, paths)
+
+        task = partial(_fold_chunk, fold, initial)
+        result = initial()
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            for partial_result in pool.map(task, self._chunks(paths)):
+                result = merge(result, partial_result)
+        logger.debug(f"Parallel scan of {len(paths)} records on {self.workers} workers")
+        return result
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Cache Query Server
+
+Local query server hosted by ``start_cache.py --daemon``. The daemon keeps
+the cache system (indexes, directory listings, read cache, dashboard
+rollups) warm in memory and answers requests on a Unix domain socket, so
+the CLIs skip the cold start of loading indexes and scanning directories.
+
+Protocol: one JSON object per line in each direction::
+
+    -> {"method": "search", "params": {"query": "cache", "cache_type": "all"}}
+    <- {"ok": true, "result": [...]}
+    <- {"ok": false, "error": "..."}
+
+Requests are served one at a time against the daemon's cache instance.
+The socket is ``<cache dir>/query.sock`` (``CACHE_SERVER_SOCKET``
+overrides it) and is only accessible to the owning user.
+
+CLIs call ``connect_cache_system``, which returns a ``RemoteCacheSystem``
+proxy when a server answers and the local ``SimpleCacheSystem`` otherwise;
+``CACHE_SERVER=off`` always uses direct file access.
+
+Author: Claude Code Research System
+Version: 1.0.0
+"""
+
+import json
+import os
+import socket
+import socketserver
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+SOCKET_NAME = "query.sock"
+SOCKET_ENV_VAR = "CACHE_SERVER_SOCKET"
+SERVER_ENV_VAR = "CACHE_SERVER"
+CONNECT_TIMEOUT = 0.5
+
+
+class CacheServerError(Exception):
+    """Error reported by the query server"""
+
+
+def default_socket_path(base_path: str = "src/dev/cache") -> Path:
+    return Path(os.getenv(SOCKET_ENV_VAR) or Path(base_path).resolve() / SOCKET_NAME)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            response = self.server.query_server.dispatch(line)
+            self.wfile.write(response)
+            self.wfile.flush()
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class CacheQueryServer:
+    """Serve cache queries from a warm SimpleCacheSystem"""
+
+    def __init__(self, cache, socket_path: Optional[Path] = None):
+        self.cache = cache
+        self.socket_path = Path(socket_path) if socket_path else default_socket_path(cache.base_path)
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server: Optional[_UnixServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._dashboard = None
+        self.methods = {
+            "ping": self.ping,
+            "describe": self.describe,
+            "stats": self.cache.get_stats,
+            "list": self.cache.list_cache_files,
+            "search": self.search,
+            "session": self.cache.find_by_session_id,
+            "thread": self.cache.get_conversation_thread,
+            "read": self.cache.read_cache_file,
+            "reindex": self.cache.rebuild_indexes,
+            "dashboard": self.dashboard,
+            "export": self.export,
+        }
+
+    # ------------------------------------------------------------------
+    # Methods
+    # ------------------------------------------------------------------
+
+    def ping(self) -> Dict[str, Any]:
+        return {"pid": os.getpid(), "requests": self.requests}
+
+    def describe(self) -> Dict[str, Any]:
+        """Paths and backend the CLIs need to build file names"""
+        return {
+            "base_path": str(self.cache.base_path.resolve()),
+            "storage_backend": self.cache.storage_backend,
+            "paths": {file_type: str(storage.root.resolve()) for file_type, storage in self.cache.storages.items()}
+        }
+
+    def search(self, query: str, cache_type: str = "all", use_index: bool = True,
+               since: Optional[str] = None, until: Optional[str] = None) -> List[Dict[str, Any]]:
+        return self.cache.search_content(query, cache_type, use_index,
+                                         since=datetime.fromisoformat(since) if since else None,
+                                         until=datetime.fromisoformat(until) if until else None)
+
+    def dashboard(self, rebuild: bool = False, days: Optional[int] = None) -> Dict[str, Any]:
+        """Dashboard statistics from rollups kept in memory between requests"""
+        if self._dashboard is None:
+            from cache_dashboard import CacheDashboard
+            self._dashboard = CacheDashboard(cache=self.cache)
+        self._dashboard.rebuild = rebuild
+        self._dashboard.days = days
+        return self._dashboard.generate_statistics()
+
+    def export(self, format: str, output_file: Optional[str] = None, filter_type: str = "all",
+               include_content: bool = True, since: Optional[str] = None, until: Optional[str] = None,
+               compression: Optional[str] = None) -> str:
+        """Run an export in the daemon and return the absolute output path"""
+        from cache_export import CacheExporter
+        exporter = CacheExporter(cache=self.cache)
+        filters = {"since": datetime.fromisoformat(since) if since else None,
+                   "until": datetime.fromisoformat(until) if until else None,
+                   "compression": compression}
+        if format in ("json", "ndjson"):
+            filters["include_content"] = include_content
+        export = getattr(exporter, f"export_to_{format}", None)
+        if export is None:
+            raise ValueError(f"Unknown export format: {format}")
+        return str(Path(export(output_file, filter_type, **filters)).resolve())
+
+    # ------------------------------------------------------------------
+    # Serving
+    # ------------------------------------------------------------------
+
+    def dispatch(self, line: bytes) -> bytes:
+        try:
+            request = json.loads(line)
+            method = self.methods.get(request.get("method"))
+            if method is None:
+                raise ValueError(f"Unknown method: {request.get('method')}")
+            with self._lock:
+                self.requests += 1
+                result = method(**request.get("params", {}))
+            response = {"ok": True, "result": result}
+        except Exception as e:
+            logger.error(f"Query server request failed: {e}")
+            response = {"ok": False, "error": str(e)}
+        return (json.dumps(response, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+    def start(self):
+        """Bind the socket and serve from a background thread"""
+        if self.socket_path.exists():
+            if CacheClient(self.socket_path).ping():
+                raise RuntimeError(f"A cache query server is already running on {self.socket_path}")
+            # Left behind by a daemon that did not shut down cleanly
+            self.socket_path.unlink()
+
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        old_umask = os.umask(0o077)
+        try:
+            self._server = _UnixServer(str(self.socket_path), _RequestHandler)
+        finally:
+            os.umask(old_umask)
+        self._server.query_server = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name="cache-query-server",
+                                        daemon=True)
+        self._thread.start()
+        logger.info(f"Cache query server listening on {self.socket_path}")
+
+    def stop(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        try:
+            self.socket_path.unlink()
+        except FileNotFoundError:
+            pass
+        logger.info("Cache query server stopped")
+
+
+class CacheClient:
+    """Minimal client for the query server protocol"""
+
+    def __init__(self, socket_path: Path, timeout: Optional[float] = None):
+        self.socket_path = Path(socket_path)
+        self.timeout = timeout
+
+    def call(self, method: str, **params) -> Any:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(str(self.socket_path))
+            sock.settimeout(self.timeout)
+            request = json.dumps({"method": method, "params": params}, default=str) + "\n"
+            sock.sendall(request.encode("utf-8"))
+            with sock.makefile("rb") as stream:
+                line = stream.readline()
+        if not line:
+            raise ConnectionError("Cache query server closed the connection")
+        response = json.loads(line)
+        if not response["ok"]:
+            raise CacheServerError(response["error"])
+        return response["result"]
+
+    def ping(self) -> bool:
+        try:
+            self.call("ping")
+            return True
+        except (OSError, ValueError, CacheServerError):
+            return False
+
+
+class RemoteCacheSystem:
+    """Read-only SimpleCacheSystem stand-in that forwards to the query server"""
+
+    remote = True
+
+    def __init__(self, client: CacheClient):
+        self.client = client
+        info = client.call("describe")
+        self.base_path = Path(info["base_path"])
+        self.storage_backend = info["storage_backend"]
+        for file_type, path in info["paths"].items():
+            setattr(self, f"{file_type}_path", Path(path))
+
+    def call(self, method: str, **params) -> Any:
+        return self.client.call(method, **params)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return self.call("stats")
+
+    def list_cache_files(self, cache_type: str = "all") -> Dict[str, list]:
+        return self.call("list", cache_type=cache_type)
+
+    def search_content(self, query: str, cache_type: str = "all", use_index: bool = True,
+                       since: Optional[datetime] = None, until: Optional[datetime] = None) -> list:
+        return self.call("search", query=query, cache_type=cache_type, use_index=use_index,
+                         since=since.isoformat() if since else None,
+                         until=until.isoformat() if until else None)
+
+    def find_by_session_id(self, session_id: str) -> List[dict]:
+        return self.call("session", session_id=session_id)
+
+    def get_conversation_thread(self, session_id: str) -> dict:
+        return self.call("thread", session_id=session_id)
+
+    def read_cache_file(self, file_path: str) -> Optional[Dict[str, Any]]:
+        return self.call("read", file_path=str(Path(file_path).resolve()))
+
+    def rebuild_indexes(self, names: Optional[List[str]] = None) -> Dict[str, int]:
+        return self.call("reindex", names=names)
+
+
+def connect_cache_system(base_path: str = "src/dev/cache", workers: Optional[int] = None,
+                         use_server: Optional[bool] = None):
+    """The daemon's cache through its query server if one answers, else the local cache"""
+    if use_server is None:
+        use_server = os.getenv(SERVER_ENV_VAR, "auto").lower() not in ("0", "off", "false", "no")
+    socket_path = default_socket_path(base_path)
+    if use_server and socket_path.exists():
+        try:
+            return RemoteCacheSystem(CacheClient(socket_path))
+        except (OSError, ValueError, CacheServerError) as e:
+            logger.debug(f"Cache query server unavailable, using files directly: {e}")
+
+    from cache import get_simple_cache_system
+    return get_simple_cache_system(base_path, workers=workers)
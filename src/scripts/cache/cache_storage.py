@@ -0,0 +1,1170 @@
+#!/usr/bin/env python3
+"""
+Cache Storage Backends
+
+Pluggable storage engines used by SimpleCacheSystem:
+
+- ``files``: one file per record (pretty-printed JSON by default)
+- ``segments``: records appended to rotating segment files, each sealed
+  with a record-offset footer, so a write is a single buffered append and
+  a full scan is a sequential read of a handful of files. A segment is
+  sealed when it reaches its size limit or when the first record of a new
+  day arrives, so retention can drop whole days
+- ``partitioned``: one file per record in ``YYYY/MM/DD`` day directories
+  listed in a ``partitions.json`` manifest, so time-range queries and
+  retention only touch the days they select
+
+Segment layout (``NNNNNN.seg`` inside each cache directory)::
+
+    [u32 length][record payload] ... [footer JSON][u64 footer offset][magic]
+
+Record payloads are encoded with a codec from ``cache_codecs`` (compact
+JSON by default) and decoded with automatic codec detection.
+
+Records are addressed as ``<segment>#<offset>`` so existing code that does
+``cache_path / filename`` keeps working with segment records.
+
+Author: Claude Code Research System
+Version: 1.0.0
+"""
+
+import json
+import os
+import re
+import shutil
+import struct
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Iterator, Tuple
+import logging
+
+from cache_codecs import RECORD_SUFFIXES, decode_record, encode_record, get_codec
+from cache_compression import (
+    COMPRESSED_HEADER_SIZE, COMPRESSED_SUFFIX, DEFAULT_THRESHOLD, DICTIONARY_DIR,
+    Compressor, compressed_raw_length, decompress_payload
+)
+from cache_ids import new_record_id, record_sort_key, record_time
+from cache_locks import atomic_write, file_lock, remove_stale_temp_files
+from cache_watch import RACY_SECONDS, DirectoryListing
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_SUFFIX = ".seg"
+SEGMENT_MAGIC = b"CCSEGFT1"
+FRAME_HEADER = struct.Struct(">I")
+TRAILER = struct.Struct(">Q8s")
+DEFAULT_SEGMENT_BYTES = 8 * 1024 * 1024
+
+SEGMENT_LOCK = ".lock"
+# Highest segment number ever created: numbers of deleted segments are never reused
+SEGMENT_SEQUENCE = ".sequence"
+
+PARTITION_FORMAT = "%Y/%m/%d"
+PARTITION_PATTERN = re.compile(r"^\d{4}/\d{2}/\d{2}$")
+PARTITION_MANIFEST = "partitions.json"
+PARTITION_LOCK = ".partitions.lock"
+
+STORAGE_MARKER = "storage.json"
+STORAGE_ENV_VAR = "CACHE_STORAGE_BACKEND"
+
+# Record file suffixes of every codec, plain or compressed
+FILE_SUFFIXES = RECORD_SUFFIXES + tuple(suffix + COMPRESSED_SUFFIX for suffix in RECORD_SUFFIXES)
+
+
+def split_locator(file_path) -> Tuple[Path, Optional[int]]:
+    """Split ``segment#offset`` locators into (segment path, offset)"""
+    text = str(file_path)
+    if '#' in text:
+        path, _, offset = text.rpartition('#')
+        if path.endswith(SEGMENT_SUFFIX) and offset.isdigit():
+            return Path(path), int(offset)
+    return Path(text), None
+
+
+def in_time_range(when: Optional[datetime], since: Optional[datetime] = None,
+                  until: Optional[datetime] = None) -> bool:
+    """Whether a record time may fall in [since, until); unknown times always may"""
+    if when is None:
+        return True
+    if since and when < since:
+        return False
+    if until and when >= until:
+        return False
+    return True
+
+
+def cache_directory(path: Path) -> Path:
+    """Cache directory holding a record file, above any day partition"""
+    parent = Path(path).parent
+    if len(parent.parts) > 3 and PARTITION_PATTERN.match("/".join(parent.parts[-3:])):
+        return parent.parents[2]
+    return parent
+
+
+def load_record(payload: bytes, directory: Path) -> Dict[str, Any]:
+    """Decode a stored payload (any codec, compressed or not) from a cache directory"""
+    return decode_record(decompress_payload(payload, Path(directory) / DICTIONARY_DIR))
+
+
+def read_payload(file_path) -> Tuple[bytes, Path]:
+    """Stored payload of a record file or segment locator, and its cache directory"""
+    path, offset = split_locator(file_path)
+    if offset is None:
+        with open(path, 'rb') as f:
+            return f.read(), cache_directory(path)
+
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        header = f.read(FRAME_HEADER.size)
+        if len(header) < FRAME_HEADER.size:
+            raise ValueError(f"No record at offset {offset}")
+        (length,) = FRAME_HEADER.unpack(header)
+        payload = f.read(length)
+        if len(payload) < length:
+            raise ValueError(f"Truncated record at offset {offset}")
+        return payload, path.parent
+
+
+def read_record(file_path) -> Dict[str, Any]:
+    """Read a record from a record file or a segment locator (any codec)"""
+    payload, directory = read_payload(file_path)
+    return load_record(payload, directory)
+
+
+def record_size(file_path) -> int:
+    """Size in bytes of a record (file size or framed payload size)"""
+    path, offset = split_locator(file_path)
+    if offset is None:
+        return path.stat().st_size
+
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        (length,) = FRAME_HEADER.unpack(f.read(FRAME_HEADER.size))
+        return FRAME_HEADER.size + length
+
+
+def infer_kind(file_type: str, cache_data: Dict[str, Any]) -> str:
+    """Infer the record kind used in per-file names from record content"""
+    content = cache_data.get('content')
+    if isinstance(content, dict):
+        if content.get('type') == 'tool_execution':
+            return "tool"
+        if content.get('type') == 'conversation':
+            return "conversation"
+    return file_type
+
+
+class CacheStorage:
+    """Base class for a storage engine bound to one cache directory"""
+
+    name = "base"
+    default_codec = "json"
+
+    def __init__(self, root: Path, codec: Optional[str] = None, compression: Optional[str] = None,
+                 compression_threshold: int = DEFAULT_THRESHOLD):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.codec = get_codec(codec or self.default_codec)
+        self.compressor = Compressor(self.root, compression, compression_threshold) if compression else None
+        self._listing: Optional[DirectoryListing] = None
+
+    @property
+    def listing(self) -> DirectoryListing:
+        """Incrementally maintained listing of this directory's record files"""
+        if self._listing is None:
+            self._listing = DirectoryListing(self.root, self.listing_suffixes, self.listing_sort_key)
+        return self._listing
+
+    listing_suffixes: Tuple[str, ...] = ()
+    listing_sort_key = staticmethod(record_sort_key)
+
+    def _encode(self, cache_data: Dict[str, Any]) -> Tuple[bytes, bool]:
+        """Stored payload for a record and whether it was compressed"""
+        payload = self.codec.encode(cache_data)
+        if self.compressor is None:
+            return payload, False
+        return self.compressor.compress(payload)
+
+    def compression_stats(self) -> Dict[str, int]:
+        """Stored vs. uncompressed bytes, read from record headers only"""
+        raise NotImplementedError
+
+    def write(self, cache_data: Dict[str, Any], kind: str) -> Optional[str]:
+        """Persist a record and return its name within the directory"""
+        raise NotImplementedError
+
+    def write_batch(self, items: List[Tuple[Dict[str, Any], str]]) -> List[Optional[str]]:
+        """Persist several records and make them durable with one sync"""
+        names = [self.write(cache_data, kind) for cache_data, kind in items]
+        self.sync()
+        return names
+
+    def list_names(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[str]:
+        """List record names in chronological order
+
+        With ``since``/``until`` only records that may fall in
+        ``[since, until)`` are listed; names whose time is unknown without
+        parsing the record are always included.
+        """
+        raise NotImplementedError
+
+    def list_timed_names(self, since: Optional[datetime] = None,
+                         until: Optional[datetime] = None) -> List[Tuple[str, Optional[datetime]]]:
+        """List (name, record time) pairs without reading record bodies
+
+        The time is None when it cannot be known without parsing the record.
+        """
+        return [(name, record_time(name)) for name in self.list_names(since, until)]
+
+    def iter_records(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Iterate (name, record) pairs in chronological order"""
+        for name in self.list_names():
+            try:
+                yield name, read_record(self.root / name)
+            except Exception as e:
+                logger.error(f"Failed to read cache record {self.root / name}: {e}")
+
+    def signature(self) -> List[Any]:
+        """Cheap fingerprint that changes whenever records are added or removed"""
+        return [self.root.stat().st_mtime_ns]
+
+    def listing_stats(self) -> Dict[str, Any]:
+        """How record names are being listed"""
+        return self.listing.stats()
+
+    def retention_units(self) -> List[Dict[str, Any]]:
+        """Smallest deletable units with metadata for retention decisions
+
+        Each unit is ``{unit, time, size, accessed, records}`` where time is
+        its newest record time. Only names, footers and ``stat()`` are used,
+        never record bodies.
+        """
+        raise NotImplementedError
+
+    def remove_unit(self, unit: str) -> int:
+        """Delete a retention unit, return number of records removed"""
+        raise NotImplementedError
+
+    def unit_names(self, unit: str) -> List[str]:
+        """Record names in a retention unit"""
+        raise NotImplementedError
+
+    def cleanup(self, cutoff: datetime) -> int:
+        """Remove records older than cutoff, return number removed"""
+        deleted = 0
+        for unit in self.retention_units():
+            if unit["time"] < cutoff:
+                deleted += self.remove_unit(unit["unit"])
+        return deleted
+
+    def purge(self):
+        """Delete every record in this directory"""
+        raise NotImplementedError
+
+    def sync(self):
+        """Flush buffered data to disk"""
+
+    def close(self):
+        """Release open handles"""
+        if self._listing is not None:
+            self._listing.close()
+            self._listing = None
+
+
+class JsonFileStorage(CacheStorage):
+    """One file per record (pretty-printed JSON unless another codec is chosen)"""
+
+    name = "files"
+    default_codec = "pretty"
+    listing_suffixes = FILE_SUFFIXES
+
+    def _get_filename(self, cache_data: Dict[str, Any], kind: str, compressed: bool = False) -> str:
+        """Generate filename from the record id (or timestamp for legacy records)"""
+        suffix = self.codec.suffix + (COMPRESSED_SUFFIX if compressed else "")
+        if cache_data.get("id"):
+            return f"{cache_data['id']}_{kind}{suffix}"
+        # Convert ISO timestamp to filename-safe format
+        safe_timestamp = cache_data["timestamp"][:19].replace(':', '-')
+        return f"{safe_timestamp}_{kind}{suffix}"
+
+    def _record_paths(self) -> Iterator[Path]:
+        for name in self.listing.names():
+            yield self.root / name
+
+    def _write_file(self, cache_data: Dict[str, Any], kind: str, fsync: bool = False) -> Optional[str]:
+        payload, compressed = self._encode(cache_data)
+        filename = self._get_filename(cache_data, kind, compressed)
+        file_path = self.root / filename
+        try:
+            # Readers in other processes must never see a partially written record
+            atomic_write(file_path, payload, fsync=fsync)
+            self.listing.add(filename)
+            return filename
+        except Exception as e:
+            logger.error(f"Failed to save cache file {file_path}: {e}")
+            return None
+
+    def write(self, cache_data: Dict[str, Any], kind: str) -> Optional[str]:
+        return self._write_file(cache_data, kind)
+
+    def write_batch(self, items: List[Tuple[Dict[str, Any], str]]) -> List[Optional[str]]:
+        names = [self._write_file(cache_data, kind, fsync=True) for cache_data, kind in items]
+        self.sync()
+        return names
+
+    def sync(self):
+        # Persist the new directory entries
+        if hasattr(os, "O_DIRECTORY"):
+            fd = os.open(self.root, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def list_names(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[str]:
+        names = self.listing.names()
+        if since or until:
+            names = [name for name in names if in_time_range(record_time(name), since, until)]
+        return names
+
+    def retention_units(self) -> List[Dict[str, Any]]:
+        remove_stale_temp_files(self.root)
+        units = []
+        for file_path in self._record_paths():
+            try:
+                stat = file_path.stat()
+            except FileNotFoundError:
+                continue
+            # Expiry comes from the filename; unrecognised names fall back to mtime
+            file_time = record_time(file_path.name) or datetime.fromtimestamp(stat.st_mtime)
+            units.append({"unit": file_path.name, "time": file_time, "size": stat.st_size,
+                          "accessed": stat.st_atime, "records": 1})
+        return units
+
+    def remove_unit(self, unit: str) -> int:
+        file_path = self.root / unit
+        try:
+            file_path.unlink()
+            self.listing.discard(unit)
+            logger.info(f"Deleted old cache file: {file_path.name}")
+            return 1
+        except FileNotFoundError:
+            self.listing.discard(unit)
+            return 0
+        except Exception as e:
+            logger.error(f"Failed to delete {file_path}: {e}")
+            return 0
+
+    def unit_names(self, unit: str) -> List[str]:
+        return [unit] if (self.root / unit).exists() else []
+
+    def compression_stats(self) -> Dict[str, int]:
+        stats = {"records": 0, "compressed": 0, "stored_bytes": 0, "raw_bytes": 0}
+        for file_path in self._record_paths():
+            try:
+                size = file_path.stat().st_size
+                raw_length = None
+                if file_path.name.endswith(COMPRESSED_SUFFIX):
+                    with open(file_path, 'rb') as f:
+                        raw_length = compressed_raw_length(f.read(COMPRESSED_HEADER_SIZE))
+            except FileNotFoundError:
+                continue
+            stats["records"] += 1
+            stats["stored_bytes"] += size
+            stats["raw_bytes"] += raw_length if raw_length is not None else size
+            stats["compressed"] += raw_length is not None
+        return stats
+
+    def purge(self):
+        for file_path in list(self._record_paths()):
+            file_path.unlink(missing_ok=True)
+            self.listing.discard(file_path.name)
+
+
+class PartitionedFileStorage(JsonFileStorage):
+    """One file per record inside ``YYYY/MM/DD`` day partitions
+
+    Record names include their partition (``2026/10/17/<id>_<kind>.json``)
+    so ``cache_path / name`` still addresses the file. ``partitions.json``
+    lists every partition, and for finished days also a summary (record
+    count, bytes, newest record, last access) that stays valid while the
+    partition directory's mtime is unchanged, so retention and range
+    queries never list days they do not select.
+    """
+
+    name = "partitioned"
+
+    def __init__(self, root: Path, **kwargs):
+        super().__init__(root, **kwargs)
+        self.manifest_path = self.root / PARTITION_MANIFEST
+        self._manifest: Dict[str, Dict[str, Any]] = {}
+        self._manifest_mtime: Optional[int] = None
+        # Partition -> (dir mtime_ns, sorted names, modified within the racy window)
+        self._names: Dict[str, Tuple[int, List[str], bool]] = {}
+        self._dirty: set = set()
+
+    # ------------------------------------------------------------------
+    # Manifest
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def partition_of(when: datetime) -> str:
+        return when.strftime(PARTITION_FORMAT)
+
+    @staticmethod
+    def _partition_in_range(key: str, since: Optional[datetime], until: Optional[datetime]) -> bool:
+        day = datetime.strptime(key, PARTITION_FORMAT)
+        return not ((since and day + timedelta(days=1) <= since) or (until and day >= until))
+
+    def _scan_partitions(self) -> List[str]:
+        """Partition directories present on disk"""
+        keys = []
+        for year in self.root.glob("[0-9][0-9][0-9][0-9]"):
+            for day in year.glob("[0-9][0-9]/[0-9][0-9]"):
+                if day.is_dir():
+                    keys.append(day.relative_to(self.root).as_posix())
+        return sorted(keys)
+
+    def _save_manifest(self):
+        data = {"version": 1, "partitions": self._manifest}
+        atomic_write(self.manifest_path, json.dumps(data, separators=(',', ':')).encode('utf-8'))
+        self._manifest_mtime = self.manifest_path.stat().st_mtime_ns
+
+    def _load_manifest(self):
+        """Re-read the manifest if another process changed it"""
+        try:
+            mtime = self.manifest_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime is not None and mtime == self._manifest_mtime:
+            return
+        if mtime is None:
+            # First use, or a manifest lost from a copied cache: rebuild it from the directories
+            with file_lock(self.root / PARTITION_LOCK):
+                if not self.manifest_path.exists():
+                    self._manifest = {key: {} for key in self._scan_partitions()}
+                    self._save_manifest()
+                    return
+            mtime = self.manifest_path.stat().st_mtime_ns
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self._manifest = json.load(f)["partitions"]
+        except Exception as e:
+            logger.warning(f"Rebuilding unreadable partition manifest {self.manifest_path}: {e}")
+            with file_lock(self.root / PARTITION_LOCK):
+                self._manifest = {key: {} for key in self._scan_partitions()}
+                self._save_manifest()
+            return
+        self._manifest_mtime = mtime
+
+    def _update_manifest(self, changes: Dict[str, Optional[Dict[str, Any]]]):
+        """Apply {partition: entry or None to drop} under the manifest lock"""
+        with file_lock(self.root / PARTITION_LOCK):
+            self._manifest_mtime = None
+            self._load_manifest()
+            for key, entry in changes.items():
+                if entry is None:
+                    self._manifest.pop(key, None)
+                else:
+                    self._manifest[key] = entry
+            self._save_manifest()
+
+    def partitions(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[str]:
+        """Partition keys, oldest first, that may hold records in [since, until)"""
+        self._load_manifest()
+        return [key for key in sorted(self._manifest) if self._partition_in_range(key, since, until)]
+
+    def _partition_names(self, key: str) -> List[str]:
+        """Record names in one partition, re-listed only when its directory changed"""
+        path = self.root / key
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            self._names.pop(key, None)
+            return []
+        cached = self._names.get(key)
+        if cached and cached[0] == mtime and not cached[2]:
+            return cached[1]
+        names = sorted((f"{key}/{entry.name}" for entry in os.scandir(path)
+                        if entry.name.endswith(FILE_SUFFIXES) and not entry.name.startswith(".")),
+                       key=record_sort_key)
+        self._names[key] = (mtime, names, time.time() - mtime / 1e9 < RACY_SECONDS)
+        return names
+
+    def _summary(self, key: str, today: str) -> Dict[str, Any]:
+        """Record count, bytes, newest record and last access of a partition"""
+        entry = self._manifest.get(key) or {}
+        path = self.root / key
+        mtime = path.stat().st_mtime_ns
+        if entry.get("mtime_ns") == mtime:
+            return entry
+
+        remove_stale_temp_files(path)
+        summary = {"records": 0, "bytes": 0, "newest": None, "accessed": 0.0}
+        for name in self._partition_names(key):
+            try:
+                stat = (self.root / name).stat()
+            except FileNotFoundError:
+                continue
+            when = record_time(name) or datetime.fromtimestamp(stat.st_mtime)
+            summary["records"] += 1
+            summary["bytes"] += stat.st_size
+            summary["accessed"] = max(summary["accessed"], stat.st_atime)
+            if summary["newest"] is None or when.isoformat() > summary["newest"]:
+                summary["newest"] = when.isoformat()
+        if key < today and time.time() - mtime / 1e9 >= RACY_SECONDS:
+            # Finished days only change through late or external writes, which bump the mtime
+            summary["mtime_ns"] = path.stat().st_mtime_ns
+        return summary
+
+    # ------------------------------------------------------------------
+    # Storage API
+    # ------------------------------------------------------------------
+
+    def _partition_for(self, cache_data: Dict[str, Any]) -> str:
+        when = record_time(cache_data.get("id") or "")
+        if when is None:
+            try:
+                when = datetime.fromisoformat(cache_data["timestamp"])
+            except (KeyError, TypeError, ValueError):
+                when = datetime.now()
+        return self.partition_of(when)
+
+    def _ensure_partition(self, key: str, verify: bool = False):
+        """Create and register a partition unless this process already knows it"""
+        if not verify and key in self._manifest:
+            return
+        self._load_manifest()
+        if key in self._manifest and (self.root / key).is_dir():
+            return
+        (self.root / key).mkdir(parents=True, exist_ok=True)
+        self._update_manifest({key: {}})
+
+    def _write_file(self, cache_data: Dict[str, Any], kind: str, fsync: bool = False) -> Optional[str]:
+        payload, compressed = self._encode(cache_data)
+        key = self._partition_for(cache_data)
+        name = f"{key}/{self._get_filename(cache_data, kind, compressed)}"
+        file_path = self.root / name
+        try:
+            self._ensure_partition(key)
+            try:
+                atomic_write(file_path, payload, fsync=fsync)
+            except FileNotFoundError:
+                # Another process removed the partition since we registered it
+                self._ensure_partition(key, verify=True)
+                atomic_write(file_path, payload, fsync=fsync)
+            self._dirty.add(key)
+            return name
+        except Exception as e:
+            logger.error(f"Failed to save cache file {file_path}: {e}")
+            return None
+
+    def sync(self):
+        # Persist the new directory entries of every partition written to
+        if hasattr(os, "O_DIRECTORY"):
+            for key in self._dirty:
+                fd = os.open(self.root / key, os.O_RDONLY | os.O_DIRECTORY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+        self._dirty.clear()
+
+    def _record_paths(self) -> Iterator[Path]:
+        for key in self.partitions():
+            for name in self._partition_names(key):
+                yield self.root / name
+
+    def list_names(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[str]:
+        names = []
+        for key in self.partitions(since, until):
+            names.extend(self._partition_names(key))
+        if since or until:
+            # Only the partitions at the edges of the range hold records outside it
+            names = [name for name in names if in_time_range(record_time(name), since, until)]
+        return names
+
+    def signature(self) -> List[Any]:
+        keys = self.partitions()
+        mtimes = []
+        for key in keys:
+            try:
+                mtimes.append((self.root / key).stat().st_mtime_ns)
+            except FileNotFoundError:
+                mtimes.append(0)
+        return [len(keys), keys[-1] if keys else None, zlib.crc32(",".join(map(str, mtimes)).encode('ascii'))]
+
+    def listing_stats(self) -> Dict[str, Any]:
+        return {"mode": "partitions", "entries": sum(len(cached[1]) for cached in self._names.values()),
+                "partitions": len(self._manifest), "listed_partitions": len(self._names)}
+
+    def retention_units(self) -> List[Dict[str, Any]]:
+        """Whole day partitions; today's partition is never evicted"""
+        today = self.partition_of(datetime.now())
+        units = []
+        summaries = {}
+        for key in self.partitions():
+            if key >= today:
+                continue
+            try:
+                summary = self._summary(key, today)
+            except FileNotFoundError:
+                continue
+            if "mtime_ns" in summary and self._manifest.get(key) != summary:
+                summaries[key] = summary
+            newest = (datetime.fromisoformat(summary["newest"]) if summary["newest"]
+                      else datetime.strptime(key, PARTITION_FORMAT))
+            units.append({"unit": key, "time": newest, "size": summary["bytes"],
+                          "accessed": summary["accessed"], "records": summary["records"]})
+        if summaries:
+            self._update_manifest(summaries)
+        return units
+
+    def remove_unit(self, unit: str) -> int:
+        path = self.root / unit
+        if not PARTITION_PATTERN.match(unit):
+            raise ValueError(f"Not a cache partition: {unit}")
+        try:
+            records = len(self._partition_names(unit))
+            shutil.rmtree(path)
+        except FileNotFoundError:
+            records = 0
+        except Exception as e:
+            logger.error(f"Failed to delete partition {path}: {e}")
+            return 0
+        self._names.pop(unit, None)
+        self._update_manifest({unit: None})
+        # Drop month and year directories left empty
+        for parent in (path.parent, path.parent.parent):
+            try:
+                parent.rmdir()
+            except OSError:
+                break
+        logger.info(f"Deleted old cache partition: {unit} ({records} records)")
+        return records
+
+    def unit_names(self, unit: str) -> List[str]:
+        return self._partition_names(unit)
+
+    def purge(self):
+        for key in self.partitions():
+            shutil.rmtree(self.root / key, ignore_errors=True)
+            for parent in ((self.root / key).parent, (self.root / key).parent.parent):
+                try:
+                    parent.rmdir()
+                except OSError:
+                    break
+        self._names.clear()
+        with file_lock(self.root / PARTITION_LOCK):
+            self._manifest = {}
+            self._manifest_mtime = None
+            self.manifest_path.unlink(missing_ok=True)
+
+    def adopt_flat_files(self, source: JsonFileStorage) -> int:
+        """Move a flat files-backend directory's records into partitions without re-encoding"""
+        moved = 0
+        for name in source.list_names():
+            path = source.root / name
+            try:
+                when = record_time(name) or datetime.fromtimestamp(path.stat().st_mtime)
+                key = self.partition_of(when)
+                self._ensure_partition(key)
+                os.replace(path, self.root / key / name)
+                self._dirty.add(key)
+                source.listing.discard(name)
+                moved += 1
+            except FileNotFoundError:
+                continue
+        self.sync()
+        return moved
+
+
+class SegmentStorage(CacheStorage):
+    """Append-only rotating segment files with a record-offset footer"""
+
+    name = "segments"
+    listing_suffixes = (SEGMENT_SUFFIX,)
+    listing_sort_key = staticmethod(lambda name: name)
+
+    def __init__(self, root: Path, max_segment_bytes: int = DEFAULT_SEGMENT_BYTES, **kwargs):
+        super().__init__(root, **kwargs)
+        self.max_segment_bytes = max_segment_bytes
+        self._lock = threading.Lock()
+        self._handle = None
+        self._active_path: Optional[Path] = None
+        self._active_offsets: List[int] = []
+        self._active_timestamps: List[str] = []
+        self._active_ids: List[str] = []
+        self._active_end = 0
+        # Segment name -> (size, sealed, scanned end, offsets); appends only grow a segment
+        self._offset_cache: Dict[str, Tuple[int, bool, int, List[int]]] = {}
+        # Unsealed segment name -> size when last offered to retention
+        self._retention_sizes: Dict[str, int] = {}
+
+    # ------------------------------------------------------------------
+    # Segment files
+    # ------------------------------------------------------------------
+
+    def _segment_paths(self) -> List[Path]:
+        return [self.root / name for name in self.listing.names()]
+
+    @staticmethod
+    def _read_footer(path: Path) -> Optional[Dict[str, Any]]:
+        """Return the footer of a sealed segment, or None if still open"""
+        size = path.stat().st_size
+        if size < TRAILER.size:
+            return None
+        with open(path, 'rb') as f:
+            f.seek(size - TRAILER.size)
+            footer_offset, magic = TRAILER.unpack(f.read(TRAILER.size))
+            if magic != SEGMENT_MAGIC:
+                return None
+            f.seek(footer_offset)
+            footer = json.loads(f.read(size - TRAILER.size - footer_offset).decode('utf-8'))
+            footer["footer_offset"] = footer_offset
+            return footer
+
+    @staticmethod
+    def _scan_frames(path: Path, limit: Optional[int] = None, start: int = 0) -> Iterator[Tuple[int, bytes]]:
+        """Sequentially read (offset, payload) frames, stopping at a torn tail"""
+        with open(path, 'rb') as f:
+            f.seek(start)
+            offset = start
+            while limit is None or offset < limit:
+                header = f.read(FRAME_HEADER.size)
+                if len(header) < FRAME_HEADER.size:
+                    break
+                (length,) = FRAME_HEADER.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length:
+                    logger.warning(f"Ignoring truncated record at {path.name}#{offset}")
+                    break
+                yield offset, payload
+                offset += FRAME_HEADER.size + length
+
+    def _segment_offsets(self, path: Path) -> List[int]:
+        """Record offsets of a segment, rescanning only what was appended since last time"""
+        size = path.stat().st_size
+        cached = self._offset_cache.get(path.name)
+        if cached is not None and cached[0] == size:
+            return cached[3]
+
+        footer = self._read_footer(path)
+        if footer is not None:
+            offsets = footer["offsets"]
+            self._offset_cache[path.name] = (size, True, footer["footer_offset"], offsets)
+            return offsets
+
+        if cached is not None and not cached[1] and cached[0] < size:
+            offsets, end = list(cached[3]), cached[2]
+        else:
+            offsets, end = [], 0
+        for offset, payload in self._scan_frames(path, start=end):
+            offsets.append(offset)
+            end = offset + FRAME_HEADER.size + len(payload)
+        self._offset_cache[path.name] = (size, False, end, offsets)
+        return offsets
+
+    @contextmanager
+    def _writer_lock(self):
+        """Serialize appends with other threads and other processes"""
+        with self._lock, file_lock(self.root / SEGMENT_LOCK):
+            self._catch_up_active()
+            yield
+
+    def _reset_active(self):
+        self._active_offsets = []
+        self._active_timestamps = []
+        self._active_ids = []
+        self._active_end = 0
+
+    def _scan_active(self, path: Path, start: int) -> int:
+        """Record frames appended from start on, return the end of the last whole frame"""
+        end = start
+        for offset, payload in self._scan_frames(path, start=start):
+            record = load_record(payload, self.root)
+            self._active_offsets.append(offset)
+            self._active_timestamps.append(record.get("timestamp"))
+            self._active_ids.append(record.get("id"))
+            end = offset + FRAME_HEADER.size + len(payload)
+        return end
+
+    def _catch_up_active(self):
+        """Account for frames other processes appended to the active segment (lock held)"""
+        if self._handle is None:
+            return
+        try:
+            size = self._active_path.stat().st_size
+            if size == self._active_end:
+                return
+            sealed = self._read_footer(self._active_path) is not None
+        except FileNotFoundError:
+            sealed = True
+        if sealed:
+            # Another process sealed it; continue in a new segment
+            self._handle.close()
+            self._handle = None
+            self._active_path = None
+            self._reset_active()
+        else:
+            self._active_end = self._scan_active(self._active_path, self._active_end)
+
+    def _open_active(self):
+        """Open the newest unsealed segment for appending, creating one if needed"""
+        if self._handle is not None:
+            return
+
+        # Other processes may have just created a segment, so list afresh
+        segments = sorted(self.root.glob(f"*{SEGMENT_SUFFIX}"))
+        self._reset_active()
+        if segments and self._read_footer(segments[-1]) is None:
+            path = segments[-1]
+            end = self._scan_active(path, 0)
+            if end != path.stat().st_size:
+                # Drop a torn tail left behind by a crashed writer
+                with open(path, 'r+b') as f:
+                    f.truncate(end)
+            self._active_end = end
+        else:
+            number = max(int(segments[-1].stem) if segments else 0, self._last_sequence()) + 1
+            path = self.root / f"{number:06d}{SEGMENT_SUFFIX}"
+            atomic_write(self.root / SEGMENT_SEQUENCE, str(number).encode('utf-8'))
+
+        self._active_path = path
+        self._handle = open(path, 'ab')
+        self.listing.add(path.name)
+
+    def _last_sequence(self) -> int:
+        try:
+            return int((self.root / SEGMENT_SEQUENCE).read_text(encoding='utf-8'))
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _close_active(self):
+        """Drop the active segment without sealing it (lock held)"""
+        if self._handle is not None:
+            self._handle.close()
+        self._handle = None
+        self._active_path = None
+        self._reset_active()
+
+    def _seal_active(self):
+        """Append the offset footer to the active segment and close it"""
+        if self._handle is None:
+            return
+
+        self._handle.seek(0, os.SEEK_END)
+        footer_offset = self._handle.tell()
+        footer = {
+            "count": len(self._active_offsets),
+            "offsets": self._active_offsets,
+            "timestamps": self._active_timestamps,
+            "ids": self._active_ids,
+        }
+        self._handle.write(json.dumps(footer, separators=(',', ':')).encode('utf-8'))
+        self._handle.write(TRAILER.pack(footer_offset, SEGMENT_MAGIC))
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        self._handle.close()
+
+        self._handle = None
+        self._active_path = None
+        self._reset_active()
+
+    # ------------------------------------------------------------------
+    # Storage API
+    # ------------------------------------------------------------------
+
+    def _append(self, cache_data: Dict[str, Any]) -> str:
+        """Append one frame to the active segment (caller holds the lock)"""
+        payload, _ = self._encode(cache_data)
+        frame = FRAME_HEADER.pack(len(payload)) + payload
+
+        self._open_active()
+        first_timestamp = self._active_timestamps[0] if self._active_timestamps else None
+        timestamp = cache_data.get("timestamp")
+        if first_timestamp and timestamp and first_timestamp[:10] != timestamp[:10]:
+            # Day rollover: one day per segment lets retention expire whole days
+            self._seal_active()
+            self._open_active()
+        self._handle.seek(0, os.SEEK_END)
+        offset = self._handle.tell()
+        self._handle.write(frame)
+
+        self._active_offsets.append(offset)
+        self._active_timestamps.append(cache_data.get("timestamp"))
+        self._active_ids.append(cache_data.get("id"))
+        self._active_end = offset + len(frame)
+        name = f"{self._active_path.name}#{offset}"
+
+        if offset + len(frame) >= self.max_segment_bytes:
+            self._seal_active()
+        return name
+
+    def write(self, cache_data: Dict[str, Any], kind: str) -> Optional[str]:
+        with self._writer_lock():
+            try:
+                name = self._append(cache_data)
+                if self._handle is not None:
+                    self._handle.flush()
+                return name
+            except Exception as e:
+                logger.error(f"Failed to append cache record to {self.root}: {e}")
+                return None
+
+    def write_batch(self, items: List[Tuple[Dict[str, Any], str]]) -> List[Optional[str]]:
+        names = []
+        with self._writer_lock():
+            for cache_data, _ in items:
+                try:
+                    names.append(self._append(cache_data))
+                except Exception as e:
+                    logger.error(f"Failed to append cache record to {self.root}: {e}")
+                    names.append(None)
+            if self._handle is not None:
+                self._handle.flush()
+                os.fsync(self._handle.fileno())
+        return names
+
+    def signature(self) -> List[Any]:
+        # Appends do not touch the directory mtime, so include the newest segment size
+        segments = self._segment_paths()
+        if not segments:
+            return [self.root.stat().st_mtime_ns]
+        newest = segments[-1]
+        return [self.root.stat().st_mtime_ns, newest.name, newest.stat().st_size]
+
+    def _segment_in_range(self, path: Path, since: Optional[datetime], until: Optional[datetime]) -> bool:
+        """Whether a segment may hold records in the range (only sealed footers can rule it out)"""
+        if not (since or until):
+            return True
+        footer = self._read_footer(path)
+        timestamps = [ts for ts in footer["timestamps"] if ts] if footer else None
+        if not timestamps or len(timestamps) < footer["count"]:
+            return True
+        try:
+            oldest, newest = datetime.fromisoformat(min(timestamps)), datetime.fromisoformat(max(timestamps))
+        except ValueError:
+            return True
+        return not ((since and newest < since) or (until and oldest >= until))
+
+    def list_names(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[str]:
+        names = []
+        for path in self._segment_paths():
+            try:
+                if not self._segment_in_range(path, since, until):
+                    continue
+                names.extend(f"{path.name}#{offset}" for offset in self._segment_offsets(path))
+            except Exception as e:
+                logger.error(f"Failed to index segment {path}: {e}")
+        return names
+
+    def list_timed_names(self, since: Optional[datetime] = None,
+                         until: Optional[datetime] = None) -> List[Tuple[str, Optional[datetime]]]:
+        # Sealed footers carry every record's timestamp; the active tail does not
+        timed = []
+        for path in self._segment_paths():
+            try:
+                if not self._segment_in_range(path, since, until):
+                    continue
+                footer = self._read_footer(path)
+                if footer is None:
+                    timed.extend((f"{path.name}#{offset}", None) for offset, _ in self._scan_frames(path))
+                    continue
+                for offset, timestamp in zip(footer["offsets"], footer["timestamps"]):
+                    try:
+                        when = datetime.fromisoformat(timestamp) if timestamp else None
+                    except ValueError:
+                        when = None
+                    if in_time_range(when, since, until):
+                        timed.append((f"{path.name}#{offset}", when))
+            except Exception as e:
+                logger.error(f"Failed to index segment {path}: {e}")
+        return timed
+
+    def iter_records(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for path in self._segment_paths():
+            footer = self._read_footer(path)
+            limit = footer["footer_offset"] if footer is not None else None
+            for offset, payload in self._scan_frames(path, limit):
+                try:
+                    yield f"{path.name}#{offset}", load_record(payload, self.root)
+                except Exception as e:
+                    logger.error(f"Failed to decode {path.name}#{offset}: {e}")
+
+    def compression_stats(self) -> Dict[str, int]:
+        stats = {"records": 0, "compressed": 0, "stored_bytes": 0, "raw_bytes": 0}
+        for path in self._segment_paths():
+            try:
+                offsets = self._segment_offsets(path)
+                with open(path, 'rb') as f:
+                    for offset in offsets:
+                        f.seek(offset)
+                        header = f.read(FRAME_HEADER.size)
+                        if len(header) < FRAME_HEADER.size:
+                            break
+                        (length,) = FRAME_HEADER.unpack(header)
+                        raw_length = compressed_raw_length(f.read(min(length, COMPRESSED_HEADER_SIZE)))
+                        stats["records"] += 1
+                        stats["stored_bytes"] += length
+                        stats["raw_bytes"] += raw_length if raw_length is not None else length
+                        stats["compressed"] += raw_length is not None
+            except FileNotFoundError:
+                continue
+        return stats
+
+    def retention_units(self) -> List[Dict[str, Any]]:
+        """Segments; an unsealed one is timed by its last append (mtime)"""
+        units = []
+        for path in self._segment_paths():
+            try:
+                footer = self._read_footer(path)
+                stat = path.stat()
+                if footer is None:
+                    # Removed only if nothing is appended before remove_unit
+                    self._retention_sizes[path.name] = stat.st_size
+                    units.append({"unit": path.name, "time": datetime.fromtimestamp(stat.st_mtime),
+                                  "size": stat.st_size, "accessed": stat.st_atime,
+                                  "records": len(self._segment_offsets(path))})
+                    continue
+                timestamps = [ts for ts in footer["timestamps"] if ts]
+                newest = (datetime.fromisoformat(max(timestamps)) if timestamps
+                          else datetime.fromtimestamp(stat.st_mtime))
+            except Exception as e:
+                logger.error(f"Failed to inspect segment {path}: {e}")
+                continue
+            units.append({"unit": path.name, "time": newest, "size": stat.st_size,
+                          "accessed": stat.st_atime, "records": footer["count"]})
+        return units
+
+    def remove_unit(self, unit: str) -> int:
+        path = self.root / unit
+        with self._writer_lock():
+            try:
+                footer = self._read_footer(path)
+                if footer is None:
+                    if path.stat().st_size != self._retention_sizes.pop(unit, None):
+                        # Appended to since it was planned for removal
+                        return 0
+                    count = len(self._segment_offsets(path))
+                    if path == self._active_path:
+                        self._close_active()
+                    # Other processes holding it open move on to a new
+                    # segment once they see it gone
+                else:
+                    count = footer["count"]
+                path.unlink()
+                self.listing.discard(unit)
+                self._offset_cache.pop(unit, None)
+                logger.info(f"Deleted old cache segment: {path.name}")
+                return count
+            except FileNotFoundError:
+                return 0
+            except Exception as e:
+                logger.error(f"Failed to delete {path}: {e}")
+                return 0
+
+    def unit_names(self, unit: str) -> List[str]:
+        try:
+            return [f"{unit}#{offset}" for offset in self._segment_offsets(self.root / unit)]
+        except FileNotFoundError:
+            return []
+
+    def sync(self):
+        with self._lock:
+            if self._handle is not None:
+                self._handle.flush()
+                os.fsync(self._handle.fileno())
+
+    def purge(self):
+        with self._writer_lock():
+            self._close_active()
+            for path in self._segment_paths():
+                path.unlink(missing_ok=True)
+                self.listing.discard(path.name)
+            self._offset_cache.clear()
+
+    def seal(self):
+        """Seal the active segment so the next write starts a new one"""
+        with self._writer_lock():
+            self._seal_active()
+
+    def close(self):
+        self.sync()
+        with self._lock:
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+        super().close()
+
+
+STORAGE_BACKENDS = {
+    JsonFileStorage.name: JsonFileStorage,
+    SegmentStorage.name: SegmentStorage,
+    PartitionedFileStorage.name: PartitionedFileStorage,
+}
+
+
+def create_storage(backend: str, root: Path, codec: Optional[str] = None, **options) -> CacheStorage:
+    """Create a storage engine by name
+
+    ``codec``, ``compression`` and ``compression_threshold`` override the
+    backend defaults.
+    """
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown cache storage backend: {backend} "
+                         f"(available: {', '.join(STORAGE_BACKENDS)})")
+    return STORAGE_BACKENDS[backend](root, codec=codec, **options)
+
+
+def resolve_backend(base_path: Path, backend: Optional[str] = None) -> str:
+    """Pick the backend: explicit argument, environment, marker file, then files"""
+    if backend:
+        return backend
+    if os.environ.get(STORAGE_ENV_VAR):
+        return os.environ[STORAGE_ENV_VAR]
+
+    marker = Path(base_path) / STORAGE_MARKER
+    if marker.exists():
+        try:
+            with open(marker, 'r', encoding='utf-8') as f:
+                return json.load(f).get("backend", JsonFileStorage.name)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable storage marker {marker}: {e}")
+    return JsonFileStorage.name
+
+
+def write_backend_marker(base_path: Path, backend: str):
+    """Record the backend a cache directory uses"""
+    marker = {"backend": backend, "updated": datetime.now().isoformat()}
+    atomic_write(Path(base_path) / STORAGE_MARKER, json.dumps(marker, indent=2).encode('utf-8'))
+
+
+def migrate_records(source: CacheStorage, target: CacheStorage, file_type: str,
+                    remove_source: bool = False) -> int:
+    """Copy every record from one storage engine into another"""
+    if (remove_source and type(source) is JsonFileStorage and isinstance(target, PartitionedFileStorage)
+            and source.root == target.root):
+        # Same record files, new place: move them instead of re-encoding
+        return target.adopt_flat_files(source)
+
+    migrated = 0
+    for _, cache_data in source.iter_records():
+        if not cache_data.get("id") and cache_data.get("timestamp"):
+            # Legacy records get an id so they cannot collide in the target
+            cache_data = {"id": new_record_id(datetime.fromisoformat(cache_data["timestamp"])), **cache_data}
+        if target.write(cache_data, infer_kind(file_type, cache_data)) is None:
+            raise IOError(f"Failed to migrate record into {target.root}")
+        migrated += 1
+
+    if isinstance(target, SegmentStorage):
+        target.seal()
+    target.sync()
+
+    if remove_source:
+        source.purge()
+    return migrated
@@ -15,21 +15,22 @@ from datetime import datetime, timedelta
 from pathlib import Path
 import sys
 from collections import defaultdict
+from itertools import groupby
 from typing import Dict, List, Tuple, Any
 
 # Add cache system to path
 sys.path.append(str(Path(__file__).parent))
-from cache import get_simple_cache_system
-from conversation_logger import get_conversation_logger
+from cache_server import connect_cache_system
+from conversation_logger import entry_heading, get_conversation_logger
 
 class CacheViewer:
     """Human-friendly cache viewer and browser"""
     
     def __init__(self):
-        self.cache = get_simple_cache_system()
+        self.cache = connect_cache_system()
         self.logger = get_conversation_logger()
         
-    def show_recent_conversations(self, days: int = 7, format: str = "summary"):
+    def show_recent_conversations(self, days: int = 7, format: str = "summary", session_id: str = None):
         """Show recent conversations in human-readable format"""
         print(f"📅 Recent Conversations (Last {days} days)")
         print("=" * 60)
@@ -56,21 +57,26 @@ class CacheViewer:
                 age_str = f"{days_ago} days ago"
             
             print(f"\n📝 **{date_str}** - {age_str}")
-            print(f"   Size: {size_kb:.1f} KB | File: {file_path.name}")
+            archived = " (archived)" if file_info.get('archived') else ""
+            print(f"   Size: {size_kb:.1f} KB | File: {file_path.name}{archived}")
             
             if format == "preview":
-                self._show_conversation_preview(file_path)
+                self._show_conversation_preview(file_path, session_id=session_id)
             elif format == "full":
-                self._show_conversation_full(file_path)
+                self._show_conversation_full(file_path, session_id=session_id)
     
-    def _show_conversation_preview(self, file_path: Path, max_lines: int = 10):
+    def _session_entries(self, file_path: Path, session_id: str = None) -> List[Dict[str, Any]]:
+        """Index entries of a daily log, optionally of one session only"""
+        entries = self.logger.read_index(file_path)
+        if session_id:
+            entries = [entry for entry in entries if entry.get('session_id') == session_id]
+        return entries
+    
+    def _show_conversation_preview(self, file_path: Path, max_lines: int = 10, session_id: str = None):
         """Show preview of conversation file"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            
-            # Find conversation entries (lines starting with ##)
-            conversation_lines = [line for line in lines if line.strip().startswith('##')]
+            # Entry headings come from the sidecar index, the log itself is not read
+            conversation_lines = [entry_heading(entry) for entry in self._session_entries(file_path, session_id)]
             
             if conversation_lines:
                 print("   Preview:")
@@ -84,11 +90,14 @@ class CacheViewer:
         except Exception as e:
             print(f"   Error reading file: {e}")
     
-    def _show_conversation_full(self, file_path: Path):
+    def _show_conversation_full(self, file_path: Path, session_id: str = None):
         """Show full conversation file"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            if session_id:
+                entries = self._session_entries(file_path, session_id)
+                content = "".join(text for _, text in self.logger.read_entries(file_path, entries))
+            else:
+                content = self.logger.read_text(file_path)
             
             print("\n" + "─" * 60)
             print(content)
@@ -97,36 +106,43 @@ class CacheViewer:
         except Exception as e:
             print(f"   Error reading file: {e}")
     
-    def search_conversations(self, query: str, days: int = 30, context_lines: int = 2):
+    def search_conversations(self, query: str, days: int = 30, context_lines: int = 2,
+                             session_id: str = None, role: str = None, tool: str = None):
         """Search through conversation files"""
         print(f"🔍 Searching for '{query}' in conversations (last {days} days)")
         print("=" * 60)
         
-        recent_files = self.logger.get_recent_conversations(days)
+        needle = query.lower()
         results = []
         
-        for file_info in recent_files:
-            file_path = file_info['path']
+        # Filters are answered by the sidecar indexes; only matching entries are read
+        matches = self.logger.find_entries(days, session_id=session_id, role=role, tool=tool)
+        for file_path, group in groupby(matches, key=lambda match: match[0]['path']):
+            group = list(group)
+            file_info = group[0][0]
             
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
-                
-                # Search for query in lines
-                for i, line in enumerate(lines):
-                    if query.lower() in line.lower():
-                        # Get context around the match
-                        start = max(0, i - context_lines)
-                        end = min(len(lines), i + context_lines + 1)
-                        context = lines[start:end]
-                        
-                        results.append({
-                            'file': file_path,
-                            'line_number': i + 1,
-                            'match_line': line.strip(),
-                            'context': context,
-                            'date': file_info['date']
-                        })
+                for entry, text in self.logger.read_entries(file_path, [entry for _, entry in group]):
+                    if needle not in text.lower():
+                        continue
+                    lines = text.splitlines(keepends=True)
+                    
+                    # Search for query in lines
+                    for i, line in enumerate(lines):
+                        if needle in line.lower():
+                            # Get context around the match
+                            start = max(0, i - context_lines)
+                            end = min(len(lines), i + context_lines + 1)
+                            context = lines[start:end]
+                            
+                            results.append({
+                                'file': file_path,
+                                'entry': entry_heading(entry).lstrip('# '),
+                                'session_id': entry.get('session_id'),
+                                'match_line': line.strip(),
+                                'context': context,
+                                'date': file_info['date']
+                            })
                         
             except Exception as e:
                 print(f"Error searching {file_path}: {e}")
@@ -139,7 +155,9 @@ class CacheViewer:
         
         for i, result in enumerate(results[:10]):  # Show first 10 results
             date_str = result['date'].strftime('%Y-%m-%d')
-            print(f"{i+1}. **{result['file'].name}** (Line {result['line_number']}) - {date_str}")
+            print(f"{i+1}. **{result['file'].name}** ({result['entry']}) - {date_str}")
+            if result['session_id']:
+                print(f"   Session: {result['session_id']}")
             print(f"   Match: {result['match_line']}")
             
             # Show context
@@ -172,6 +190,9 @@ class CacheViewer:
         print(f"   Path: {logger_stats['conversations_path']}")
         print(f"   Total Files: {logger_stats['total_conversation_files']}")
         print(f"   Total Size: {logger_stats['total_size_mb']} MB")
+        if logger_stats['archived_days']:
+            print(f"   Archived: {logger_stats['archived_days']} days "
+                  f"({logger_stats['archive_size_mb']} MB compressed)")
         print(f"   Recent (7 days): {logger_stats['recent_files_7days']} files")
         
         # Recent activity
@@ -242,17 +263,16 @@ class CacheViewer:
             date_obj = datetime.strptime(date, '%Y-%m-%d')
             conv_file = self.logger.conversations_path / f"{date}.md"
             
-            if not conv_file.exists():
+            try:
+                # Old days are read from their monthly archive
+                content = self.logger.read_text(conv_file)
+            except FileNotFoundError:
                 print(f"No conversation found for {date}")
                 return
             
             if not output_file:
                 output_file = f"conversation_{date}_export.md"
             
-            # Copy with some processing
-            with open(conv_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
             # Add export header
             export_content = f"""# 📤 Exported Conversation - {date}
 
@@ -275,6 +295,17 @@ class CacheViewer:
             
         except Exception as e:
             print(f"❌ Export failed: {e}")
+    
+    def archive_conversations(self, older_than_days: int = None):
+        """Compress old daily logs into monthly archives"""
+        report = self.logger.archive(older_than_days)
+        if not report['archived_days']:
+            print("Nothing to archive")
+            return
+        
+        saved = report['bytes_before'] - report['bytes_after']
+        print(f"🗜️  Archived {report['archived_days']} days into {', '.join(report['archives'])}")
+        print(f"   {report['bytes_before']:,} -> {report['bytes_after']:,} bytes ({saved:,} bytes saved)")
 
 def main():
     """Main CLI interface"""
@@ -286,12 +317,16 @@ def main():
     recent_parser.add_argument("--days", type=int, default=7, help="Number of days to look back")
     recent_parser.add_argument("--format", choices=["summary", "preview", "full"], 
                               default="summary", help="Display format")
+    recent_parser.add_argument("--session", help="Only show entries of this session")
     
     # Search conversations
     search_parser = subparsers.add_parser("search", help="Search conversations")
     search_parser.add_argument("query", help="Search query")
     search_parser.add_argument("--days", type=int, default=30, help="Days to search back")
     search_parser.add_argument("--context", type=int, default=2, help="Context lines around matches")
+    search_parser.add_argument("--session", help="Only search entries of this session")
+    search_parser.add_argument("--role", choices=["user", "claude", "tool"], help="Only search entries of this role")
+    search_parser.add_argument("--tool", help="Only search entries that used this tool")
     
     # Summary
     subparsers.add_parser("summary", help="Show cache system summary")
@@ -305,6 +340,11 @@ def main():
     export_parser.add_argument("date", help="Date in YYYY-MM-DD format")
     export_parser.add_argument("--output", help="Output filename")
     
+    # Archive old conversations
+    archive_parser = subparsers.add_parser("archive", help="Compress old conversation logs into monthly archives")
+    archive_parser.add_argument("--older-than", type=int,
+                                help="Archive days older than this (default: CONVERSATION_ARCHIVE_DAYS or 30)")
+    
     args = parser.parse_args()
     
     if not args.command:
@@ -315,15 +355,18 @@ def main():
     
     try:
         if args.command == "recent":
-            viewer.show_recent_conversations(args.days, args.format)
+            viewer.show_recent_conversations(args.days, args.format, args.session)
         elif args.command == "search":
-            viewer.search_conversations(args.query, args.days, args.context)
+            viewer.search_conversations(args.query, args.days, args.context,
+                                        session_id=args.session, role=args.role, tool=args.tool)
         elif args.command == "summary":
             viewer.show_cache_summary()
         elif args.command == "session":
             viewer.show_session_thread(args.session_id)
         elif args.command == "export":
             viewer.export_conversation(args.date, args.output)
+        elif args.command == "archive":
+            viewer.archive_conversations(args.older_than)
     except Exception as e:
         print(f"❌ Error: {e}")
         sys.exit(1)
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Cache Directory Listings
+
+Sorted in-memory listings of cache directories that are kept current
+incrementally instead of re-globbing on every ``list_names`` call:
+
+- ``inotify`` (Linux): create/delete/rename events are drained on each
+  lookup and applied to the listing; a queue overflow triggers a rescan
+- ``poll``: the directory ``st_mtime_ns`` is compared on each lookup and
+  only a changed directory is re-listed, with the difference applied to
+  the sorted view
+
+A directory modified within ``RACY_SECONDS`` of its last scan is scanned
+again on the next lookup, so entries created within the same mtime tick
+are never missed. The mode is chosen with ``CACHE_WATCH`` (``auto``,
+``inotify`` or ``poll``).
+
+Author: Claude Code Research System
+Version: 1.0.0
+"""
+
+import bisect
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+WATCH_ENV_VAR = "CACHE_WATCH"
+WATCH_MODES = ("auto", "inotify", "poll")
+RACY_SECONDS = 2.0
+
+# <sys/inotify.h>
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_EVENT = struct.Struct("iIII")
+
+WATCH_MASK = (IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE |
+              IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+ADDED = IN_CREATE | IN_MOVED_TO
+REMOVED = IN_DELETE | IN_MOVED_FROM
+LOST = IN_Q_OVERFLOW | IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF
+
+_libc = None
+
+
+def _load_libc():
+    global _libc
+    if _libc is None and sys.platform.startswith("linux"):
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            libc.inotify_init1, libc.inotify_add_watch
+            _libc = libc
+        except (OSError, AttributeError):
+            _libc = False
+    return _libc or None
+
+
+def inotify_available() -> bool:
+    return _load_libc() is not None
+
+
+class InotifyWatch:
+    """Non-blocking inotify watch on one directory"""
+
+    mode = "inotify"
+
+    def __init__(self, path: Path):
+        libc = _load_libc()
+        if libc is None:
+            raise OSError("inotify is not available on this platform")
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(str(path)), WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {path}")
+
+    def poll(self) -> Optional[List[Tuple[int, str]]]:
+        """Pending (mask, name) events, or None when the listing must be rescanned"""
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset < len(data):
+                _, mask, _, length = IN_EVENT.unpack_from(data, offset)
+                offset += IN_EVENT.size
+                name = data[offset:offset + length].rstrip(b"\0").decode("utf-8", "surrogateescape")
+                offset += length
+                if mask & LOST:
+                    return None
+                events.append((mask, name))
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class PollWatch:
+    """Directory mtime polling, for platforms without inotify"""
+
+    mode = "poll"
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._mtime_ns: Optional[int] = None
+        self._racy = True
+
+    def poll(self) -> Optional[List[Tuple[int, str]]]:
+        """No events when unchanged, None when the directory must be re-listed"""
+        mtime_ns = self.path.stat().st_mtime_ns
+        if mtime_ns == self._mtime_ns and not self._racy:
+            return []
+        self._mtime_ns = mtime_ns
+        self._racy = time.time() - mtime_ns / 1e9 < RACY_SECONDS
+        return None
+
+    def close(self):
+        pass
+
+
+def create_watch(path: Path, mode: Optional[str] = None):
+    """Watch for path using CACHE_WATCH (auto prefers inotify)"""
+    mode = mode or os.getenv(WATCH_ENV_VAR) or "auto"
+    if mode not in WATCH_MODES:
+        raise ValueError(f"Unknown watch mode: {mode} (available: {', '.join(WATCH_MODES)})")
+    if mode in ("auto", "inotify"):
+        try:
+            return InotifyWatch(path)
+        except OSError as e:
+            if mode == "inotify":
+                raise
+            logger.debug(f"inotify unavailable for {path}, polling instead: {e}")
+    return PollWatch(path)
+
+
+class DirectoryListing:
+    """Sorted view of the entries of one directory with matching suffixes"""
+
+    def __init__(self, root: Path, suffixes: Iterable[str], sort_key: Callable[[str], Any],
+                 mode: Optional[str] = None):
+        self.root = Path(root)
+        self.suffixes = tuple(suffixes)
+        self.sort_key = sort_key
+        self._names: List[str] = []
+        self._keys: List[Any] = []
+        self._members = set()
+        self._lock = threading.Lock()
+        self.rescans = 0
+        # Watch first so nothing created during the initial scan is lost
+        self.watch = create_watch(self.root, mode)
+        self.mode = self.watch.mode
+        self.watch.poll()
+        self._rescan()
+
+    def _matches(self, name: str) -> bool:
+        return name.endswith(self.suffixes)
+
+    def _insert(self, name: str):
+        if name in self._members:
+            return
+        key = self.sort_key(name)
+        position = bisect.bisect_right(self._keys, key)
+        self._keys.insert(position, key)
+        self._names.insert(position, name)
+        self._members.add(name)
+
+    def _remove(self, name: str):
+        if name not in self._members:
+            return
+        key = self.sort_key(name)
+        position = bisect.bisect_left(self._keys, key)
+        while self._names[position] != name:
+            position += 1
+        del self._keys[position]
+        del self._names[position]
+        self._members.discard(name)
+
+    def _rescan(self):
+        """Re-list the directory and apply only the difference"""
+        current = {entry.name for entry in os.scandir(self.root)
+                   if self._matches(entry.name) and entry.is_file()}
+        added = current - self._members
+        removed = self._members - current
+        if len(added) + len(removed) > len(self._names) // 4:
+            names = sorted(current, key=self.sort_key)
+            self._names, self._keys, self._members = names, [self.sort_key(n) for n in names], current
+        else:
+            for name in removed:
+                self._remove(name)
+            for name in added:
+                self._insert(name)
+        self.rescans += 1
+
+    def _update(self):
+        events = self.watch.poll()
+        if events is None:
+            self._rescan()
+            return
+        for mask, name in events:
+            if not self._matches(name):
+                continue
+            if mask & ADDED:
+                self._insert(name)
+            elif mask & REMOVED:
+                self._remove(name)
+
+    def names(self) -> List[str]:
+        """Current sorted entry names"""
+        with self._lock:
+            self._update()
+            return list(self._names)
+
+    def add(self, name: str):
+        """Record an entry created by this process"""
+        with self._lock:
+            self._insert(name)
+
+    def discard(self, name: str):
+        """Record an entry removed by this process"""
+        with self._lock:
+            self._remove(name)
+
+    def close(self):
+        self.watch.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"mode": self.mode, "entries": len(self._names), "rescans": self.rescans}
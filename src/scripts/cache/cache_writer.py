@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Background Cache Writer
+
+Write-behind queue for SimpleCacheSystem. Callers only build the record
+(timestamp and id are taken at call time) and enqueue it; a worker thread
+serializes records and writes them in fsync'd batches.
+
+Backpressure policies when the queue is full:
+
+- ``block``: the caller waits for room
+- ``drop_oldest``: the oldest queued record is discarded
+- ``spill``: the record is appended to a spill file on disk and replayed
+  by the worker once the queue drains
+
+Records submitted while the worker is not running (before ``start`` or
+after ``stop``) are written synchronously.
+
+Author: Claude Code Research System
+Version: 1.0.0
+"""
+
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+BACKPRESSURE_POLICIES = ("block", "drop_oldest", "spill")
+
+
+class BackgroundCacheWriter:
+    """Bounded queue drained by a worker thread into batched writes"""
+
+    def __init__(self, cache, max_queue: int = 1000, batch_size: int = 100,
+                 flush_interval: float = 1.0, backpressure: str = "block",
+                 spill_dir: Optional[Path] = None):
+        if backpressure not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {backpressure} "
+                             f"(available: {', '.join(BACKPRESSURE_POLICIES)})")
+
+        self.cache = cache
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.backpressure = backpressure
+        self.spill_dir = Path(spill_dir) if spill_dir else cache.base_path / "spill"
+        self.spill_path = self.spill_dir / f"writer-{os.getpid()}.ndjson"
+
+        self._queue: "queue.Queue[Tuple[str, Dict[str, Any], str]]" = queue.Queue(maxsize=max_queue)
+        self._spill_lock = threading.Lock()
+        self._spilled = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+        self._stats_lock = threading.Lock()
+        self.stats = {"queued": 0, "written": 0, "failed": 0, "dropped": 0,
+                      "spilled": 0, "batches": 0}
+
+    def _count(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Start the worker thread and replay spill files left by dead writers"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._recover_orphaned_spills()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="cache-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+        logger.info(f"Background cache writer started ({self.backpressure}, "
+                    f"batch={self.batch_size}, interval={self.flush_interval}s)")
+
+    def stop(self):
+        """Flush everything that is queued or spilled, then stop the worker"""
+        if self._thread is None:
+            return
+        self.flush()
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        # Anything submitted while stopping is written synchronously
+        self._write_batch(self._drain_queue())
+        self._write_batch(self._take_spilled())
+        atexit.unregister(self.stop)
+        logger.info(f"Background cache writer stopped: {self.stats}")
+
+    def flush(self):
+        """Block until every submitted record has been written"""
+        if self._thread is None or not self._thread.is_alive():
+            self._write_batch(self._drain_queue())
+            self._write_batch(self._take_spilled())
+            return
+        self._queue.join()
+        while self._spilled:
+            self._queue.join()
+            time.sleep(0.01)
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+
+    def submit(self, file_type: str, cache_data: Dict[str, Any], kind: str) -> str:
+        """Queue a record for writing and return its id"""
+        item = (file_type, cache_data, kind)
+        self._count("queued")
+
+        if self._thread is None or self._stop_event.is_set():
+            # No worker is left to drain the queue: write synchronously
+            self._write_batch([item])
+        elif self.backpressure == "block":
+            self._queue.put(item)
+        else:
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                if self.backpressure == "drop_oldest":
+                    self._drop_oldest()
+                    self._queue.put(item)
+                else:
+                    self._spill(item)
+        return cache_data["id"]
+
+    def _drop_oldest(self):
+        try:
+            self._queue.get_nowait()
+            self._queue.task_done()
+            self._count("dropped")
+        except queue.Empty:
+            pass
+
+    def _spill(self, item: Tuple[str, Dict[str, Any], str]):
+        line = json.dumps(item, ensure_ascii=False, separators=(',', ':')) + "\n"
+        with self._spill_lock:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.spill_path, 'a', encoding='utf-8') as f:
+                f.write(line)
+            self._spilled += 1
+            self._count("spilled")
+
+    def _take_spilled(self) -> List[Tuple[str, Dict[str, Any], str]]:
+        with self._spill_lock:
+            if not self._spilled:
+                return []
+            items = self._read_spill_file(self.spill_path)
+            self.spill_path.unlink()
+            self._spilled = 0
+            return items
+
+    @staticmethod
+    def _read_spill_file(path: Path) -> List[Tuple[str, Dict[str, Any], str]]:
+        items = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    items.append(tuple(json.loads(line)))
+                except ValueError:
+                    continue
+        return items
+
+    def _recover_orphaned_spills(self):
+        """Write out spill files whose owning process is gone"""
+        if not self.spill_dir.exists():
+            return
+        for path in self.spill_dir.glob("writer-*.ndjson"):
+            try:
+                pid = int(path.stem.split("-", 1)[1])
+            except ValueError:
+                continue
+            if pid != os.getpid() and _pid_alive(pid):
+                continue
+            items = self._read_spill_file(path)
+            self._write_batch(items)
+            path.unlink()
+            logger.info(f"Recovered {len(items)} spilled cache records from {path.name}")
+
+    # ------------------------------------------------------------------
+    # Worker side
+    # ------------------------------------------------------------------
+
+    def _drain_queue(self) -> List[Tuple[str, Dict[str, Any], str]]:
+        items = []
+        while True:
+            try:
+                items.append(self._queue.get_nowait())
+                self._queue.task_done()
+            except queue.Empty:
+                return items
+
+    def _write_batch(self, items: List[Tuple[str, Dict[str, Any], str]]):
+        if not items:
+            return
+        try:
+            paths = self.cache.write_records(items)
+            failed = sum(1 for path in paths if path is None)
+        except Exception as e:
+            logger.error(f"Failed to write batch of {len(items)} cache records: {e}")
+            failed = len(items)
+        self._count("written", len(items) - failed)
+        self._count("failed", failed)
+        self._count("batches")
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._write_batch(self._take_spilled())
+                continue
+
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # Spilled records go after the in-memory batch they overflowed from
+            spilled = self._take_spilled() if self._queue.empty() else []
+            self._write_batch(batch + spilled)
+            for _ in batch:
+                self._queue.task_done()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
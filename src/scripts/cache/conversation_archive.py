@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Conversation Log Archives
+
+Monthly archives of old daily conversation logs. ``archive/YYYY-MM.mdz``
+holds the Markdown of every archived day of that month, compressed with
+zlib in independent blocks of about 64 KB, then a JSON table of contents
+and a fixed trailer:
+
+    [block][block]...[table of contents][>Q contents offset][8s magic]
+
+The table of contents maps each day to its uncompressed size, its blocks
+(uncompressed start, offset, length) and its sidecar index entries, so an
+entry is read by decompressing only the blocks its byte range overlaps
+and the archive replaces both the ``.md`` and the ``.idx`` file. zlib
+keeps archives readable on every installation.
+
+Author: Claude Code Research System
+Version: 1.0.0
+"""
+
+import json
+import struct
+import zlib
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+import logging
+
+from cache_locks import atomic_write
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIR = "archive"
+ARCHIVE_SUFFIX = ".mdz"
+ARCHIVE_MAGIC = b"CVARCH01"
+TRAILER = struct.Struct(">Q8s")
+BLOCK_SIZE = 64 * 1024
+COMPRESSION_LEVEL = 6
+
+
+def archive_path_for(conversations_path: Path, day: str) -> Path:
+    """Monthly archive holding a YYYY-MM-DD day"""
+    return Path(conversations_path) / ARCHIVE_DIR / f"{day[:7]}{ARCHIVE_SUFFIX}"
+
+
+class ConversationArchive:
+    """Read access to one monthly archive"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._toc: Optional[Dict[str, Dict[str, Any]]] = None
+        self._identity = None
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def toc(self) -> Dict[str, Dict[str, Any]]:
+        """Table of contents, reread only when the archive was replaced"""
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            self._toc, self._identity = None, None
+            return {}
+        identity = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if self._toc is None or identity != self._identity:
+            with open(self.path, 'rb') as f:
+                f.seek(-TRAILER.size, 2)
+                toc_offset, magic = TRAILER.unpack(f.read(TRAILER.size))
+                if magic != ARCHIVE_MAGIC:
+                    raise ValueError(f"not a conversation archive: {self.path}")
+                f.seek(toc_offset)
+                toc_bytes = f.read(st.st_size - TRAILER.size - toc_offset)
+            self._toc = json.loads(toc_bytes.decode('utf-8'))
+            self._identity = identity
+        return self._toc
+
+    def days(self) -> List[str]:
+        return sorted(self.toc())
+
+    def index(self, day: str) -> List[Dict[str, Any]]:
+        """Sidecar index entries of an archived day"""
+        return self.toc()[day]['index']
+
+    def size(self, day: str) -> int:
+        """Uncompressed size of an archived day"""
+        return self.toc()[day]['size']
+
+    def read(self, day: str, offset: int = 0, length: Optional[int] = None) -> bytes:
+        """Bytes [offset, offset + length) of a day's Markdown"""
+        info = self.toc()[day]
+        end = info['size'] if length is None else min(offset + length, info['size'])
+        if offset >= end:
+            return b""
+        blocks = info['blocks']
+        starts = [block[0] for block in blocks]
+        first = max(bisect_right(starts, offset) - 1, 0)
+        chunks = []
+        with open(self.path, 'rb') as f:
+            for raw_start, block_offset, block_length in blocks[first:]:
+                if raw_start >= end:
+                    break
+                f.seek(block_offset)
+                chunks.append(zlib.decompress(f.read(block_length)))
+        data = b"".join(chunks)
+        base = blocks[first][0]
+        return data[offset - base:end - base]
+
+    def raw_blocks(self, day: str) -> List[bytes]:
+        """Compressed blocks of a day, for copying into a rewritten archive"""
+        with open(self.path, 'rb') as f:
+            blocks = []
+            for _, block_offset, block_length in self.toc()[day]['blocks']:
+                f.seek(block_offset)
+                blocks.append(f.read(block_length))
+        return blocks
+
+
+def compress_blocks(data: bytes) -> List[Tuple[int, bytes]]:
+    """(uncompressed start, compressed block) pairs of data"""
+    return [(start, zlib.compress(data[start:start + BLOCK_SIZE], COMPRESSION_LEVEL))
+            for start in range(0, len(data), BLOCK_SIZE)]
+
+
+def write_archive(path: Path, days: Dict[str, Tuple[bytes, List[Dict[str, Any]]]],
+                  existing: Optional[ConversationArchive] = None) -> int:
+    """Write (or rewrite) a monthly archive with days added to it, return its size
+
+    Days already in the existing archive keep their compressed blocks
+    unless ``days`` holds a newer copy of them.
+    """
+    chunks: List[bytes] = []
+    offset = 0
+    toc: Dict[str, Dict[str, Any]] = {}
+
+    def add(day: str, size: int, entries: List[Dict[str, Any]], blocks: List[Tuple[int, bytes]]):
+        nonlocal offset
+        layout = []
+        for raw_start, block in blocks:
+            layout.append([raw_start, offset, len(block)])
+            chunks.append(block)
+            offset += len(block)
+        toc[day] = {'size': size, 'blocks': layout, 'index': entries}
+
+    if existing is not None and existing.exists():
+        for day in existing.days():
+            if day in days:
+                continue
+            info = existing.toc()[day]
+            add(day, info['size'], info['index'],
+                list(zip((block[0] for block in info['blocks']), existing.raw_blocks(day))))
+    for day in sorted(days):
+        data, entries = days[day]
+        add(day, len(data), entries, compress_blocks(data))
+
+    toc_bytes = json.dumps(dict(sorted(toc.items())), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    payload = b"".join(chunks) + toc_bytes + TRAILER.pack(offset, ARCHIVE_MAGIC)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    atomic_write(path, payload, fsync=True)
+    return len(payload)
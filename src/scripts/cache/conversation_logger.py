@@ -5,25 +5,251 @@ Conversation Logger - Markdown Format
 Generates human-readable conversation logs in Markdown format.
 Creates daily conversation files that are easy to read and browse.
 
+Events go through one DailyLogWriter: the day's file stays open and
+events are buffered for at most CONVERSATION_FLUSH_SECONDS (default 1s,
+0 = write every event immediately) instead of being opened, appended and
+closed one by one.
+
+Next to every ``YYYY-MM-DD.md`` the writer keeps a sidecar index
+``YYYY-MM-DD.idx`` (one JSON line per entry: byte offset, length, role,
+session id, timestamp, tool names). Previews, session filters and search
+read the index and seek to the entries they need. Logs written before the
+index existed are indexed on first read by parsing their headings.
+
+Days older than CONVERSATION_ARCHIVE_DAYS are moved into compressed
+monthly archives (see conversation_archive.py) by ``archive``. Every
+reader below resolves a day's path to its archive when the ``.md`` file
+is gone, so history stays searchable while the directory stays small.
+
 Author: Claude Code Research System
 Version: 1.0.0
 """
 
+import atexit
+import json
 import os
+import re
 import sys
-from datetime import datetime
+import threading
+from datetime import date as Date, datetime, timedelta
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, Iterator, List, Tuple
 import logging
 
+# Add cache system to path
+sys.path.append(str(Path(__file__).parent))
+from cache_locks import atomic_write, file_lock
+from conversation_archive import ARCHIVE_DIR, ARCHIVE_SUFFIX, ConversationArchive, archive_path_for, write_archive
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+FLUSH_ENV_VAR = "CONVERSATION_FLUSH_SECONDS"
+DEFAULT_FLUSH_SECONDS = 1.0
+MAX_PENDING_BYTES = 64 * 1024
+ARCHIVE_ENV_VAR = "CONVERSATION_ARCHIVE_DAYS"
+DEFAULT_ARCHIVE_DAYS = 30
+INDEX_SUFFIX = ".idx"
+LOCK_NAME = ".conversations.lock"
+HEADING_PATTERN = re.compile(r'^#{2,3} (\d{2}:\d{2}:\d{2}) - (?:👤 (User)|🤖 (Claude)|🔧 Tool: (.*))$')
+
+
+def default_flush_seconds() -> float:
+    """Flush delay from CONVERSATION_FLUSH_SECONDS"""
+    try:
+        return max(float(os.environ[FLUSH_ENV_VAR]), 0.0)
+    except (KeyError, ValueError):
+        return DEFAULT_FLUSH_SECONDS
+
+
+def default_archive_days() -> int:
+    """Age in days after which logs are archived, from CONVERSATION_ARCHIVE_DAYS (0 = never)"""
+    try:
+        return max(int(os.environ[ARCHIVE_ENV_VAR]), 0)
+    except (KeyError, ValueError):
+        return DEFAULT_ARCHIVE_DAYS
+
+
+def index_path_for(log_path: Path) -> Path:
+    """Sidecar index of a daily Markdown log"""
+    return Path(log_path).with_suffix(INDEX_SUFFIX)
+
+
+def entry_heading(entry: Dict[str, Any]) -> str:
+    """Markdown heading of an indexed entry"""
+    time_str = entry['timestamp'][11:19] if len(entry.get('timestamp') or '') >= 19 else '--:--:--'
+    if entry['role'] == 'user':
+        return f"## {time_str} - 👤 User"
+    if entry['role'] == 'claude':
+        return f"## {time_str} - 🤖 Claude"
+    tools = entry.get('tools') or ['Unknown']
+    return f"### {time_str} - 🔧 Tool: {tools[0]}"
+
+
+def scan_entries(data: bytes, start: int, day: Date) -> List[Dict[str, Any]]:
+    """Index entries of Markdown bytes beginning at file offset start, found by their headings
+
+    Used for logs (or tails of logs) written without a sidecar index; the
+    session id is not part of the Markdown and stays None.
+    """
+    entries: List[Dict[str, Any]] = []
+    position = start
+    for line in data.splitlines(keepends=True):
+        match = HEADING_PATTERN.match(line.decode('utf-8', errors='replace').rstrip('\n'))
+        if match:
+            if entries:
+                entries[-1]['length'] = position - entries[-1]['offset']
+            time_str, user, claude, tool = match.groups()
+            entries.append({
+                'offset': position,
+                'length': 0,
+                'role': 'user' if user else 'claude' if claude else 'tool',
+                'session_id': None,
+                'timestamp': f"{day.isoformat()}T{time_str}",
+                'tools': [tool] if tool else []
+            })
+        position += len(line)
+    if entries:
+        entries[-1]['length'] = position - entries[-1]['offset']
+    return entries
+
+
+def parse_index(data: bytes) -> List[Dict[str, Any]]:
+    """Entries of a sidecar index, skipping a torn last line"""
+    entries = []
+    for line in data.split(b"\n"):
+        if not line:
+            continue
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            logger.warning("Skipping unreadable conversation index line")
+    return entries
+
+
+class DailyLogWriter:
+    """Append handle on the current day's conversation file
+
+    - the file is opened once per day and switched at the first event
+      after midnight; a new (empty) file gets the day header first
+    - events are buffered and written with a single append at most
+      ``flush_seconds`` after they arrive (0 = every event), or as soon as
+      MAX_PENDING_BYTES accumulate
+    - each flush also appends one line per event to the day's sidecar
+      index (``YYYY-MM-DD.idx``): byte offset and length in the Markdown
+      file, role, session id, timestamp and tool names. Flushes hold
+      ``.conversations.lock`` so offsets stay exact when several
+      processes log to the same day
+    - a file removed or renamed while open is recreated on the next flush
+    - ``close`` flushes what is pending; ConversationLogger registers it
+      with atexit so a normal interpreter exit loses nothing
+    """
+
+    def __init__(self, directory: Path, header: Callable[[datetime], str],
+                 flush_seconds: Optional[float] = None):
+        self.directory = Path(directory)
+        self.header = header
+        self.flush_seconds = default_flush_seconds() if flush_seconds is None else flush_seconds
+        self.lock_path = self.directory / LOCK_NAME
+        self.path: Optional[Path] = None
+        self._date = None
+        self._handle = None
+        self._index_handle = None
+        self._pending: List[Tuple[bytes, Optional[Dict[str, Any]]]] = []
+        self._pending_bytes = 0
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+
+    def _open(self, day):
+        """Open the Markdown file and sidecar index of a day"""
+        self.path = self.directory / day.strftime('%Y-%m-%d.md')
+        # Unbuffered: every flush is one O_APPEND write per file
+        self._handle = open(self.path, 'ab', buffering=0)
+        self._index_handle = open(index_path_for(self.path), 'ab', buffering=0)
+        self._date = day
+
+    def _close_handle(self):
+        for handle in (self._handle, self._index_handle):
+            if handle is not None:
+                handle.close()
+        self._handle = self._index_handle = None
+        self._date = None
+
+    def write(self, text: str, when: Optional[datetime] = None,
+              entry: Optional[Dict[str, Any]] = None) -> Path:
+        """Queue text (and its index entry) for when's daily file and return that file"""
+        when = when or datetime.now()
+        data = text.encode('utf-8')
+        with self._lock:
+            if self._date != when.date():
+                # Midnight rollover: what is pending belongs to the old day
+                self._flush_locked()
+                self._close_handle()
+                self._open(when.date())
+            self._pending.append((data, entry))
+            self._pending_bytes += len(data)
+            if self.flush_seconds <= 0 or self._pending_bytes >= MAX_PENDING_BYTES:
+                self._flush_locked()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.flush_seconds, self._timed_flush)
+                self._timer.daemon = True
+                self._timer.start()
+            return self.path
+
+    def _timed_flush(self):
+        with self._lock:
+            self._timer = None
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending or self._handle is None:
+            return
+        with file_lock(self.lock_path):
+            if any(os.fstat(handle.fileno()).st_nlink == 0 for handle in (self._handle, self._index_handle)):
+                # A file was deleted or moved away while open
+                day = self._date
+                self._close_handle()
+                self._open(day)
+
+            offset = os.fstat(self._handle.fileno()).st_size
+            chunks, index_lines = [], []
+            if offset == 0:
+                header = self.header(datetime.combine(self._date, datetime.min.time())).encode('utf-8')
+                chunks.append(header)
+                offset = len(header)
+            for data, entry in self._pending:
+                if entry is not None:
+                    index_lines.append(json.dumps({'offset': offset, 'length': len(data), **entry},
+                                                  ensure_ascii=False, separators=(',', ':')) + "\n")
+                chunks.append(data)
+                offset += len(data)
+            self._pending = []
+            self._pending_bytes = 0
+
+            self._handle.write(b"".join(chunks))
+            if index_lines:
+                self._index_handle.write("".join(index_lines).encode('utf-8'))
+
+    def flush(self):
+        """Write pending events now"""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        """Flush and release the file handle"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._flush_locked()
+            self._close_handle()
+
+
 class ConversationLogger:
     """Human-readable conversation logger"""
     
-    def __init__(self, base_path: str = "src/dev/cache"):
+    def __init__(self, base_path: str = "src/dev/cache", flush_seconds: Optional[float] = None):
         self.base_path = Path(base_path)
         self.conversations_path = self.base_path / "conversations"
         self.conversations_path.mkdir(parents=True, exist_ok=True)
@@ -31,6 +257,14 @@ class ConversationLogger:
         # Create index file
         self.index_file = self.conversations_path / "README.md"
         self._ensure_index_file()
+        
+        # One open append handle for the current day
+        self.writer = DailyLogWriter(self.conversations_path, self._daily_header, flush_seconds)
+        atexit.register(self.writer.close)
+        
+        # Monthly archives of old days, by path
+        self.archive_path = self.conversations_path / ARCHIVE_DIR
+        self._archives: Dict[Path, ConversationArchive] = {}
     
     def _ensure_index_file(self):
         """Ensure index file exists with header"""
@@ -73,34 +307,47 @@ This directory contains human-readable conversation logs in Markdown format.
         
         return datetime.now().strftime('%H:%M:%S')
     
-    def _ensure_daily_header(self, log_path: Path, date: datetime):
-        """Ensure daily log has proper header"""
-        if not log_path.exists():
-            with open(log_path, 'w', encoding='utf-8') as f:
-                date_str = date.strftime('%Y-%m-%d (%A)')
-                f.write(f"""# 📅 Conversation Log - {date_str}
+    def _daily_header(self, date: datetime) -> str:
+        """Header written at the top of a new daily log"""
+        date_str = date.strftime('%Y-%m-%d (%A)')
+        return f"""# 📅 Conversation Log - {date_str}
 
 > Generated by Claude Code Cache System
 
 ---
 
-""")
+"""
+    
+    def _index_entry(self, role: str, session_id: str, timestamp: Optional[str],
+                     tools: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Sidecar index fields of one event"""
+        when = None
+        if timestamp:
+            try:
+                when = datetime.fromisoformat(timestamp)
+            except ValueError:
+                pass
+        return {
+            'role': role,
+            'session_id': session_id,
+            'timestamp': (when or datetime.now()).isoformat(timespec='seconds'),
+            'tools': tools or []
+        }
+    
+    def close(self):
+        """Flush pending events and close the daily file"""
+        self.writer.close()
     
     def log_user_prompt(self, session_id: str, prompt: str, timestamp: str = None) -> bool:
         """Log user prompt to daily conversation log"""
         try:
-            now = datetime.now()
-            log_path = self._get_daily_log_path(now)
-            self._ensure_daily_header(log_path, now)
-            
             time_str = self._format_timestamp(timestamp)
             
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(f"""## {time_str} - 👤 User
+            log_path = self.writer.write(f"""## {time_str} - 👤 User
 
 {prompt}
 
-""")
+""", entry=self._index_entry('user', session_id, timestamp))
             
             logger.info(f"User prompt logged to {log_path.name}")
             return True
@@ -112,39 +359,38 @@ This directory contains human-readable conversation logs in Markdown format.
     def log_claude_response(self, session_id: str, response: str, tools_used: list = None, timestamp: str = None) -> bool:
         """Log Claude's response to daily conversation log"""
         try:
-            now = datetime.now()
-            log_path = self._get_daily_log_path(now)
-            self._ensure_daily_header(log_path, now)
-            
             time_str = self._format_timestamp(timestamp)
             
             # Clean up response formatting
             response = response.strip()
             
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(f"""## {time_str} - 🤖 Claude
+            parts = [f"""## {time_str} - 🤖 Claude
 
 {response}
 
-""")
-                
-                # Add tools used if any
-                if tools_used:
-                    f.write(f"""<details>
+"""]
+            
+            # Add tools used if any
+            if tools_used:
+                parts.append(f"""<details>
 <summary>🔧 Tools Used ({len(tools_used)})</summary>
 
 """)
-                    for tool in tools_used:
-                        if isinstance(tool, dict):
-                            tool_name = tool.get('name', 'Unknown')
-                            f.write(f"- **{tool_name}**\n")
-                        else:
-                            f.write(f"- {tool}\n")
-                    
-                    f.write("\n</details>\n\n")
+                for tool in tools_used:
+                    if isinstance(tool, dict):
+                        tool_name = tool.get('name', 'Unknown')
+                        parts.append(f"- **{tool_name}**\n")
+                    else:
+                        parts.append(f"- {tool}\n")
                 
-                # Add session separator
-                f.write("---\n\n")
+                parts.append("\n</details>\n\n")
+            
+            # Add session separator
+            parts.append("---\n\n")
+            tool_names = [tool.get('name', 'Unknown') if isinstance(tool, dict) else str(tool)
+                          for tool in tools_used or []]
+            log_path = self.writer.write("".join(parts),
+                                         entry=self._index_entry('claude', session_id, timestamp, tool_names))
             
             logger.info(f"Claude response logged to {log_path.name}")
             return True
@@ -156,86 +402,279 @@ This directory contains human-readable conversation logs in Markdown format.
     def log_tool_execution(self, session_id: str, tool_name: str, tool_input: dict, tool_output: dict = None, timestamp: str = None) -> bool:
         """Log tool execution to conversation log"""
         try:
-            now = datetime.now()
-            log_path = self._get_daily_log_path(now)
-            self._ensure_daily_header(log_path, now)
-            
             time_str = self._format_timestamp(timestamp)
             
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(f"""### {time_str} - 🔧 Tool: {tool_name}
+            parts = [f"""### {time_str} - 🔧 Tool: {tool_name}
 
-""")
-                
-                # Show key input parameters
-                if tool_input:
-                    key_params = {}
-                    for key in ['file_path', 'command', 'pattern', 'description']:
-                        if key in tool_input:
-                            key_params[key] = tool_input[key]
-                    
-                    if key_params:
-                        f.write("**Parameters:**\n")
-                        for key, value in key_params.items():
-                            # Truncate long values
-                            if isinstance(value, str) and len(value) > 100:
-                                value = value[:100] + "..."
-                            f.write(f"- `{key}`: {value}\n")
-                        f.write("\n")
+"""]
+            
+            # Show key input parameters
+            if tool_input:
+                key_params = {}
+                for key in ['file_path', 'command', 'pattern', 'description']:
+                    if key in tool_input:
+                        key_params[key] = tool_input[key]
                 
-                # Show output if available and not too long
-                if tool_output and isinstance(tool_output, dict):
-                    if 'content' in tool_output:
-                        content = str(tool_output['content'])
-                        if len(content) < 500:
-                            f.write(f"**Output Preview:**\n```\n{content}\n```\n\n")
-                        else:
-                            f.write(f"**Output:** {len(content)} characters\n\n")
+                if key_params:
+                    parts.append("**Parameters:**\n")
+                    for key, value in key_params.items():
+                        # Truncate long values
+                        if isinstance(value, str) and len(value) > 100:
+                            value = value[:100] + "..."
+                        parts.append(f"- `{key}`: {value}\n")
+                    parts.append("\n")
             
+            # Show output if available and not too long
+            if tool_output and isinstance(tool_output, dict):
+                if 'content' in tool_output:
+                    content = str(tool_output['content'])
+                    if len(content) < 500:
+                        parts.append(f"**Output Preview:**\n```\n{content}\n```\n\n")
+                    else:
+                        parts.append(f"**Output:** {len(content)} characters\n\n")
+            
+            self.writer.write("".join(parts),
+                              entry=self._index_entry('tool', session_id, timestamp, [tool_name]))
             return True
             
         except Exception as e:
             logger.error(f"Failed to log tool execution: {e}")
             return False
     
-    def get_recent_conversations(self, days: int = 7) -> list:
-        """Get list of recent conversation files"""
-        conversation_files = []
+    def _archive_for(self, log_path: Path) -> Optional[ConversationArchive]:
+        """Archive holding the day of a (removed) daily log, if any"""
+        day = Path(log_path).stem
+        path = archive_path_for(self.conversations_path, day)
+        archive = self._archives.get(path)
+        if archive is None:
+            archive = self._archives[path] = ConversationArchive(path)
+        try:
+            return archive if day in archive.toc() else None
+        except (OSError, ValueError) as e:
+            logger.error(f"Unreadable conversation archive {path}: {e}")
+            return None
+    
+    def _archived_day(self, log_path: Path) -> ConversationArchive:
+        archive = self._archive_for(log_path)
+        if archive is None:
+            raise FileNotFoundError(f"No conversation log for {Path(log_path).stem}")
+        return archive
+    
+    def read_index(self, log_path: Path) -> List[Dict[str, Any]]:
+        """Index entries of a daily log
+
+        Entries the sidecar does not cover (logs written before it
+        existed, or by an older writer before, between or after indexed
+        entries) are recovered from the Markdown headings; for finished
+        days the recovered index is saved so this happens once.
+        """
+        self.writer.flush()
+        log_path = Path(log_path)
+        if not log_path.exists():
+            return self._archived_day(log_path).index(log_path.stem)
         
-        for md_file in sorted(self.conversations_path.glob("*.md"), reverse=True):
-            if md_file.name == "README.md":
-                continue
-            
+        index_path = index_path_for(log_path)
+        try:
+            entries = parse_index(index_path.read_bytes())
+        except FileNotFoundError:
+            entries = []
+        
+        entries.sort(key=lambda entry: entry['offset'])
+        # Byte ranges of the log no index entry covers
+        gaps, position = [], 0
+        for entry in entries:
+            if entry['offset'] > position:
+                gaps.append((position, entry['offset']))
+            position = max(position, entry['offset'] + entry['length'])
+        size = log_path.stat().st_size
+        if size > position:
+            gaps.append((position, size))
+        
+        recovered = []
+        if gaps:
+            day = datetime.strptime(log_path.stem, '%Y-%m-%d').date()
+            with open(log_path, 'rb') as f:
+                for start, end in gaps:
+                    f.seek(start)
+                    recovered += scan_entries(f.read(end - start), start, day)
+        if recovered:
+            entries = sorted(entries + recovered, key=lambda entry: entry['offset'])
+            if day < datetime.now().date():
+                with file_lock(self.writer.lock_path):
+                    atomic_write(index_path, "".join(
+                        json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + "\n" for entry in entries
+                    ).encode('utf-8'))
+        return entries
+    
+    def read_entries(self, log_path: Path, entries: List[Dict[str, Any]]) -> Iterator[Tuple[Dict[str, Any], str]]:
+        """(entry, Markdown text) of the given index entries, read by seeking to each"""
+        log_path = Path(log_path)
+        if not log_path.exists():
+            archive = self._archived_day(log_path)
+            for entry in entries:
+                data = archive.read(log_path.stem, entry['offset'], entry['length'])
+                yield entry, data.decode('utf-8', errors='replace')
+            return
+        
+        with open(log_path, 'rb') as f:
+            for entry in entries:
+                f.seek(entry['offset'])
+                yield entry, f.read(entry['length']).decode('utf-8', errors='replace')
+    
+    def read_text(self, log_path: Path) -> str:
+        """Whole Markdown of a daily log, live or archived"""
+        self.writer.flush()
+        log_path = Path(log_path)
+        if log_path.exists():
+            with open(log_path, 'r', encoding='utf-8') as f:
+                return f.read()
+        return self._archived_day(log_path).read(log_path.stem).decode('utf-8', errors='replace')
+    
+    def _live_logs(self) -> List[Path]:
+        """Daily logs still stored as Markdown files"""
+        logs = []
+        for md_file in self.conversations_path.glob("20*.md"):
             try:
-                # Parse date from filename
-                date_str = md_file.stem
-                file_date = datetime.strptime(date_str, '%Y-%m-%d')
-                days_ago = (datetime.now() - file_date).days
+                datetime.strptime(md_file.stem, '%Y-%m-%d')
+            except ValueError:
+                continue  # Skip files that don't match date format
+            logs.append(md_file)
+        return logs
+    
+    def _archive_files(self, since: Optional[datetime] = None) -> List[Path]:
+        """Monthly archives, only those of since's month and later if given"""
+        if not self.archive_path.exists():
+            return []
+        first_month = since.strftime('%Y-%m') if since else ""
+        return sorted(path for path in self.archive_path.glob(f"*{ARCHIVE_SUFFIX}") if path.stem >= first_month)
+    
+    def archive(self, older_than_days: Optional[int] = None) -> Dict[str, Any]:
+        """Move daily logs older than N days into compressed monthly archives"""
+        if older_than_days is None:
+            older_than_days = default_archive_days()
+        report = {'archived_days': 0, 'archives': [], 'bytes_before': 0, 'bytes_after': 0}
+        if older_than_days <= 0:
+            return report
+        
+        self.writer.flush()
+        today = datetime.now().date()
+        cutoff = today - timedelta(days=older_than_days)
+        months: Dict[str, Dict[str, Tuple[bytes, List[Dict[str, Any]]]]] = {}
+        sources: Dict[str, List[Path]] = {}
+        for md_file in sorted(self._live_logs()):
+            day = datetime.strptime(md_file.stem, '%Y-%m-%d').date()
+            if day >= cutoff:
+                continue
+            entries = self.read_index(md_file)
+            months.setdefault(md_file.stem[:7], {})[md_file.stem] = (md_file.read_bytes(), entries)
+            sources.setdefault(md_file.stem[:7], []).append(md_file)
+        
+        with file_lock(self.writer.lock_path):
+            for month, days in sorted(months.items()):
+                path = self.archive_path / f"{month}{ARCHIVE_SUFFIX}"
+                existing = self._archives.setdefault(path, ConversationArchive(path))
+                size_before = path.stat().st_size if path.exists() else 0
+                size_after = write_archive(path, days, existing)
                 
-                if days_ago <= days:
-                    conversation_files.append({
-                        'path': md_file,
+                # The archive is durable: only now drop the Markdown files and their indexes
+                for md_file in sources[month]:
+                    report['bytes_before'] += md_file.stat().st_size
+                    md_file.unlink()
+                    try:
+                        index_path_for(md_file).unlink()
+                    except FileNotFoundError:
+                        pass
+                report['bytes_after'] += size_after - size_before
+                report['archived_days'] += len(days)
+                report['archives'].append(path.name)
+        
+        if report['archived_days']:
+            logger.info(f"Archived {report['archived_days']} conversation days "
+                        f"({report['bytes_before']:,} -> {report['bytes_after']:,} bytes)")
+        return report
+    
+    def find_entries(self, days: int = 30, session_id: str = None, role: str = None,
+                     tool: str = None) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """(file info, index entry) of recent entries matching every given filter"""
+        for file_info in self.get_recent_conversations(days):
+            for entry in self.read_index(file_info['path']):
+                if session_id and entry.get('session_id') != session_id:
+                    continue
+                if role and entry.get('role') != role:
+                    continue
+                if tool and tool not in (entry.get('tools') or []):
+                    continue
+                yield file_info, entry
+    
+    def get_recent_conversations(self, days: int = 7) -> list:
+        """Get list of recent conversation files
+
+        Archived days are listed too, with the path their Markdown file
+        had; every reader above resolves such paths to the archive.
+        """
+        # Make buffered events visible to readers
+        self.writer.flush()
+        now = datetime.now()
+        conversation_files = {}
+        
+        for md_file in self._live_logs():
+            file_date = datetime.strptime(md_file.stem, '%Y-%m-%d')
+            days_ago = (now - file_date).days
+            if days_ago <= days:
+                conversation_files[md_file.stem] = {
+                    'path': md_file,
+                    'date': file_date,
+                    'days_ago': days_ago,
+                    'size': md_file.stat().st_size,
+                    'archived': False
+                }
+        
+        # Only archives of months the window reaches are opened
+        for path in self._archive_files(since=now - timedelta(days=days)):
+            archive = self._archives.setdefault(path, ConversationArchive(path))
+            try:
+                archived_days = archive.days()
+            except (OSError, ValueError) as e:
+                logger.error(f"Unreadable conversation archive {path}: {e}")
+                continue
+            for day in archived_days:
+                file_date = datetime.strptime(day, '%Y-%m-%d')
+                days_ago = (now - file_date).days
+                # A day still present as Markdown (interrupted archiving) wins
+                if days_ago <= days and day not in conversation_files:
+                    conversation_files[day] = {
+                        'path': self.conversations_path / f"{day}.md",
                         'date': file_date,
                         'days_ago': days_ago,
-                        'size': md_file.stat().st_size
-                    })
-                    
-            except ValueError:
-                continue  # Skip files that don't match date format
+                        'size': archive.size(day),
+                        'archived': True
+                    }
         
-        return conversation_files
+        return [conversation_files[day] for day in sorted(conversation_files, reverse=True)]
     
     def get_stats(self) -> Dict[str, Any]:
         """Get conversation logger statistics"""
-        md_files = list(self.conversations_path.glob("*.md"))
-        if self.index_file in md_files:
-            md_files.remove(self.index_file)
-        
+        self.writer.flush()
+        md_files = self._live_logs()
+        live_days = {md_file.stem for md_file in md_files}
         total_size = sum(f.stat().st_size for f in md_files)
+        
+        archived_days = 0
+        archive_size = 0
+        for path in self._archive_files():
+            archive = self._archives.setdefault(path, ConversationArchive(path))
+            try:
+                archived_days += len(set(archive.days()) - live_days)
+                archive_size += path.stat().st_size
+            except (OSError, ValueError) as e:
+                logger.error(f"Unreadable conversation archive {path}: {e}")
+        total_size += archive_size
         recent_files = self.get_recent_conversations(7)
         
         return {
-            'total_conversation_files': len(md_files),
+            'total_conversation_files': len(md_files) + archived_days,
+            'archived_days': archived_days,
+            'archive_size_mb': round(archive_size / (1024 * 1024), 2),
             'total_size_bytes': total_size,
             'total_size_mb': round(total_size / (1024 * 1024), 2),
             'recent_files_7days': len(recent_files),
@@ -18,14 +18,26 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent))
 from cache import get_simple_cache_system
 from auto_hook import get_simple_auto_hook
+from cache_retention import RetentionPolicy
+from cache_server import SERVER_ENV_VAR, CacheQueryServer
+from conversation_logger import get_conversation_logger
 
 class SimpleCacheStarter:
     """Simple cache system starter"""
     
-    def __init__(self):
+    def __init__(self, write_behind: bool = None, retention_interval: float = None,
+                 serve: bool = None):
         self.cache = None
         self.auto_hook = None
+        self.server = None
         self.running = False
+        if serve is None:
+            serve = os.getenv(SERVER_ENV_VAR, "auto").lower() not in ("0", "off", "false", "no")
+        self.serve = serve
+        self.write_behind = write_behind
+        if retention_interval is None:
+            retention_interval = float(os.getenv("CACHE_RETENTION_INTERVAL_MINUTES", "0") or 0)
+        self.retention_interval = retention_interval
         
     def initialize(self):
         """Initialize cache system"""
@@ -33,7 +45,7 @@ class SimpleCacheStarter:
         
         try:
             self.cache = get_simple_cache_system()
-            self.auto_hook = get_simple_auto_hook()
+            self.auto_hook = get_simple_auto_hook(self.write_behind)
             print("✅ Simple cache system initialized")
             return True
         except Exception as e:
@@ -68,7 +80,17 @@ class SimpleCacheStarter:
                 print(f"   • {cache_type.capitalize()}: {count} files")
         
         print(f"🧠 Auto-hook: {'✅ Running' if self.running else '❌ Not started'}")
+        if self.auto_hook and self.auto_hook.writer:
+            print(f"✍️  Write-behind: {self.auto_hook.writer.backpressure} "
+                  f"(batch {self.auto_hook.writer.batch_size}, every {self.auto_hook.writer.flush_interval}s)")
         print(f"💾 Cache system: {'✅ Running' if self.cache else '❌ Not started'}")
+        if self.server:
+            print(f"🔌 Query server: {self.server.socket_path}")
+        if self.retention_interval:
+            policy = RetentionPolicy.from_env()
+            quota = f", quota {policy.max_bytes // (1024 * 1024)} MB ({policy.eviction})" if policy.max_bytes else ""
+            print(f"🧹 Retention: every {self.retention_interval:g} min in daemon mode "
+                  f"(TTL {policy.default_ttl_days:g} days{quota})")
         
         print("\n💡 Usage:")
         print("  - Search: python src/scripts/cache/simple_cache_query.py search 'query'")
@@ -91,13 +113,28 @@ class SimpleCacheStarter:
         print("\n🔄 Shutting down simple cache system...")
         self.running = False
         
+        if self.server:
+            try:
+                self.server.stop()
+                print("✅ Query server stopped")
+            except Exception as e:
+                print(f"⚠️  Error stopping query server: {e}")
+        
         if self.auto_hook:
             try:
+                # Queued background writes must reach disk before we exit
+                self.auto_hook.flush()
                 self.auto_hook.stop()
                 print("✅ Auto-hook stopped")
             except Exception as e:
                 print(f"⚠️  Error stopping auto-hook: {e}")
         
+        if self.cache:
+            try:
+                self.cache.close()
+            except Exception as e:
+                print(f"⚠️  Error closing cache storage: {e}")
+        
         print("🛑 Simple cache system shutdown complete")
     
     def run_interactive(self):
@@ -111,11 +148,45 @@ class SimpleCacheStarter:
         except KeyboardInterrupt:
             self.shutdown()
     
+    def run_retention_sweep(self):
+        """Apply the environment's retention policy once"""
+        try:
+            report = self.cache.apply_retention(RetentionPolicy.from_env())
+            deleted = sum(report['deleted'].values())
+            if deleted:
+                print(f"🧹 Retention sweep: {deleted} records removed "
+                      f"({report['freed_bytes']:,} bytes freed)")
+        except Exception as e:
+            print(f"⚠️  Retention sweep failed: {e}")
+        try:
+            report = get_conversation_logger().archive()
+            if report['archived_days']:
+                print(f"🗜️  Archived {report['archived_days']} conversation days "
+                      f"({report['bytes_before']:,} -> {report['bytes_after']:,} bytes)")
+        except Exception as e:
+            print(f"⚠️  Conversation archiving failed: {e}")
+    
+    def start_server(self):
+        """Serve CLI queries from this process's warm cache"""
+        try:
+            self.server = CacheQueryServer(self.cache)
+            self.server.start()
+            print(f"🔌 Query server listening on {self.server.socket_path}")
+        except Exception as e:
+            self.server = None
+            print(f"⚠️  Query server not started: {e}")
+    
     def run_daemon(self):
         """Run in daemon mode"""
         print("👤 Running in daemon mode...")
+        if self.serve:
+            self.start_server()
+        next_sweep = time.monotonic() if self.retention_interval else None
         try:
             while self.running:
+                if next_sweep is not None and time.monotonic() >= next_sweep:
+                    self.run_retention_sweep()
+                    next_sweep = time.monotonic() + self.retention_interval * 60
                 time.sleep(10)
         except KeyboardInterrupt:
             self.shutdown()
@@ -128,10 +199,17 @@ def main():
     parser.add_argument("--daemon", action="store_true", help="Run in daemon mode")
     parser.add_argument("--status", action="store_true", help="Show status only")
     parser.add_argument("--test", action="store_true", help="Run system test")
+    parser.add_argument("--write-behind", action="store_true", default=None,
+                        help="Write cache records from a background batching thread")
+    
+    parser.add_argument("--retention-interval", type=float, metavar="MINUTES",
+                        help="Run a retention sweep this often in daemon mode (0 = off)")
+    parser.add_argument("--no-server", dest="serve", action="store_false", default=None,
+                        help="Do not host the query server in daemon mode")
     
     args = parser.parse_args()
     
-    starter = SimpleCacheStarter()
+    starter = SimpleCacheStarter(args.write_behind, args.retention_interval, args.serve)
     
     if args.status:
         if starter.initialize():
@@ -8,17 +8,34 @@ and performance metrics.
 
 Format: YYYY-MM-DD_HH-MM-SS_keywords.log
 
+Any number of sessions can be active at once. ``open_session`` returns an
+ExecutionSession handle (also a context manager) with its own lock, and
+makes it the current session of the calling context: the log_* methods
+and module-level functions apply to the session of the current thread or
+asyncio task, falling back to the last session started so single-session
+callers work unchanged.
+
+In real-time mode every event is appended to its session's log through a
+buffered handle kept open for the session (at most MAX_OPEN_LOGS at once,
+the longest open first to be closed). Events are formatted before any
+lock is taken; handles are flushed and closed when the session ends, or
+at interpreter exit.
+
+Finished logs are compressed, packed and expired by a background
+CompactionWorker (see log_compaction.py), never on the logging thread.
+
 Author: Claude Code Research System
 Version: 1.0.0
 """
 
 import os
 import sys
+import atexit
 import json
 import uuid
 import re
 import threading
-import gzip
+import contextvars
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Union
@@ -26,10 +43,20 @@ import logging
 import time
 import hashlib
 from dataclasses import dataclass, asdict
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 
 # Add parent directory to path for keyword extraction
 sys.path.append(str(Path(__file__).parent))
+from log_compaction import CompactionTiers, CompactionWorker, LogCompactor
+from log_index import DayIndex, iter_day_indexes
+from log_rollups import execution_rows, execution_store
+
+# Open session log handles, and their write buffer size
+MAX_OPEN_LOGS = 32
+LOG_BUFFER_BYTES = 64 * 1024
+
+# Session the log_* calls of the current thread or asyncio task apply to
+_current_session: contextvars.ContextVar = contextvars.ContextVar("claude_logger_session", default=None)
 
 @dataclass
 class ExecutionLog:
@@ -46,6 +73,53 @@ class ExecutionLog:
     def to_dict(self) -> Dict[str, Any]:
         return asdict(self)
 
+class ExecutionSession:
+    """Handle of one active execution logging session"""
+    
+    def __init__(self, logger: "ClaudeLogger", data: Dict[str, Any], parent: "ExecutionSession" = None):
+        self.logger = logger
+        self.data = data
+        self.parent = parent
+        self.session_id = data['session_id']
+        self.start_time = time.time()
+        self.active = True
+        # Guards data and handle; sessions never share a lock
+        self.lock = threading.Lock()
+        self.handle = None
+    
+    def log_tool_usage(self, tool_name: str, parameters: Dict = None, duration: float = None):
+        self.logger.log_tool_usage(tool_name, parameters, duration, session_id=self.session_id)
+    
+    def log_file_access(self, file_path: str, operation: str = 'read'):
+        self.logger.log_file_access(file_path, operation, session_id=self.session_id)
+    
+    def log_agent_invocation(self, agent_name: str, parameters: Dict = None, duration: float = None):
+        self.logger.log_agent_invocation(agent_name, parameters, duration, session_id=self.session_id)
+    
+    def log_response(self, response: str, tokens_used: int = None):
+        self.logger.log_response(response, tokens_used, session_id=self.session_id)
+    
+    def end(self, success: bool = True, error_message: str = None) -> Optional[str]:
+        return self.logger.end_execution_session(success, error_message, session_id=self.session_id)
+    
+    def close_handle(self):
+        """Flush and close the session's log handle, if open"""
+        with self.lock:
+            handle, self.handle = self.handle, None
+        if handle is not None:
+            try:
+                handle.close()
+            except OSError as e:
+                self.logger.logger.error(f"Failed to close log file: {e}")
+    
+    def __enter__(self) -> "ExecutionSession":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if self.active:
+            self.end(exc is None, str(exc) if exc is not None else None)
+        return False
+
 class ClaudeLogger:
     """Main Claude Code execution logger"""
     
@@ -59,18 +133,35 @@ class ClaudeLogger:
         # Load configuration
         self.config = self._load_config()
         
+        # Analytics counters, appended as sessions complete
+        self.rollups = execution_store(self.logs_base_path)
+        
         # Active session tracking
-        self.active_sessions = {}
-        self.current_session_id = None
+        self.active_sessions: Dict[str, ExecutionSession] = {}
+        self._default_session: Optional[ExecutionSession] = None
         
-        # Thread safety
+        # Thread safety: the session table and the handle pool each have a
+        # lock; events only take their session's lock
         self._lock = threading.Lock()
+        self._pool_lock = threading.Lock()
+        
+        # Sessions with an open log handle, the longest open first
+        self._handles: "OrderedDict[str, ExecutionSession]" = OrderedDict()
+        self._daily_dirs = set()
+        atexit.register(self.close)
         
         # Initialize logging
         self._setup_logging()
         
+        # Tiered compression and retention of finished logs, off the logging path
+        self.compactor = LogCompactor(self.logs_base_path, CompactionTiers.from_config(self.config))
+        self.compaction_worker = CompactionWorker(
+            self.compactor, float(self.config.get('compaction_interval_minutes', 60)) * 60
+        )
+        if self.compaction_worker.interval > 0:
+            self.compaction_worker.start()
+        
         # Performance tracking
-        self.session_start_time = None
         self.tools_used = []
         self.files_accessed = []
         self.agents_invoked = []
@@ -98,6 +189,9 @@ class ClaudeLogger:
                 'log_path': 'logs/executions',
                 'retention_days': 90,
                 'compression': True,
+                'hot_days': 1,
+                'warm_days': 7,
+                'compaction_interval_minutes': 60,
                 'keyword_extraction': True,
                 'real_time': True,
                 'max_keywords': 5,
@@ -199,155 +293,166 @@ class ClaudeLogger:
         
         return f"{time_str}_{keywords_str}.log"
 
+    @property
+    def current_session_id(self) -> Optional[str]:
+        """Session the log_* methods of this context apply to"""
+        session = self._resolve_session()
+        return session.session_id if session else None
+
+    @property
+    def session_start_time(self) -> Optional[float]:
+        session = self._resolve_session()
+        return session.start_time if session else None
+
+    def _resolve_session(self, session_id: str = None) -> Optional["ExecutionSession"]:
+        """Explicit session, else this context's session, else the last one started"""
+        if session_id is not None:
+            return self.active_sessions.get(session_id)
+        session = _current_session.get()
+        if session is not None and session.logger is self and session.active:
+            return session
+        session = self._default_session
+        return session if session is not None and session.active else None
+
+    def open_session(self, user_query: str) -> "ExecutionSession":
+        """Start a new execution logging session and return its handle
+
+        The session becomes the current one of the calling context, so
+        asyncio tasks and threads (run in a copied context) each log to
+        their own session; the handle is also a context manager that ends
+        the session on exit.
+        """
+        # Generate session ID and filename
+        session_id = str(uuid.uuid4())
+        timestamp = datetime.now()
+        log_filename = self.generate_log_filename(user_query, timestamp)
+        
+        # Initialize session data; the log path is resolved once per session
+        session_data = {
+            'session_id': session_id,
+            'start_time': timestamp.isoformat(),
+            'user_query': user_query,
+            'keywords': self.extract_keywords(user_query),
+            'log_filename': log_filename,
+            'log_path': self._get_daily_log_path(timestamp) / log_filename,
+            'tools_used': [],
+            'files_accessed': [],
+            'agents_invoked': [],
+            'execution_trace': [],
+            'status': 'active'
+        }
+        session = ExecutionSession(self, session_data, parent=_current_session.get())
+        
+        # Create log file before the session is visible to other threads
+        self._create_log_file(session)
+        
+        # Store active session
+        with self._lock:
+            self.active_sessions[session_id] = session
+            self._default_session = session
+        _current_session.set(session)
+        
+        self.logger.info(f"Started execution session: {session_id} -> {session_data['log_filename']}")
+        return session
+
     def start_execution_session(self, user_query: str) -> str:
         """Start a new execution logging session"""
-        with self._lock:
-            # Generate session ID and filename
-            session_id = str(uuid.uuid4())
-            timestamp = datetime.now()
-            log_filename = self.generate_log_filename(user_query, timestamp)
-            
-            # Initialize session data
-            session_data = {
-                'session_id': session_id,
-                'start_time': timestamp.isoformat(),
-                'user_query': user_query,
-                'keywords': self.extract_keywords(user_query),
-                'log_filename': log_filename,
-                'tools_used': [],
-                'files_accessed': [],
-                'agents_invoked': [],
-                'execution_trace': [],
-                'status': 'active'
-            }
-            
-            # Store active session
-            self.active_sessions[session_id] = session_data
-            self.current_session_id = session_id
-            self.session_start_time = time.time()
-            
-            # Create log file
-            log_path = self._get_daily_log_path(timestamp) / log_filename
-            self._create_log_file(log_path, session_data)
-            
-            self.logger.info(f"Started execution session: {session_id} -> {log_filename}")
-            return session_id
+        return self.open_session(user_query).session_id
 
-    def log_tool_usage(self, tool_name: str, parameters: Dict = None, duration: float = None):
-        """Log tool usage during execution"""
-        if not self.current_session_id:
+    def _log_event(self, session: Optional["ExecutionSession"], key: Optional[str], entry: Dict,
+                   trace: Optional[str], entry_type: str):
+        """Record an event in its session and its log file"""
+        if session is None:
             return
-            
-        with self._lock:
-            tool_entry = {
-                'tool': tool_name,
-                'timestamp': datetime.now().isoformat(),
-                'parameters': parameters or {},
-                'duration': duration
-            }
-            
-            if self.current_session_id in self.active_sessions:
-                session = self.active_sessions[self.current_session_id]
-                session['tools_used'].append(tool_entry)
-                session['execution_trace'].append(f"TOOL: {tool_name}")
-                
-                # Real-time logging to file
-                if self.config.get('real_time', True):
-                    self._append_to_log(tool_entry, 'TOOL_USAGE')
+        text = self._format_entry(entry, entry_type)
+        
+        with session.lock:
+            if not session.active:
+                return
+            if key == 'response':
+                session.data['response'] = entry
+            else:
+                session.data[key].append(entry)
+                session.data['execution_trace'].append(trace)
+            
+            # Real-time logging to file
+            opened = self._append_to_log(session, text)
+        if opened:
+            self._track_handle(session)
+
+    def log_tool_usage(self, tool_name: str, parameters: Dict = None, duration: float = None,
+                       session_id: str = None):
+        """Log tool usage during execution"""
+        tool_entry = {
+            'tool': tool_name,
+            'timestamp': datetime.now().isoformat(),
+            'parameters': parameters or {},
+            'duration': duration
+        }
+        self._log_event(self._resolve_session(session_id), 'tools_used', tool_entry,
+                        f"TOOL: {tool_name}", 'TOOL_USAGE')
 
-    def log_file_access(self, file_path: str, operation: str = 'read'):
+    def log_file_access(self, file_path: str, operation: str = 'read', session_id: str = None):
         """Log file access during execution"""
-        if not self.current_session_id:
-            return
-            
-        with self._lock:
-            file_entry = {
-                'path': file_path,
-                'operation': operation,
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            if self.current_session_id in self.active_sessions:
-                session = self.active_sessions[self.current_session_id]
-                session['files_accessed'].append(file_entry)
-                session['execution_trace'].append(f"FILE: {operation} {file_path}")
-                
-                # Real-time logging to file
-                if self.config.get('real_time', True):
-                    self._append_to_log(file_entry, 'FILE_ACCESS')
+        file_entry = {
+            'path': file_path,
+            'operation': operation,
+            'timestamp': datetime.now().isoformat()
+        }
+        self._log_event(self._resolve_session(session_id), 'files_accessed', file_entry,
+                        f"FILE: {operation} {file_path}", 'FILE_ACCESS')
 
-    def log_agent_invocation(self, agent_name: str, parameters: Dict = None, duration: float = None):
+    def log_agent_invocation(self, agent_name: str, parameters: Dict = None, duration: float = None,
+                             session_id: str = None):
         """Log agent invocation during execution"""
-        if not self.current_session_id:
-            return
-            
-        with self._lock:
-            agent_entry = {
-                'agent': agent_name,
-                'timestamp': datetime.now().isoformat(),
-                'parameters': parameters or {},
-                'duration': duration
-            }
-            
-            if self.current_session_id in self.active_sessions:
-                session = self.active_sessions[self.current_session_id]
-                session['agents_invoked'].append(agent_entry)
-                session['execution_trace'].append(f"AGENT: {agent_name}")
-                
-                # Real-time logging to file
-                if self.config.get('real_time', True):
-                    self._append_to_log(agent_entry, 'AGENT_INVOCATION')
+        agent_entry = {
+            'agent': agent_name,
+            'timestamp': datetime.now().isoformat(),
+            'parameters': parameters or {},
+            'duration': duration
+        }
+        self._log_event(self._resolve_session(session_id), 'agents_invoked', agent_entry,
+                        f"AGENT: {agent_name}", 'AGENT_INVOCATION')
 
-    def log_response(self, response: str, tokens_used: int = None):
+    def log_response(self, response: str, tokens_used: int = None, session_id: str = None):
         """Log Claude's response"""
-        if not self.current_session_id:
-            return
-            
-        with self._lock:
-            response_entry = {
-                'response': response,
-                'timestamp': datetime.now().isoformat(),
-                'tokens_used': tokens_used,
-                'length': len(response)
-            }
-            
-            if self.current_session_id in self.active_sessions:
-                session = self.active_sessions[self.current_session_id]
-                session['response'] = response_entry
-                
-                # Real-time logging to file
-                if self.config.get('real_time', True):
-                    self._append_to_log(response_entry, 'RESPONSE')
+        response_entry = {
+            'response': response,
+            'timestamp': datetime.now().isoformat(),
+            'tokens_used': tokens_used,
+            'length': len(response)
+        }
+        self._log_event(self._resolve_session(session_id), 'response', response_entry, None, 'RESPONSE')
 
-    def end_execution_session(self, success: bool = True, error_message: str = None) -> Optional[str]:
+    def end_execution_session(self, success: bool = True, error_message: str = None,
+                              session_id: str = None) -> Optional[str]:
         """End current execution session and finalize log"""
-        if not self.current_session_id:
+        session = self._resolve_session(session_id)
+        if session is None:
             return None
             
-        with self._lock:
-            session_id = self.current_session_id
-            
-            if session_id not in self.active_sessions:
+        with session.lock:
+            if not session.active:
                 return None
-                
-            session = self.active_sessions[session_id]
+            session.active = False
+            data = session.data
             
             # Calculate session metrics
             end_time = datetime.now()
-            duration = time.time() - self.session_start_time if self.session_start_time else 0
+            duration = time.time() - session.start_time
             
             # Finalize session data
-            session.update({
+            data.update({
                 'end_time': end_time.isoformat(),
                 'duration_seconds': duration,
                 'success': success,
                 'error_message': error_message,
                 'status': 'completed',
                 'metrics': {
-                    'tools_count': len(session['tools_used']),
-                    'files_accessed_count': len(session['files_accessed']),
-                    'agents_invoked_count': len(session['agents_invoked']),
-                    'execution_steps': len(session['execution_trace']),
+                    'tools_count': len(data['tools_used']),
+                    'files_accessed_count': len(data['files_accessed']),
+                    'agents_invoked_count': len(data['agents_invoked']),
+                    'execution_steps': len(data['execution_trace']),
                     'duration_seconds': duration,
                     'success_rate': 1.0 if success else 0.0
                 }
@@ -355,123 +460,158 @@ class ClaudeLogger:
             
             # Create final execution log
             execution_log = ExecutionLog(
-                session_id=session_id,
-                timestamp=session['start_time'],
-                user_query=session['user_query'],
-                keywords=session['keywords'],
-                log_filename=session['log_filename'],
+                session_id=session.session_id,
+                timestamp=data['start_time'],
+                user_query=data['user_query'],
+                keywords=data['keywords'],
+                log_filename=data['log_filename'],
                 execution={
-                    'tools_used': session['tools_used'],
-                    'files_accessed': session['files_accessed'],
-                    'agents_invoked': session['agents_invoked'],
-                    'execution_trace': session['execution_trace'],
+                    'tools_used': data['tools_used'],
+                    'files_accessed': data['files_accessed'],
+                    'agents_invoked': data['agents_invoked'],
+                    'execution_trace': data['execution_trace'],
                     'duration_seconds': duration
                 },
-                response=session.get('response', ''),
-                metrics=session['metrics']
+                response=data.get('response', ''),
+                metrics=data['metrics']
             )
             
-            # Write final log to file
-            self._finalize_log_file(execution_log)
-            
-            # Update index
-            self._update_index(execution_log)
-            
-            # Cleanup
-            del self.active_sessions[session_id]
-            self.current_session_id = None
-            self.session_start_time = None
-            
-            self.logger.info(f"Completed execution session: {session_id}")
-            return session['log_filename']
+            # The session's handle now belongs to this call only
+            handle, session.handle = session.handle, None
+        
+        # Cleanup
+        with self._lock:
+            self.active_sessions.pop(session.session_id, None)
+            if self._default_session is session:
+                self._default_session = None
+        with self._pool_lock:
+            self._handles.pop(session.session_id, None)
+        if _current_session.get() is session:
+            # A nested session hands the context back to its parent
+            parent = session.parent
+            _current_session.set(parent if parent is not None and parent.active else None)
+        
+        # Write final log to file, serialized outside any lock
+        self._finalize_log_file(execution_log, data['log_path'], handle)
+        
+        # Update index (appends are atomic across threads and processes)
+        self._update_index(execution_log)
+        
+        self.logger.info(f"Completed execution session: {session.session_id}")
+        return data['log_filename']
 
     def _get_daily_log_path(self, timestamp: datetime) -> Path:
         """Get daily log directory path"""
         daily_path = self.logs_base_path / "executions" / timestamp.strftime("%Y-%m-%d")
-        daily_path.mkdir(parents=True, exist_ok=True)
+        if daily_path not in self._daily_dirs:
+            daily_path.mkdir(parents=True, exist_ok=True)
+            self._daily_dirs.add(daily_path)
         return daily_path
 
-    def _create_log_file(self, log_path: Path, session_data: Dict):
+    def _track_handle(self, session: "ExecutionSession"):
+        """Add a session's newly opened handle to the pool, closing the oldest beyond MAX_OPEN_LOGS"""
+        with self._pool_lock:
+            self._handles[session.session_id] = session
+            evicted = [self._handles.popitem(last=False)[1]
+                       for _ in range(len(self._handles) - MAX_OPEN_LOGS)]
+        # Closed outside the pool lock; evicted sessions reopen their log on their next event
+        for other in evicted:
+            other.close_handle()
+
+    def close(self):
+        """Flush and close every open session log"""
+        with self._pool_lock:
+            sessions = list(self._handles.values())
+            self._handles.clear()
+        for session in sessions:
+            session.close_handle()
+
+    def _create_log_file(self, session: "ExecutionSession"):
         """Create initial log file"""
+        session_data = session.data
         try:
-            with open(log_path, 'w', encoding='utf-8') as f:
-                f.write(f"=== Claude Code Execution Log ===\n")
-                f.write(f"Session ID: {session_data['session_id']}\n")
-                f.write(f"Start Time: {session_data['start_time']}\n")
-                f.write(f"User Query: {session_data['user_query']}\n")
-                f.write(f"Keywords: {', '.join(session_data['keywords'])}\n")
-                f.write(f"{'='*50}\n\n")
+            f = session.handle = self._open_new_log(session_data)
+            f.write(f"=== Claude Code Execution Log ===\n")
+            f.write(f"Session ID: {session_data['session_id']}\n")
+            f.write(f"Start Time: {session_data['start_time']}\n")
+            f.write(f"User Query: {session_data['user_query']}\n")
+            f.write(f"Keywords: {', '.join(session_data['keywords'])}\n")
+            f.write(f"{'='*50}\n\n")
+            self._track_handle(session)
                 
         except Exception as e:
-            self.logger.error(f"Failed to create log file {log_path}: {e}")
+            self.logger.error(f"Failed to create log file {session_data['log_path']}: {e}")
+
+    def _open_new_log(self, session_data: Dict[str, Any]):
+        """Exclusively create the session's log, numbering the name on collision
+
+        Sessions started in the same second with the same keywords would
+        otherwise share (and truncate) one log file.
+        """
+        log_path = session_data['log_path']
+        stem = log_path.name[:-len('.log')]
+        attempt = 1
+        while True:
+            try:
+                f = open(log_path, 'x', encoding='utf-8', buffering=LOG_BUFFER_BYTES)
+                break
+            except FileExistsError:
+                attempt += 1
+                log_path = log_path.with_name(f"{stem}_{attempt}.log")
+        session_data['log_path'] = log_path
+        session_data['log_filename'] = log_path.name
+        return f
+
+    def _format_entry(self, entry: Dict, entry_type: str) -> Optional[str]:
+        """Log text of a real-time entry, None when real-time logging is off"""
+        if not self.config.get('real_time', True):
+            return None
+        return (f"\n[{entry.get('timestamp', datetime.now().isoformat())}] {entry_type}:\n"
+                f"{json.dumps(entry, indent=2, ensure_ascii=False)}"
+                f"\n{'-'*30}\n")
 
-    def _append_to_log(self, entry: Dict, entry_type: str):
-        """Append entry to current log file in real-time"""
-        if not self.current_session_id or not self.config.get('real_time', True):
-            return
+    def _append_to_log(self, session: "ExecutionSession", text: Optional[str]) -> bool:
+        """Append formatted entry text to a session's log (session lock held)
+
+        Returns whether the session's handle had to be (re)opened.
+        """
+        if text is None:
+            return False
             
         try:
-            session = self.active_sessions[self.current_session_id]
-            log_filename = session['log_filename']
-            timestamp = datetime.fromisoformat(session['start_time'])
-            log_path = self._get_daily_log_path(timestamp) / log_filename
-            
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(f"\n[{entry.get('timestamp', datetime.now().isoformat())}] {entry_type}:\n")
-                f.write(json.dumps(entry, indent=2, ensure_ascii=False))
-                f.write(f"\n{'-'*30}\n")
+            opened = session.handle is None
+            if opened:
+                session.handle = open(session.data['log_path'], 'a', encoding='utf-8',
+                                      buffering=LOG_BUFFER_BYTES)
+            session.handle.write(text)
+            return opened
                 
         except Exception as e:
             self.logger.error(f"Failed to append to log: {e}")
+            return False
 
-    def _finalize_log_file(self, execution_log: ExecutionLog):
-        """Finalize log file with complete execution data"""
+    def _finalize_log_file(self, execution_log: ExecutionLog, log_path: Path, handle=None):
+        """Finalize log file with complete execution data, closing its handle"""
         try:
-            timestamp = datetime.fromisoformat(execution_log.timestamp)
-            log_path = self._get_daily_log_path(timestamp) / execution_log.log_filename
+            summary = (f"\n{'='*50}\n"
+                       f"=== EXECUTION SUMMARY ===\n"
+                       f"{'='*50}\n"
+                       f"{json.dumps(execution_log.to_dict(), indent=2, ensure_ascii=False)}"
+                       f"\n{'='*50}\n")
             
             # Append final summary
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(f"\n{'='*50}\n")
-                f.write(f"=== EXECUTION SUMMARY ===\n")
-                f.write(f"{'='*50}\n")
-                f.write(json.dumps(execution_log.to_dict(), indent=2, ensure_ascii=False))
-                f.write(f"\n{'='*50}\n")
-            
-            # Compress if configured
-            if self.config.get('compression', True) and timestamp.date() < datetime.now().date():
-                self._compress_log_file(log_path)
+            if handle is None:
+                handle = open(log_path, 'a', encoding='utf-8')
+            with handle:
+                handle.write(summary)
                 
         except Exception as e:
             self.logger.error(f"Failed to finalize log: {e}")
 
-    def _compress_log_file(self, log_path: Path):
-        """Compress log file to save space"""
-        try:
-            compressed_path = log_path.with_suffix('.log.gz')
-            
-            with open(log_path, 'rb') as f_in:
-                with gzip.open(compressed_path, 'wb') as f_out:
-                    f_out.writelines(f_in)
-            
-            # Remove original file
-            log_path.unlink()
-            self.logger.info(f"Compressed log file: {compressed_path}")
-            
-        except Exception as e:
-            self.logger.error(f"Failed to compress log file: {e}")
-
     def _update_index(self, execution_log: ExecutionLog):
         """Update searchable index"""
         try:
             timestamp = datetime.fromisoformat(execution_log.timestamp)
-            index_path = self._get_daily_log_path(timestamp) / "index.json"
-            
-            # Load existing index
-            index_data = []
-            if index_path.exists():
-                with open(index_path, 'r', encoding='utf-8') as f:
-                    index_data = json.load(f)
             
             # Add new entry
             index_entry = {
@@ -480,14 +620,14 @@ class ClaudeLogger:
                 'user_query': execution_log.user_query,
                 'keywords': execution_log.keywords,
                 'log_filename': execution_log.log_filename,
-                'metrics': execution_log.metrics
+                'metrics': execution_log.metrics,
+                'tools': [tool['tool'] for tool in execution_log.execution.get('tools_used', [])],
+                'agents': [agent['agent'] for agent in execution_log.execution.get('agents_invoked', [])]
             }
             
-            index_data.append(index_entry)
+            DayIndex(self._get_daily_log_path(timestamp)).append(index_entry)
             
-            # Save updated index
-            with open(index_path, 'w', encoding='utf-8') as f:
-                json.dump(index_data, f, indent=2, ensure_ascii=False)
+            self.rollups.append(execution_rows(index_entry))
                 
         except Exception as e:
             self.logger.error(f"Failed to update index: {e}")
@@ -498,25 +638,16 @@ class ClaudeLogger:
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
         
-        current_date = start_date
-        while current_date <= end_date:
-            index_path = self._get_daily_log_path(current_date) / "index.json"
-            
-            if index_path.exists():
-                try:
-                    with open(index_path, 'r', encoding='utf-8') as f:
-                        index_data = json.load(f)
-                    
-                    for entry in index_data:
-                        # Simple text search in user_query and keywords
-                        searchable_text = f"{entry['user_query']} {' '.join(entry['keywords'])}".lower()
-                        if query.lower() in searchable_text:
-                            results.append(entry)
-                            
-                except Exception as e:
-                    self.logger.error(f"Failed to search in {index_path}: {e}")
-            
-            current_date += timedelta(days=1)
+        for index in iter_day_indexes(self.logs_base_path, start_date, end_date):
+            try:
+                for entry in index.entries():
+                    # Simple text search in user_query and keywords
+                    searchable_text = f"{entry['user_query']} {' '.join(entry['keywords'])}".lower()
+                    if query.lower() in searchable_text:
+                        results.append(entry)
+                        
+            except Exception as e:
+                self.logger.error(f"Failed to search in {index.day_path}: {e}")
         
         return sorted(results, key=lambda x: x['timestamp'], reverse=True)
 
@@ -537,37 +668,30 @@ class ClaudeLogger:
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
         
-        current_date = start_date
-        while current_date <= end_date:
-            index_path = self._get_daily_log_path(current_date) / "index.json"
-            
-            if index_path.exists():
-                try:
-                    with open(index_path, 'r', encoding='utf-8') as f:
-                        index_data = json.load(f)
+        for index in iter_day_indexes(self.logs_base_path, start_date, end_date):
+            try:
+                index_data = index.entries()
+                
+                day_key = index.day_path.name
+                analytics['daily_activity'][day_key] = len(index_data)
+                
+                for entry in index_data:
+                    analytics['total_executions'] += 1
                     
-                    day_key = current_date.strftime("%Y-%m-%d")
-                    analytics['daily_activity'][day_key] = len(index_data)
+                    if entry.get('metrics', {}).get('success_rate', 0) > 0:
+                        analytics['successful_executions'] += 1
+                    else:
+                        analytics['failed_executions'] += 1
                     
-                    for entry in index_data:
-                        analytics['total_executions'] += 1
-                        
-                        if entry.get('metrics', {}).get('success_rate', 0) > 0:
-                            analytics['successful_executions'] += 1
-                        else:
-                            analytics['failed_executions'] += 1
-                        
-                        duration = entry.get('metrics', {}).get('duration_seconds', 0)
-                        analytics['total_duration'] += duration
+                    duration = entry.get('metrics', {}).get('duration_seconds', 0)
+                    analytics['total_duration'] += duration
+                    
+                    # Count keywords
+                    for keyword in entry.get('keywords', []):
+                        analytics['popular_keywords'][keyword] += 1
                         
-                        # Count keywords
-                        for keyword in entry.get('keywords', []):
-                            analytics['popular_keywords'][keyword] += 1
-                            
-                except Exception as e:
-                    self.logger.error(f"Failed to analyze {index_path}: {e}")
-            
-            current_date += timedelta(days=1)
+            except Exception as e:
+                self.logger.error(f"Failed to analyze {index.day_path}: {e}")
         
         # Calculate averages
         if analytics['total_executions'] > 0:
@@ -596,6 +720,10 @@ def start_logging_session(user_query: str) -> str:
     """Start execution logging session"""
     return get_claude_logger().start_execution_session(user_query)
 
+def open_logging_session(user_query: str) -> ExecutionSession:
+    """Start execution logging session, returning its handle (a context manager)"""
+    return get_claude_logger().open_session(user_query)
+
 def log_tool_usage(tool_name: str, parameters: Dict = None, duration: float = None):
     """Log tool usage"""
     get_claude_logger().log_tool_usage(tool_name, parameters, duration)
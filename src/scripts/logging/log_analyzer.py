@@ -18,7 +18,6 @@ Version: 1.0.0
 """
 
 import json
-import gzip
 import re
 import os
 import sys
@@ -33,6 +32,9 @@ import argparse
 # Add parent directory for imports
 sys.path.append(str(Path(__file__).parent))
 from keywords_extractor import KeywordsExtractor
+from log_compaction import CompactionTiers, LogCompactor, read_log
+from log_index import DayIndex, iter_day_indexes
+from log_rollups import EXECUTIONS_DIM, SUCCESS_DIM, TIMED_DIM, execution_store, index_rows, indexed_executions
 
 @dataclass
 class SearchResult:
@@ -71,6 +73,9 @@ class LogAnalyzer:
         # Ensure logs directory exists
         if not self.logs_base_path.exists():
             raise FileNotFoundError(f"Logs directory not found: {self.logs_base_path}")
+        
+        # Pre-aggregated counters maintained by ClaudeLogger
+        self.rollups = execution_store(self.logs_base_path)
     
     def search(self, 
                query: str, 
@@ -119,9 +124,9 @@ class LogAnalyzer:
         analytics_data = self._collect_analytics_data(start_date, end_date)
         
         # Calculate metrics
-        total_executions = len(analytics_data['executions'])
-        success_rate = self._calculate_success_rate(analytics_data['executions'])
-        average_duration = self._calculate_average_duration(analytics_data['executions'])
+        total_executions = analytics_data['total_executions']
+        success_rate = self._calculate_success_rate(analytics_data)
+        average_duration = self._calculate_average_duration(analytics_data)
         
         # Analyze patterns
         most_active_days = self._analyze_activity_patterns(analytics_data['daily_counts'])
@@ -130,7 +135,7 @@ class LogAnalyzer:
         most_used_agents = self._analyze_agent_usage(analytics_data['agents'])
         
         # Performance trends
-        performance_trends = self._analyze_performance_trends(analytics_data['executions'])
+        performance_trends = self._analyze_performance_trends(analytics_data)
         
         # Usage patterns
         usage_patterns = self._analyze_usage_patterns(analytics_data)
@@ -155,17 +160,11 @@ class LogAnalyzer:
     def get_execution_details(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Get full execution details for a session"""
         # Search across all daily logs for the session
-        for daily_dir in self.logs_base_path.glob("executions/*/"):
-            index_path = daily_dir / "index.json"
-            
-            if not index_path.exists():
-                continue
+        for index in iter_day_indexes(self.logs_base_path):
+            daily_dir = index.day_path
                 
             try:
-                with open(index_path, 'r', encoding='utf-8') as f:
-                    index_data = json.load(f)
-                
-                for entry in index_data:
+                for entry in index.entries():
                     if entry.get('session_id') == session_id:
                         # Load full log content
                         log_path = daily_dir / entry['log_filename']
@@ -178,7 +177,7 @@ class LogAnalyzer:
                         }
                         
             except Exception as e:
-                print(f"Error reading {index_path}: {e}")
+                print(f"Error reading {daily_dir}: {e}")
                 continue
         
         return None
@@ -250,17 +249,17 @@ class LogAnalyzer:
     
     def get_performance_insights(self, days: int = 30) -> Dict[str, Any]:
         """Get detailed performance insights"""
-        analytics_data = self._collect_analytics_data(
-            datetime.now() - timedelta(days=days),
-            datetime.now()
-        )
+        start_date = datetime.now() - timedelta(days=days)
+        end_date = datetime.now()
+        # Percentiles and per-session breakdowns need the individual entries
+        executions = self._load_executions(start_date, end_date)
         
         insights = {
-            'efficiency_metrics': self._analyze_efficiency(analytics_data['executions']),
-            'bottlenecks': self._identify_bottlenecks(analytics_data['executions']),
-            'success_patterns': self._analyze_success_patterns(analytics_data['executions']),
-            'time_patterns': self._analyze_time_patterns(analytics_data['executions']),
-            'tool_effectiveness': self._analyze_tool_effectiveness(analytics_data)
+            'efficiency_metrics': self._analyze_efficiency(executions),
+            'bottlenecks': self._identify_bottlenecks(executions),
+            'success_patterns': self._analyze_success_patterns(executions),
+            'time_patterns': self._analyze_time_patterns(executions),
+            'tool_effectiveness': self._analyze_tool_effectiveness(self._collect_analytics_data(start_date, end_date))
         }
         
         return insights
@@ -290,16 +289,8 @@ class LogAnalyzer:
         if not daily_path.exists():
             return results
         
-        index_path = daily_path / "index.json"
-        
-        if not index_path.exists():
-            return results
-        
         try:
-            with open(index_path, 'r', encoding='utf-8') as f:
-                index_data = json.load(f)
-            
-            for entry in index_data:
+            for entry in DayIndex(daily_path).entries():
                 relevance_score, matched_terms = self._calculate_relevance(
                     entry, query_terms, daily_path if include_content else None
                 )
@@ -347,92 +338,91 @@ class LogAnalyzer:
         
         # Search in full content if requested
         if log_dir and entry.get('log_filename'):
-            log_path = log_dir / entry['log_filename']
-            if log_path.exists():
-                content = self._load_log_content(log_path)
-                if content:
-                    content_lower = content.lower()
-                    for term in query_terms:
-                        if term.lower() in content_lower:
-                            score += 0.5
-                            if term not in matched_terms:
-                                matched_terms.append(term)
+            # Older logs are compressed or packed into their day
+            content = read_log(log_dir, entry['log_filename'])
+            if content:
+                content_lower = content.lower()
+                for term in query_terms:
+                    if term.lower() in content_lower:
+                        score += 0.5
+                        if term not in matched_terms:
+                            matched_terms.append(term)
         
         return score, matched_terms
     
     def _load_log_content(self, log_path: Path) -> Optional[str]:
-        """Load log file content (handles compressed files)"""
+        """Load log file content (plain, compressed or packed into its day)"""
         try:
-            if log_path.suffix == '.gz':
-                with gzip.open(log_path, 'rt', encoding='utf-8') as f:
-                    return f.read()
-            else:
-                with open(log_path, 'r', encoding='utf-8') as f:
-                    return f.read()
+            content = read_log(log_path.parent, log_path.name)
+            if content is None:
+                raise FileNotFoundError(f"No such log: {log_path}")
+            return content
         except Exception as e:
             print(f"Error loading log content from {log_path}: {e}")
             return None
     
+    def _rollup_table(self):
+        """Rollup snapshot, rebuilt from the daily indexes when its execution count differs"""
+        table = self.rollups.table()
+        stored = sum(count for count, _ in table.group(EXECUTIONS_DIM).values())
+        if int(stored) != indexed_executions(self.logs_base_path):
+            # Missing, started on top of older history, or days have expired
+            self.rollups.replace(index_rows(self.logs_base_path))
+            table = self.rollups.table()
+        return table
+    
     def _collect_analytics_data(self, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
-        """Collect analytics data across date range"""
-        data = {
-            'executions': [],
-            'daily_counts': defaultdict(int),
-            'keywords': Counter(),
-            'tools': Counter(),
-            'agents': Counter(),
+        """Collect analytics data across date range from the rollup store"""
+        table = self._rollup_table()
+        # Whole days, as the daily index files cover them
+        since = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        until = end_date.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        
+        outcomes = table.group(EXECUTIONS_DIM, since=since, until=until)
+        daily = table.group(EXECUTIONS_DIM, by="day", since=since, until=until)
+        daily_success = table.group(SUCCESS_DIM, by="day", since=since, until=until)
+        timed = table.group(TIMED_DIM, since=since, until=until).get('all', [0, 0])
+        
+        return {
+            'total_executions': int(sum(count for count, _ in outcomes.values())),
+            'successful_executions': int(outcomes.get('success', [0, 0])[0]),
+            'timed_executions': int(timed[0]),
+            'timed_duration': timed[1],
+            'daily_counts': {day: int(count) for day, (count, _) in sorted(daily.items())},
+            'daily_duration': {day: duration for day, (_, duration) in daily.items()},
+            'daily_success': {day: rate for day, (_, rate) in daily_success.items()},
+            'hourly_counts': table.counts(EXECUTIONS_DIM, by="hour", since=since, until=until),
+            'keywords': Counter(table.counts('keywords', since=since, until=until)),
+            'tools': Counter(table.counts('tools', since=since, until=until)),
+            'agents': Counter(table.counts('agents', since=since, until=until)),
             'domains': Counter()
         }
+    
+    def _load_executions(self, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
+        """Index entries of every execution in the date range"""
+        executions = []
         
-        current_date = start_date
-        while current_date <= end_date:
-            daily_path = self.logs_base_path / "executions" / current_date.strftime("%Y-%m-%d")
-            
-            if daily_path.exists():
-                index_path = daily_path / "index.json"
-                
-                if index_path.exists():
-                    try:
-                        with open(index_path, 'r', encoding='utf-8') as f:
-                            daily_data = json.load(f)
-                        
-                        day_key = current_date.strftime("%Y-%m-%d")
-                        data['daily_counts'][day_key] = len(daily_data)
-                        
-                        for entry in daily_data:
-                            data['executions'].append(entry)
-                            
-                            # Count keywords
-                            for keyword in entry.get('keywords', []):
-                                data['keywords'][keyword] += 1
-                            
-                            # Count tools and agents (would need to load full log)
-                            metrics = entry.get('metrics', {})
-                            # Note: Tool and agent data would be extracted from full logs
-                            
-                    except Exception as e:
-                        print(f"Error collecting data from {index_path}: {e}")
-            
-            current_date += timedelta(days=1)
+        for index in iter_day_indexes(self.logs_base_path, start_date, end_date):
+            try:
+                executions.extend(index.entries())
+            except Exception as e:
+                print(f"Error collecting data from {index.day_path}: {e}")
         
-        return data
+        return executions
     
-    def _calculate_success_rate(self, executions: List[Dict[str, Any]]) -> float:
+    def _calculate_success_rate(self, analytics_data: Dict[str, Any]) -> float:
         """Calculate overall success rate"""
-        if not executions:
+        if not analytics_data['total_executions']:
             return 0.0
         
-        successful = sum(1 for exec in executions 
-                        if exec.get('metrics', {}).get('success_rate', 0) > 0.5)
-        return successful / len(executions)
+        return analytics_data['successful_executions'] / analytics_data['total_executions']
     
-    def _calculate_average_duration(self, executions: List[Dict[str, Any]]) -> float:
+    def _calculate_average_duration(self, analytics_data: Dict[str, Any]) -> float:
         """Calculate average execution duration"""
-        durations = [exec.get('metrics', {}).get('duration_seconds', 0) 
-                    for exec in executions]
-        durations = [d for d in durations if d > 0]
+        if not analytics_data['timed_executions']:
+            return 0.0
         
-        return statistics.mean(durations) if durations else 0.0
+        return analytics_data['timed_duration'] / analytics_data['timed_executions']
     
     def _analyze_activity_patterns(self, daily_counts: Dict[str, int]) -> List[Tuple[str, int]]:
         """Analyze daily activity patterns"""
@@ -450,83 +440,51 @@ class LogAnalyzer:
         """Analyze agent usage patterns"""
         return agents.most_common(10)
     
-    def _analyze_performance_trends(self, executions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _analyze_performance_trends(self, analytics_data: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze performance trends over time"""
-        # Group by day and calculate daily metrics
-        daily_metrics = defaultdict(list)
-        
-        for exec in executions:
-            timestamp = exec.get('timestamp', '')
-            try:
-                date = datetime.fromisoformat(timestamp).date()
-                duration = exec.get('metrics', {}).get('duration_seconds', 0)
-                success_rate = exec.get('metrics', {}).get('success_rate', 0)
-                
-                daily_metrics[str(date)].append({
-                    'duration': duration,
-                    'success_rate': success_rate
-                })
-            except:
-                continue
-        
-        # Calculate daily averages
+        # Daily averages from the per-day sums
         trends = {}
-        for date, metrics in daily_metrics.items():
-            avg_duration = statistics.mean([m['duration'] for m in metrics])
-            avg_success = statistics.mean([m['success_rate'] for m in metrics])
-            
+        for date, count in analytics_data['daily_counts'].items():
             trends[date] = {
-                'avg_duration': avg_duration,
-                'avg_success_rate': avg_success,
-                'execution_count': len(metrics)
+                'avg_duration': analytics_data['daily_duration'].get(date, 0) / count,
+                'avg_success_rate': analytics_data['daily_success'].get(date, 0) / count,
+                'execution_count': count
             }
         
         return trends
     
     def _analyze_usage_patterns(self, analytics_data: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze usage patterns"""
-        executions = analytics_data['executions']
-        
-        if not executions:
+        if not analytics_data['total_executions']:
             return {}
         
         # Time of day analysis
-        hour_counts = defaultdict(int)
-        for exec in executions:
-            timestamp = exec.get('timestamp', '')
-            try:
-                dt = datetime.fromisoformat(timestamp)
-                hour_counts[dt.hour] += 1
-            except:
-                continue
+        hour_counts = analytics_data['hourly_counts']
         
         # Most active hour
         most_active_hour = max(hour_counts.items(), key=lambda x: x[1]) if hour_counts else (0, 0)
         
         return {
             'most_active_hour': most_active_hour[0],
-            'hourly_distribution': dict(hour_counts),
-            'total_unique_days': len(set(
-                datetime.fromisoformat(exec.get('timestamp', '')).date()
-                for exec in executions if exec.get('timestamp')
-            ))
+            'hourly_distribution': dict(sorted(hour_counts.items())),
+            'total_unique_days': len(analytics_data['daily_counts'])
         }
     
     def _generate_recommendations(self, analytics_data: Dict[str, Any]) -> List[str]:
         """Generate actionable recommendations"""
         recommendations = []
-        executions = analytics_data['executions']
+        total_executions = analytics_data['total_executions']
         
-        if not executions:
+        if not total_executions:
             return ["Start using Claude Code to get personalized recommendations!"]
         
         # Success rate recommendations
-        success_rate = self._calculate_success_rate(executions)
+        success_rate = self._calculate_success_rate(analytics_data)
         if success_rate < 0.8:
             recommendations.append(f"Success rate is {success_rate:.1%}. Review failed executions for common issues.")
         
         # Duration recommendations
-        avg_duration = self._calculate_average_duration(executions)
+        avg_duration = self._calculate_average_duration(analytics_data)
         if avg_duration > 120:  # 2 minutes
             recommendations.append("Sessions are running long. Consider breaking complex tasks into smaller steps.")
         
@@ -537,7 +495,7 @@ class LogAnalyzer:
             recommendations.append(f"You frequently work with '{top_keyword}'. Consider creating specialized workflows.")
         
         # Activity patterns
-        if len(executions) < 5:
+        if total_executions < 5:
             recommendations.append("Try using Claude Code more regularly to build better analytics insights.")
         
         return recommendations
@@ -781,6 +739,17 @@ def main():
     similar_parser.add_argument('session_id', help='Base session ID')
     similar_parser.add_argument('--limit', type=int, default=5, help='Maximum results')
     
+    # Compact command
+    defaults = CompactionTiers()
+    compact_parser = subparsers.add_parser('compact', help='Compress, pack and expire old execution logs')
+    compact_parser.add_argument('--hot-days', type=int, default=defaults.hot_days,
+                                help=f'Days kept uncompressed (default: {defaults.hot_days})')
+    compact_parser.add_argument('--warm-days', type=int, default=defaults.warm_days,
+                                help=f'Days before logs are packed per day (default: {defaults.warm_days})')
+    compact_parser.add_argument('--retention-days', type=int, default=defaults.retention_days,
+                                help=f'Days before logs are removed, 0 to keep (default: {defaults.retention_days})')
+    compact_parser.add_argument('--dry-run', action='store_true', help='Only report what would be done')
+    
     args = parser.parse_args()
     
     if not args.command:
@@ -851,6 +820,36 @@ def main():
                     print()
             else:
                 print("No similar sessions found")
+        
+        elif args.command == 'compact':
+            tiers = CompactionTiers(args.hot_days, args.warm_days, args.retention_days or None)
+            compactor = LogCompactor(analyzer.logs_base_path, tiers)
+            
+            def progress(done, total, day, tier, result):
+                if result['deleted_days']:
+                    detail = f"removed ({result['freed_bytes']:,} bytes)"
+                elif result['compressed_logs'] or result['packed_logs']:
+                    count = result['compressed_logs'] or result['packed_logs']
+                    action = "compressed" if tier == "warm" else "packed"
+                    sizes = (f"{result['bytes_before']:,} bytes" if args.dry_run
+                             else f"{result['bytes_before']:,} -> {result['bytes_after']:,} bytes")
+                    detail = f"{count} logs {action} ({sizes})"
+                else:
+                    detail = "nothing to do"
+                print(f"[{done}/{total}] {day} {tier}: {detail}")
+            
+            report = compactor.sweep(progress=progress, dry_run=args.dry_run)
+            print(f"\n🗜️  {report['compressed_logs']} logs compressed, {report['packed_logs']} logs packed "
+                  f"into {report['packed_days']} days, {report['deleted_days']} days removed"
+                  f"{' (dry run)' if args.dry_run else ''}")
+            if args.dry_run:
+                print(f"Would compress {report['bytes_before']:,} bytes and free {report['freed_bytes']:,} bytes")
+            else:
+                print(f"Saved {report['saved_bytes']:,} bytes "
+                      f"({report['bytes_before']:,} -> {report['bytes_after']:,} compressed, "
+                      f"{report['freed_bytes']:,} removed)")
+            if report['errors']:
+                print(f"⚠️  {report['errors']} days failed, see the logger output")
                 
     except Exception as e:
         print(f"Error: {e}")
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Execution Log Compaction
+
+Tiered storage for the daily ``logs/executions/YYYY-MM-DD/`` directories,
+by age of the day:
+
+- hot (younger than ``hot_days``): plain ``.log`` files, still written to
+- warm (younger than ``warm_days``): every closed log gzip-compressed on
+  its own (``.log.gz``)
+- cold: all logs of the day packed into one ``logs.pack``, a sequence of
+  gzip members followed by a JSON table of contents (log name -> offset,
+  length, size) and a fixed trailer, so one log is read with one seek
+- expired (``retention_days`` and older): the directory is removed
+
+A log is closed once its session is in the day index, or once its day is
+two days old. Day indexes stay uncompressed in every tier, so searches and
+analytics never read logs. ``CompactionWorker`` runs sweeps in a
+background thread, the first one interval after it starts; ClaudeLogger
+starts one, and ``log_analyzer.py compact`` runs a sweep on demand with
+progress and savings reporting. Each sweep first removes temporary files
+left behind by processes killed mid-compaction.
+
+Author: Claude Code Research System
+Version: 1.0.0
+"""
+
+import atexit
+import gzip
+import json
+import shutil
+import struct
+import sys
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional, Tuple
+import logging
+
+# Locking helpers live with the cache system
+sys.path.append(str(Path(__file__).parent.parent / "cache"))
+from cache_locks import atomic_write, file_lock, remove_stale_temp_files
+from log_index import DayIndex
+
+logger = logging.getLogger(__name__)
+
+PACK_NAME = "logs.pack"
+PACK_MAGIC = b"CLPACK01"
+TRAILER = struct.Struct(">Q8s")
+LOCK_NAME = ".compaction.lock"
+COMPRESSION_LEVEL = 6
+# Sessions never stay open for two days: older logs are closed either way
+CLOSED_AFTER_DAYS = 2
+
+
+@dataclass
+class CompactionTiers:
+    """Ages in days at which execution logs move to the next tier"""
+    hot_days: int = 1
+    warm_days: int = 7
+    retention_days: Optional[int] = 90
+    compress: bool = True
+
+    def tier_for(self, age_days: int) -> str:
+        if self.retention_days and age_days >= self.retention_days:
+            return "expired"
+        if not self.compress or age_days < self.hot_days:
+            return "hot"
+        return "warm" if age_days < self.warm_days else "cold"
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "CompactionTiers":
+        """Tiers from ClaudeLogger's ``logging`` configuration"""
+        return cls(
+            hot_days=int(config.get('hot_days', 1)),
+            warm_days=int(config.get('warm_days', 7)),
+            retention_days=config.get('retention_days', 90) or None,
+            compress=bool(config.get('compression', True))
+        )
+
+
+def _gzip_size(member: bytes) -> int:
+    """Uncompressed size recorded in a gzip member's trailer"""
+    return struct.unpack("<I", member[-4:])[0]
+
+
+def read_pack_toc(pack_path: Path) -> Dict[str, List[int]]:
+    """Table of contents of a day pack: log name -> [offset, length, size]"""
+    with open(pack_path, 'rb') as f:
+        f.seek(-TRAILER.size, 2)
+        end = f.tell()
+        toc_offset, magic = TRAILER.unpack(f.read(TRAILER.size))
+        if magic != PACK_MAGIC:
+            raise ValueError(f"not an execution log pack: {pack_path}")
+        f.seek(toc_offset)
+        return json.loads(f.read(end - toc_offset).decode('utf-8'))
+
+
+def day_logs(day_path: Path) -> Dict[str, Path]:
+    """Loose logs of a day by ``.log`` name, plain or compressed"""
+    logs = {}
+    for path in Path(day_path).iterdir():
+        if path.name.endswith('.log.gz'):
+            logs.setdefault(path.name[:-3], path)
+        elif path.suffix == '.log':
+            # A plain log wins over a .gz left by an interrupted compression
+            logs[path.name] = path
+    return logs
+
+
+def read_log(day_path: Path, log_filename: str) -> Optional[str]:
+    """Text of an execution log in whichever tier it is stored, None if gone"""
+    day_path = Path(day_path)
+    log_path = day_path / log_filename
+    if log_path.exists():
+        return log_path.read_text(encoding='utf-8')
+    gz_path = day_path / f"{log_filename}.gz"
+    if gz_path.exists():
+        with gzip.open(gz_path, 'rt', encoding='utf-8') as f:
+            return f.read()
+    pack_path = day_path / PACK_NAME
+    if pack_path.exists():
+        member = read_pack_toc(pack_path).get(log_filename)
+        if member is not None:
+            offset, length, _ = member
+            with open(pack_path, 'rb') as f:
+                f.seek(offset)
+                return gzip.decompress(f.read(length)).decode('utf-8')
+    return None
+
+
+def compress_log(log_path: Path) -> Tuple[int, int]:
+    """Replace a plain log by its .gz, return (bytes before, bytes after)"""
+    data = log_path.read_bytes()
+    compressed = gzip.compress(data, COMPRESSION_LEVEL)
+    atomic_write(log_path.with_name(log_path.name + '.gz'), compressed, fsync=True)
+    log_path.unlink()
+    return len(data), len(compressed)
+
+
+def pack_day(day_path: Path, logs: Dict[str, Path]) -> Tuple[int, int]:
+    """Pack loose logs (and any existing pack) into logs.pack, return (bytes before, bytes after)"""
+    pack_path = Path(day_path) / PACK_NAME
+    members: List[bytes] = []
+    toc: Dict[str, List[int]] = {}
+    offset = 0
+    before = 0
+
+    def add(name: str, member: bytes, size: int):
+        nonlocal offset
+        toc[name] = [offset, len(member), size]
+        members.append(member)
+        offset += len(member)
+
+    if pack_path.exists():
+        before += pack_path.stat().st_size
+        with open(pack_path, 'rb') as f:
+            for name, (member_offset, length, size) in read_pack_toc(pack_path).items():
+                if name not in logs:
+                    f.seek(member_offset)
+                    add(name, f.read(length), size)
+    for name, path in sorted(logs.items()):
+        data = path.read_bytes()
+        before += len(data)
+        if path.name.endswith('.gz'):
+            # A gzip file is a valid member as it is
+            add(name, data, _gzip_size(data))
+        else:
+            add(name, gzip.compress(data, COMPRESSION_LEVEL), len(data))
+
+    toc_bytes = json.dumps(toc, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    payload = b"".join(members) + toc_bytes + TRAILER.pack(offset, PACK_MAGIC)
+    atomic_write(pack_path, payload, fsync=True)
+    # Sources are removed only once the pack is durable
+    for path in logs.values():
+        path.unlink()
+        if path.suffix == '.log':
+            # With the .gz an interrupted compression may have left
+            path.with_name(path.name + '.gz').unlink(missing_ok=True)
+    return before, len(payload)
+
+
+def _directory_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob('*') if f.is_file())
+
+
+class LogCompactor:
+    """Applies the compaction tiers to every day of a logs directory"""
+
+    def __init__(self, logs_base_path: Path, tiers: Optional[CompactionTiers] = None):
+        self.executions_path = Path(logs_base_path) / "executions"
+        self.tiers = tiers or CompactionTiers()
+        self.lock_path = self.executions_path / LOCK_NAME
+
+    def plan(self, now: Optional[datetime] = None) -> List[Tuple[Path, str]]:
+        """(day directory, tier) of every past day that may need work, oldest first"""
+        today = (now or datetime.now()).date()
+        days = []
+        if not self.executions_path.exists():
+            return days
+        for day_path in sorted(self.executions_path.iterdir()):
+            try:
+                day = datetime.strptime(day_path.name, "%Y-%m-%d").date()
+            except ValueError:
+                continue
+            tier = self.tiers.tier_for((today - day).days)
+            if tier != "hot" and day_path.is_dir():
+                days.append((day_path, tier))
+        return days
+
+    def _closed_logs(self, day_path: Path, age_days: int) -> Dict[str, Path]:
+        logs = day_logs(day_path)
+        if age_days >= CLOSED_AFTER_DAYS:
+            return logs
+        closed = {entry.get('log_filename') for entry in DayIndex(day_path).entries()}
+        return {name: path for name, path in logs.items() if name in closed}
+
+    def _compact_day(self, day_path: Path, tier: str, age_days: int, dry_run: bool) -> Dict[str, int]:
+        result = {'compressed_logs': 0, 'packed_logs': 0, 'deleted_days': 0,
+                  'bytes_before': 0, 'bytes_after': 0, 'freed_bytes': 0}
+        if tier == "expired":
+            result['deleted_days'] = 1
+            result['freed_bytes'] = _directory_size(day_path)
+            if not dry_run:
+                shutil.rmtree(day_path)
+            return result
+
+        if not dry_run:
+            # Left by a process killed mid-compress or mid-pack
+            remove_stale_temp_files(day_path)
+        index = DayIndex(day_path)
+        if not dry_run and index.journal_path.exists():
+            # Sessions rarely end on a past day any more: fold its index journal
+            index.compact()
+        logs = self._closed_logs(day_path, age_days)
+        if tier == "warm":
+            logs = {name: path for name, path in logs.items() if path.suffix == '.log'}
+            for path in logs.values():
+                if dry_run:
+                    result['bytes_before'] += path.stat().st_size
+                    continue
+                before, after = compress_log(path)
+                result['bytes_before'] += before
+                result['bytes_after'] += after
+            result['compressed_logs'] = len(logs)
+        elif logs:
+            if dry_run:
+                result['bytes_before'] = sum(path.stat().st_size for path in logs.values())
+            else:
+                result['bytes_before'], result['bytes_after'] = pack_day(day_path, logs)
+            result['packed_logs'] = len(logs)
+        return result
+
+    def sweep(self, progress: Optional[Callable[[int, int, str, str, Dict[str, int]], None]] = None,
+              dry_run: bool = False, now: Optional[datetime] = None,
+              stop_event: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """Move every day to its tier
+
+        ``progress(done, total, day, tier, result)`` is called after each
+        day. Each day is handled under the compaction lock, so sweeps from
+        several processes never work on the same day at once; setting
+        ``stop_event`` ends the sweep between two days.
+        """
+        now = now or datetime.now()
+        plan = self.plan(now)
+        report = {'days': len(plan), 'compressed_logs': 0, 'packed_days': 0, 'packed_logs': 0,
+                  'deleted_days': 0, 'bytes_before': 0, 'bytes_after': 0, 'freed_bytes': 0,
+                  'dry_run': dry_run, 'errors': 0}
+
+        for done, (day_path, tier) in enumerate(plan, 1):
+            if stop_event is not None and stop_event.is_set():
+                break
+            age_days = (now.date() - datetime.strptime(day_path.name, "%Y-%m-%d").date()).days
+            try:
+                with file_lock(self.lock_path):
+                    if not day_path.exists():
+                        continue
+                    result = self._compact_day(day_path, tier, age_days, dry_run)
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to compact {day_path}: {e}")
+                report['errors'] += 1
+                continue
+            for key, value in result.items():
+                report[key] += value
+            report['packed_days'] += 1 if result['packed_logs'] else 0
+            if progress:
+                progress(done, len(plan), day_path.name, tier, result)
+
+        report['saved_bytes'] = report['bytes_before'] - report['bytes_after'] + report['freed_bytes']
+        return report
+
+
+class CompactionWorker:
+    """Background thread running a LogCompactor sweep every interval"""
+
+    def __init__(self, compactor: LogCompactor, interval: float = 3600.0):
+        self.compactor = compactor
+        self.interval = interval
+        self.last_report: Optional[Dict[str, Any]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+
+    def start(self):
+        """Start the worker; its first sweep runs one full interval later
+
+        Short-lived processes therefore never sweep, and a sweep in
+        progress is finished (up to the current day) at interpreter exit.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._wake_event.clear()
+        self._thread = threading.Thread(target=self._run, name="log-compaction", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop once the day being compacted, if any, is done"""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._wake_event.set()
+        self._thread.join(timeout)
+        self._thread = None
+        atexit.unregister(self.stop)
+
+    def trigger(self):
+        """Run a sweep now instead of at the next interval"""
+        self._wake_event.set()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._wake_event.wait(self.interval)
+            self._wake_event.clear()
+            if self._stop_event.is_set():
+                break
+            try:
+                report = self.compactor.sweep(progress=self._progress, stop_event=self._stop_event)
+            except Exception as e:
+                logger.error(f"Log compaction sweep failed: {e}")
+                continue
+            self.last_report = report
+            if report['days']:
+                logger.info(f"Log compaction: {report['compressed_logs']} logs compressed, "
+                            f"{report['packed_days']} days packed, {report['deleted_days']} days removed, "
+                            f"{report['saved_bytes']:,} bytes saved")
+
+    def _progress(self, done: int, total: int, day: str, tier: str, result: Dict[str, int]):
+        logger.debug(f"Log compaction {done}/{total}: {day} -> {tier}")
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Execution Log Day Index
+
+Searchable index of the executions of one day, kept in the day's
+``logs/executions/YYYY-MM-DD/`` directory as:
+
+- ``index.journal``: append-only NDJSON, one line per completed session,
+  appended under an exclusive ``flock`` on ``index.lock``
+- ``index.json``: compact snapshot, a JSON array sorted by timestamp
+
+ClaudeLogger appends one journal line per session instead of rewriting
+the whole index. Once the journal passes COMPACT_BYTES (or when a past
+day is read) it is folded into the snapshot, written atomically, and a
+fresh journal is started. Readers merge the snapshot with the journal;
+days indexed before the journal existed only have a snapshot and read
+unchanged.
+
+Author: Claude Code Research System
+Version: 1.0.0
+"""
+
+import json
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional
+import logging
+
+# Locking helpers live with the cache system
+sys.path.append(str(Path(__file__).parent.parent / "cache"))
+from cache_locks import atomic_write, file_lock
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_NAME = "index.json"
+JOURNAL_NAME = "index.journal"
+LOCK_NAME = "index.lock"
+COMPACT_BYTES = 64 * 1024
+
+
+class DayIndex:
+    """Snapshot plus journal index of one day of executions"""
+
+    def __init__(self, day_path: Path, compact_bytes: int = COMPACT_BYTES):
+        self.day_path = Path(day_path)
+        self.snapshot_path = self.day_path / SNAPSHOT_NAME
+        self.journal_path = self.day_path / JOURNAL_NAME
+        self.lock_path = self.day_path / LOCK_NAME
+        self.compact_bytes = compact_bytes
+
+    def exists(self) -> bool:
+        return self.snapshot_path.exists() or self.journal_path.exists()
+
+    def append(self, entry: Dict[str, Any]):
+        """Add one execution; safe against concurrent writers in any process"""
+        line = (json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + "\n").encode('utf-8')
+        self.day_path.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.lock_path):
+            # One write() of the whole line with O_APPEND: lines never interleave
+            fd = os.open(self.journal_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            try:
+                os.write(fd, line)
+                size = os.fstat(fd).st_size
+            finally:
+                os.close(fd)
+            if size > self.compact_bytes:
+                self._compact_locked()
+
+    def _read_snapshot(self) -> List[Dict[str, Any]]:
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def _read_journal(self) -> List[Dict[str, Any]]:
+        try:
+            with open(self.journal_path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        entries = []
+        for line in data.split(b"\n"):
+            if not line:
+                continue
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                # A torn line from a writer killed mid-append
+                logger.warning(f"Skipping unreadable index journal line in {self.journal_path}")
+        return entries
+
+    def _merged_locked(self) -> List[Dict[str, Any]]:
+        # Keyed by session so a journal left behind by an interrupted
+        # compaction does not list its sessions twice
+        merged = {}
+        for position, entry in enumerate(self._read_snapshot() + self._read_journal()):
+            merged[entry.get('session_id') or position] = entry
+        return sorted(merged.values(), key=lambda entry: entry.get('timestamp', ''))
+
+    def _compact_locked(self):
+        entries = self._merged_locked()
+        atomic_write(self.snapshot_path, json.dumps(entries, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        # The journal is folded into the snapshot: start a fresh one
+        try:
+            os.unlink(self.journal_path)
+        except FileNotFoundError:
+            pass
+
+    def compact(self) -> int:
+        """Fold the journal into the snapshot, return the number of entries"""
+        if not self.day_path.exists():
+            return 0
+        with file_lock(self.lock_path):
+            self._compact_locked()
+            return len(self._read_snapshot())
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Every execution of the day, sorted by timestamp"""
+        if not self.exists():
+            return []
+        if self.journal_path.exists() and self._is_past_day():
+            # Past days rarely change any more: fold their journal on read
+            with file_lock(self.lock_path):
+                self._compact_locked()
+                return self._read_snapshot()
+        with file_lock(self.lock_path, shared=True):
+            return self._merged_locked()
+
+    def _is_past_day(self) -> bool:
+        try:
+            return datetime.strptime(self.day_path.name, "%Y-%m-%d").date() < datetime.now().date()
+        except ValueError:
+            return False
+
+
+def iter_day_indexes(logs_base_path: Path, since: Optional[datetime] = None,
+                     until: Optional[datetime] = None) -> Iterator[DayIndex]:
+    """Day indexes of a logs directory, oldest first, optionally within a date range"""
+    first = since.strftime("%Y-%m-%d") if since else ""
+    last = until.strftime("%Y-%m-%d") if until else "9999"
+    for day_path in sorted(Path(logs_base_path).glob("executions/*/")):
+        if first <= day_path.name <= last:
+            index = DayIndex(day_path)
+            if index.exists():
+                yield index
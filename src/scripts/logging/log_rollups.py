@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Execution Log Rollups
+
+Rollup rows for ClaudeLogger executions, stored with the cache system's
+columnar rollup store in ``logs/analytics/executions.cols``. ClaudeLogger
+appends the rows of every session it completes; LogAnalyzer answers its
+counters (per day, hour, keyword, tool and agent) from the store and
+rebuilds it from the daily indexes (see log_index.py) when its execution
+count does not match theirs: when it is missing, was started by
+ClaudeLogger appends on top of older history, or days have expired.
+
+Dimensions:
+- executions: key success/failure, total = duration in seconds
+- success_rate: per-execution success rate, summed
+- timed: executions with a measured duration, total = duration
+- keywords, tools, agents: one count per occurrence
+
+Author: Claude Code Research System
+Version: 1.0.0
+"""
+
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional
+
+# The rollup store lives with the cache system
+sys.path.append(str(Path(__file__).parent.parent / "cache"))
+from cache_rollups import Row, RollupStore, rollup_row
+from log_index import iter_day_indexes
+
+ROLLUP_NAME = "executions"
+EXECUTIONS_DIM = "executions"
+SUCCESS_DIM = "success_rate"
+TIMED_DIM = "timed"
+
+
+def execution_store(logs_base_path: Path) -> RollupStore:
+    """Rollup store of a logs directory"""
+    return RollupStore(Path(logs_base_path) / "analytics", ROLLUP_NAME)
+
+
+def _entry_time(entry: Dict[str, Any]) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(entry.get('timestamp', ''))
+    except (TypeError, ValueError):
+        return None
+
+
+def execution_rows(entry: Dict[str, Any]) -> List[Row]:
+    """Rollup rows of one index entry"""
+    when = _entry_time(entry)
+    if when is None:
+        return []
+
+    metrics = entry.get('metrics', {})
+    duration = metrics.get('duration_seconds', 0) or 0
+    success_rate = metrics.get('success_rate', 0) or 0
+    rows = [
+        rollup_row(when, EXECUTIONS_DIM, 'success' if success_rate > 0.5 else 'failure', 1, duration),
+        rollup_row(when, SUCCESS_DIM, 'all', 1, success_rate)
+    ]
+    if duration > 0:
+        rows.append(rollup_row(when, TIMED_DIM, 'all', 1, duration))
+    rows += [rollup_row(when, 'keywords', keyword) for keyword in entry.get('keywords', [])]
+    rows += [rollup_row(when, 'tools', tool) for tool in entry.get('tools', [])]
+    rows += [rollup_row(when, 'agents', agent) for agent in entry.get('agents', [])]
+    return rows
+
+
+def _index_entries(logs_base_path: Path) -> Iterator[Dict[str, Any]]:
+    for index in iter_day_indexes(logs_base_path):
+        try:
+            entries = index.entries()
+        except (OSError, ValueError) as e:
+            print(f"Error reading {index.day_path}: {e}")
+            continue
+        yield from entries
+
+
+def index_rows(logs_base_path: Path) -> Iterator[Row]:
+    """Rollup rows of every entry in the daily indexes"""
+    for entry in _index_entries(logs_base_path):
+        yield from execution_rows(entry)
+
+
+def indexed_executions(logs_base_path: Path) -> int:
+    """Executions in the daily indexes that have rollup rows"""
+    return sum(1 for entry in _index_entries(logs_base_path) if _entry_time(entry) is not None)